@@ -1,18 +1,42 @@
-from flask import Flask, jsonify, request
+import atexit
+import os
+import threading
+import time
+
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-import joblib
 import numpy as np
 
+import wire
+
+from batching import MicroBatcher
+from cache import PredictionCache
+from metrics import Metrics, StackSampler
+from parallel import ShardedScorer, VersionMismatch
+from schema import LABEL_MAP, FeatureSchema, ValidationError
+from compiled_model import AffinePredictor, FusedPredictor, compile_model
+from model_store import ModelNotReady, ModelStore
+
 app = Flask(__name__)
 CORS(app)
 
-# ===== Chargement du modèle =====
-print("📦 Chargement du modèle...")
-model_data = joblib.load("juice_model.pkl")
-model = model_data["model"]
-scaler = model_data["scaler"]   # None si modèle = Pipeline SVM
-feature_names = model_data.get("feature_names", [])
-print("✅ Modèle et scaler chargés avec succès!")
+MODEL_PATH = os.environ.get("MODEL_PATH", "juice_model.pkl")
+
+# Prédicteur compilé : scaler replié dans le modèle, appliqué aux valeurs brutes.
+# Moteur d'arbres NumPy pour XGBoost (désactivable) ; au-delà de
+# TREE_ENGINE_MAX_ROWS lignes, le moteur C++ d'XGBoost reprend la main.
+USE_TREE_ENGINE = os.environ.get("USE_TREE_ENGINE", "1") == "1"
+TREE_ENGINE_MAX_ROWS = int(os.environ.get("TREE_ENGINE_MAX_ROWS", "16"))
+
+# Chargement paresseux : le modèle est chargé en arrière-plan à la première
+# requête (MODEL_PRELOAD=1 pour le charger dès le démarrage). Le modèle
+# compilé est relu en mmap depuis juice_model.pkl.mmap (MODEL_MMAP=0 pour désactiver).
+MODEL_PRELOAD = os.environ.get("MODEL_PRELOAD", "0") == "1"
+MODEL_MMAP = os.environ.get("MODEL_MMAP", "1") == "1"
+MODEL_LOAD_TIMEOUT = float(os.environ.get("MODEL_LOAD_TIMEOUT", "60"))
+
+# Rechargement à chaud : intervalle de scrutation du pickle en secondes (0 = désactivé)
+MODEL_POLL_INTERVAL = float(os.environ.get("MODEL_POLL_INTERVAL", "30"))
 
 # Ordre des features attendu (même que dans le notebook)
 FEATURE_ORDER = [
@@ -29,90 +53,695 @@ FEATURE_ORDER = [
     "alcohol",
 ]
 
-# Mapping numérique -> label lisible
-LABEL_MAP = {
-    0: "Mauvais",
-    1: "Moyen",
-    2: "Bon",
-}
+# Schéma compilé : alias de champs (noms CSV acceptés) + bornes physiques
+schema = FeatureSchema(FEATURE_ORDER)
+
+store = ModelStore(
+    MODEL_PATH,
+    lambda model_data: compile_model(model_data, USE_TREE_ENGINE, TREE_ENGINE_MAX_ROWS),
+    use_mmap=MODEL_MMAP,
+    default_classes=sorted(LABEL_MAP),
+    compile_key=(USE_TREE_ENGINE, TREE_ENGINE_MAX_ROWS),
+)
+
+# Taille maximale d'un lot pour /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "1000"))
+
+# Micro-batching optionnel des requêtes /predict concurrentes
+MICROBATCH_ENABLED = os.environ.get("MICROBATCH_ENABLED", "0") == "1"
+MICROBATCH_WINDOW_MS = float(os.environ.get("MICROBATCH_WINDOW_MS", "2"))
+MICROBATCH_MAX_ROWS = int(os.environ.get("MICROBATCH_MAX_ROWS", "64"))
+
+# Cache des prédictions /predict (PREDICT_CACHE_SIZE=0 pour désactiver)
+PREDICT_CACHE_SIZE = int(os.environ.get("PREDICT_CACHE_SIZE", "4096"))
+PREDICT_CACHE_TTL = float(os.environ.get("PREDICT_CACHE_TTL", "300"))
+PREDICT_CACHE_DECIMALS = int(os.environ.get("PREDICT_CACHE_DECIMALS", "6"))
+
+# Instrumentation par étape exposée sur /metrics (METRICS_ENABLED=0 pour désactiver)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+# Profileur par échantillonnage sur /debug/profile (désactivé par défaut)
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "0") == "1"
+PROFILER_MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", "30"))
 
-def prepare_features(payload: dict) -> np.ndarray:
-    """Construit le vecteur X dans le bon ordre + applique le scaler si nécessaire."""
-    values = []
-    for feat in FEATURE_ORDER:
-        if feat not in payload:
-            raise ValueError(f"Champ manquant : {feat}")
-        values.append(float(payload[feat]))
+# Gros lots répartis sur un pool de processus (PARALLEL_WORKERS=0 : désactivé).
+# Utile avec un MAX_BATCH_SIZE relevé au-delà de PARALLEL_MIN_ROWS.
+PARALLEL_WORKERS = int(os.environ.get("PARALLEL_WORKERS", "0"))
+PARALLEL_MIN_ROWS = int(os.environ.get("PARALLEL_MIN_ROWS", "4096"))
+# Délai minimal (secondes) entre deux tentatives de (re)démarrage du pool après un échec
+PARALLEL_RETRY_INTERVAL = float(os.environ.get("PARALLEL_RETRY_INTERVAL", "30"))
 
-    X = np.array(values).reshape(1, -1)
+# Mode debug Flask (rechargeur : second processus) pour le développement uniquement
+FLASK_DEBUG = os.environ.get("FLASK_DEBUG", "0") == "1"
 
-    # Si scaler externe (cas XGBoost), on l'applique
-    if scaler is not None:
-        X = scaler.transform(X)
+metrics = Metrics(enabled=METRICS_ENABLED)
+profiler = StackSampler() if PROFILER_ENABLED else None
 
+
+def prepare_features(payload: dict, current=None) -> np.ndarray:
+    """Construit le vecteur X dans le bon ordre.
+
+    Les valeurs sont écrêtées aux bornes IQR du prétraitement de ``current``
+    (comme les données d'entraînement) ; la standardisation est repliée dans
+    ``predictor`` (voir ``compiled_model``).
+    Lève ``ValidationError`` (erreurs par champ) si le payload est invalide.
+    """
+    X = np.empty((1, schema.n_features), dtype=np.float64)
+    schema.parse(payload, X[0])
+    if current is not None:
+        current.clip(X)
     return X
 
 
-@app.route("/")
-def home():
-    return """
+def split_batch(data) -> list:
+    """Normalise le corps de /predict/batch en une liste d'échantillons.
+
+    Formats acceptés :
+    - une liste d'objets ``[{...}, {...}]``
+    - ``{"samples": [{...}, {...}]}``
+    - un objet colonnaire ``{"fixed_acidity": [...], "pH": [...], ...}``
+    """
+    if isinstance(data, dict) and "samples" in data:
+        data = data["samples"]
+
+    if isinstance(data, list):
+        return data
+
+    if isinstance(data, dict):
+        columns = {name: col for name, col in data.items() if isinstance(col, list)}
+        lengths = {len(col) for col in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("Format colonnaire invalide : colonnes manquantes ou de longueurs différentes")
+        n_rows = lengths.pop()
+        return [
+            {name: col[i] for name, col in columns.items()}
+            for i in range(n_rows)
+        ]
+
+    raise ValueError("Corps invalide : une liste d'échantillons ou un objet colonnaire est attendu")
+
+
+def prepare_batch(samples: list, current=None):
+    """Construit la matrice X (écrêtée, voir ``prepare_features``) des échantillons valides.
+
+    Retourne ``(X, valid_idx, errors)`` où ``errors`` associe l'indice
+    d'un échantillon rejeté à sa ``ValidationError``.
+    """
+    X = np.empty((len(samples), schema.n_features), dtype=np.float64)
+    valid_idx, errors = [], {}
+    for i, sample in enumerate(samples):
+        try:
+            schema.parse(sample, X[len(valid_idx)])
+            valid_idx.append(i)
+        except ValidationError as e:
+            errors[i] = e
+
+    X = X[:len(valid_idx)]
+    if current is not None:
+        current.clip(X)
+    return X, valid_idx, errors
+
+
+def run_model(X: np.ndarray, current=None):
+    """Inférence en une seule passe.
+
+    Si le modèle expose ``predict_proba``, la classe est déduite par argmax
+    des probabilités (pas de second passage dans l'ensemble d'arbres).
+    Sinon (Pipeline SVC entraîné avec ``probability=False``), on retombe sur
+    ``predict`` et les probabilités valent ``None``.
+    """
+    current = current or store.get(MODEL_LOAD_TIMEOUT)
+    predictor = current.predictor
+    if hasattr(predictor, "predict_proba"):
+        proba = sharded_pass(current, X, "predict_proba")
+        if proba is None:
+            proba = model_pass(predictor, X, "predict_proba")
+        y_pred = current.classes[np.argmax(proba, axis=1)]
+        return y_pred, proba
+
+    y_pred = sharded_pass(current, X, "predict")
+    if y_pred is None:
+        y_pred = model_pass(predictor, X, "predict")
+    return y_pred, None
+
+
+_sharded = None
+_sharded_starting = False
+_sharded_failed_at = None
+_sharded_lock = threading.Lock()
+
+
+def start_sharded():
+    """Démarre (ou redémarre) le pool de processus en arrière-plan.
+
+    Le temps de démarrer les workers et d'y charger le modèle, les gros lots
+    sont calculés en local. Après un échec, pas de nouvelle tentative avant
+    ``PARALLEL_RETRY_INTERVAL`` secondes.
+    """
+    global _sharded_starting
+    with _sharded_lock:
+        if _sharded is not None or _sharded_starting:
+            return
+        if _sharded_failed_at is not None and time.monotonic() - _sharded_failed_at < PARALLEL_RETRY_INTERVAL:
+            return
+        _sharded_starting = True
+    threading.Thread(target=_build_sharded, name="sharded-start", daemon=True).start()
+
+
+def _build_sharded():
+    global _sharded, _sharded_starting
+    scorer = None
+    try:
+        scorer = ShardedScorer(store.path, PARALLEL_WORKERS, USE_TREE_ENGINE, TREE_ENGINE_MAX_ROWS)
+        scorer.warm()
+    except Exception as e:
+        sharded_failed(scorer, e)
+    else:
+        with _sharded_lock:
+            _sharded = scorer
+        print(f"✅ Pool de {PARALLEL_WORKERS} processus prêt pour les lots de {PARALLEL_MIN_ROWS}+ lignes")
+    finally:
+        with _sharded_lock:
+            _sharded_starting = False
+
+
+def sharded_failed(scorer, error):
+    """Journalise et compte l'échec du pool, puis le démonte (reconstruit au prochain gros lot)."""
+    global _sharded, _sharded_failed_at
+    print(f"❌ Pool de processus indisponible, inférence locale : {type(error).__name__}: {error}")
+    metrics.count_error("parallel", type(error).__name__)
+    with _sharded_lock:
+        if _sharded is scorer:
+            _sharded = None
+        _sharded_failed_at = time.monotonic()
+    if scorer is not None:
+        scorer.close(wait=False)
+
+
+def close_sharded():
+    with _sharded_lock:
+        scorer = _sharded
+    if scorer is not None:
+        scorer.close()
+
+
+atexit.register(close_sharded)
+
+
+def sharded_pass(current, X: np.ndarray, method: str):
+    """``predictor.<method>(X)`` réparti sur ``PARALLEL_WORKERS`` processus.
+
+    Retourne ``None`` (l'appelant calcule alors en local) si le lot est trop
+    petit, si le pool est désactivé, pas encore prêt ou en échec, ou si la
+    version de ``current`` n'est plus celle du disque (rollback) : les
+    workers chargent le modèle depuis le pickle.
+    """
+    if PARALLEL_WORKERS <= 0 or len(X) < PARALLEL_MIN_ROWS:
+        return None
+    if current.version != store.disk_version:
+        return None
+    scorer = _sharded
+    if scorer is None:
+        start_sharded()
+        return None
+
+    n_out = len(current.classes) if method == "predict_proba" else 1
+    try:
+        with metrics.stage(f"{method}_sharded"):
+            return scorer.run(X, method, n_out, current.version)
+    except VersionMismatch:
+        # Pickle remplacé mais pas encore rechargé par le processus principal
+        return None
+    except Exception as e:
+        sharded_failed(scorer, e)
+        return None
+
+
+def model_pass(predictor, X: np.ndarray, method: str):
+    """Appelle ``predictor.<method>(X)`` en chronométrant scaler et modèle séparément.
+
+    Le scaler n'est une étape distincte que sur le chemin affine (SVM, lots
+    XGBoost traités par le moteur C++) ; dans le moteur d'arbres il est
+    replié dans les seuils et ne coûte rien.
+    """
+    if not metrics.enabled:
+        return getattr(predictor, method)(X)
+
+    engine = predictor._engine(X) if isinstance(predictor, FusedPredictor) else predictor
+    if isinstance(engine, AffinePredictor):
+        with metrics.stage("scaler"):
+            X = engine.transform(X)
+        engine = engine.estimator
+    with metrics.stage(method):
+        return getattr(engine, method)(X)
+
+
+def format_prediction(y, proba=None, classes=None) -> dict:
+    """Formate une prédiction (classe + probabilités) pour la réponse JSON."""
+    y_int = int(y)
+    probabilities = None
+    confidence = None
+    if proba is not None:
+        probabilities = {
+            LABEL_MAP.get(int(c), str(c)): float(p) for c, p in zip(classes, proba)
+        }
+        confidence = float(np.max(proba))
+
+    return {
+        "prediction": {
+            "label": LABEL_MAP.get(y_int, str(y_int)),
+            "raw": y_int
+        },
+        "confidence": confidence,
+        "probabilities": probabilities
+    }
+
+
+cache = None
+if PREDICT_CACHE_SIZE > 0:
+    cache = PredictionCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_TTL, PREDICT_CACHE_DECIMALS, MODEL_PATH)
+
+batcher = None
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def start():
+    """Démarre les tâches de fond : préchargement, surveillance du pickle, micro-batching, pool.
+
+    Appelée par les points d'entrée (``python api.py``, lifespan de
+    ``asgi.py``, première requête Flask sous un autre serveur) et non à
+    l'import : les workers ``spawn`` du pool réimportent ``__main__``
+    (api.py ou asgi.py) et ne doivent rien démarrer.
+    """
+    global _started, batcher
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    if MODEL_PRELOAD:
+        store.ensure_loading()
+    store.start_watcher(MODEL_POLL_INTERVAL)
+    if MICROBATCH_ENABLED:
+        batcher = MicroBatcher(run_model, MICROBATCH_MAX_ROWS, MICROBATCH_WINDOW_MS)
+    if PARALLEL_WORKERS > 0:
+        start_sharded()
+
+
+HOME_HTML = """
     <html>
         <head><title>Juice Quality API</title></head>
         <body>
             <h1>🍊 Juice Quality Prediction API</h1>
             <p>Use <code>POST /predict</code> to get predictions</p>
+            <p>Use <code>POST /predict/batch</code> to score a list of samples
+               (JSON, or <code>application/x-juice-matrix</code> binary matrices)</p>
             <p>Check <code>GET /health</code> for API status</p>
+            <p>Model versions: <code>GET /model</code>, <code>POST /model/reload</code>,
+               <code>POST /model/rollback</code></p>
+            <p>Prometheus metrics: <code>GET /metrics</code></p>
         </body>
     </html>
     """
 
 
-@app.route("/health", methods=["GET"])
-def health():
-    return jsonify({
-        "status": "healthy",
-        "model_loaded": True,
-        "model_type": type(model).__name__
-    }), 200
+# ===== Logique des endpoints (partagée entre Flask et l'app ASGI) =====
 
+def health_status():
+    # Sonde de disponibilité : déclenche le chargement, 503 tant que le modèle n'est pas prêt
+    store.ensure_loading()
+    ready = store.ready
+    return {
+        "status": "healthy" if ready else store.state,
+        "model_loaded": ready,
+        "model": store.status(),
+        "microbatch": batcher.metrics() if batcher is not None else None,
+        "cache": cache.stats() if cache is not None else None,
+        "latency": metrics.summary() if metrics.enabled else None
+    }, 200 if ready else 503
 
-@app.route("/predict", methods=["POST"])
-def predict():
+
+def record_request(endpoint, start, status, body=None):
+    """Compteur et durée totale d'une requête, étiquetés par version du modèle."""
+    version = (body or {}).get("model_version") or {}
+    metrics.count_request(endpoint, status, version.get("id"), time.perf_counter() - start)
+
+
+def metrics_text() -> str:
+    """Corps de ``GET /metrics`` (format texte Prometheus)."""
+    extra = []
+    if cache is not None:
+        stats = cache.stats()
+        extra += [
+            ("cache_hits_total", "counter", "Prédictions servies par le cache", stats["hits"]),
+            ("cache_misses_total", "counter", "Prédictions absentes du cache", stats["misses"]),
+            ("cache_size", "gauge", "Entrées dans le cache de prédictions", stats["size"]),
+        ]
+    if batcher is not None:
+        stats = batcher.metrics()
+        extra += [
+            ("microbatch_batches_total", "counter", "Lots formés par le micro-batching", stats["batches"]),
+            ("microbatch_avg_batch_size", "gauge", "Taille moyenne des micro-lots", stats["avg_batch_size"]),
+            ("microbatch_pending", "gauge", "Requêtes en attente de micro-lot", stats["pending"]),
+        ]
+    if PARALLEL_WORKERS > 0:
+        extra.append(("parallel_ready", "gauge", "Pool de processus des gros lots prêt (1) ou non (0)",
+                      _sharded is not None))
+    return metrics.render(store.status(), extra)
+
+
+def handle_profile(seconds, interval):
+    """Piles échantillonnées pendant ``seconds`` s (format folded pour flamegraph.pl / speedscope)."""
+    if profiler is None:
+        return "Profileur désactivé (PROFILER_ENABLED=1 pour l'activer)\n", 404
     try:
-        data = request.get_json(force=True)
+        seconds = min(float(seconds), PROFILER_MAX_SECONDS)
+        interval = max(float(interval), 0.001)
+        return profiler.sample(seconds, interval), 200
+    except ValueError as e:
+        return f"{e}\n", 400
+    except RuntimeError as e:
+        return f"{e}\n", 409
 
-        # Préparer les features
-        X = prepare_features(data)
 
-        # Prédiction
-        y_pred = model.predict(X)[0]
+def handle_predict(data):
+    try:
+        # Version courante du modèle, conservée jusqu'à la fin de la requête
+        # (attend la fin du chargement paresseux)
+        current = store.get(MODEL_LOAD_TIMEOUT)
 
-        # Probabilité / confiance si dispo
-        confidence = None
-        if hasattr(model, "predict_proba"):
-            proba = model.predict_proba(X)
-            confidence = float(np.max(proba))
+        # Préparer les features (écrêtées aux bornes de cette version)
+        with metrics.stage("prepare_features"):
+            X = prepare_features(data, current)
 
-        y_int = int(y_pred)
-        label = LABEL_MAP.get(y_int, str(y_int))
+        # Cache : un hit évite le modèle
+        key = None
+        if cache is not None:
+            with metrics.stage("cache_lookup"):
+                key = (current.version, cache.key(X))
+                cached = cache.get(key)
+            if cached is not None:
+                return {"success": True, **cached, "cached": True}, 200
 
-        return jsonify({
+        # Prédiction (une seule passe modèle, regroupée si micro-batching actif)
+        if batcher is not None:
+            with metrics.stage("microbatch"):
+                y, proba = batcher.predict(X, current)
+        else:
+            y_pred, proba = run_model(X, current)
+            y, proba = y_pred[0], None if proba is None else proba[0]
+
+        with metrics.stage("format"):
+            result = format_prediction(y, proba, current.classes)
+            result["model_version"] = current.version_info()
+        if key is not None:
+            cache.put(key, result)
+
+        return {
             "success": True,
-            "prediction": {
-                "label": label,
-                "raw": y_int
-            },
-            "confidence": confidence
-        }), 200
+            **result,
+            "cached": False
+        }, 200
+
+    except ValidationError as e:
+        for kind in {err["error"] for err in e.errors}:
+            metrics.count_error("/predict", kind)
+        return {
+            "success": False,
+            "error": str(e),
+            "errors": e.errors
+        }, 400
+
+    except ModelNotReady as e:
+        metrics.count_error("/predict", "model_not_ready")
+        return {
+            "success": False,
+            "error": str(e)
+        }, 503
 
     except Exception as e:
-        return jsonify({
+        metrics.count_error("/predict", type(e).__name__)
+        return {
             "success": False,
             "error": str(e)
-        }), 400
+        }, 400
+
+
+def handle_predict_batch(data, as_matrix=False):
+    """Lot JSON ; ``as_matrix`` : réponse binaire (``Accept: application/x-juice-matrix``)."""
+    try:
+        with metrics.stage("split_batch"):
+            samples = split_batch(data)
+
+        if len(samples) > MAX_BATCH_SIZE:
+            metrics.count_error("/predict/batch", "batch_too_large")
+            return {
+                "success": False,
+                "error": f"Lot trop grand : {len(samples)} échantillons (max {MAX_BATCH_SIZE})"
+            }, 413
+
+        current = store.get(MODEL_LOAD_TIMEOUT)
+        with metrics.stage("prepare_batch"):
+            X, valid_idx, errors = prepare_batch(samples, current)
+        for err in errors.values():
+            for kind in {field_err["error"] for field_err in err.errors}:
+                metrics.count_error("/predict/batch", kind)
+
+        if as_matrix:
+            return matrix_body(X, valid_idx, len(samples), current), 200
+
+        # Une seule passe modèle pour tout le lot
+        y_pred, proba = np.empty(0, dtype=int), None
+        if len(valid_idx):
+            y_pred, proba = run_model(X, current)
+
+        with metrics.stage("format"):
+            results = [None] * len(samples)
+            for i, err in errors.items():
+                results[i] = {"index": i, "success": False, "error": str(err), "errors": err.errors}
+            for k, i in enumerate(valid_idx):
+                results[i] = {
+                    "index": i,
+                    "success": True,
+                    **format_prediction(y_pred[k], None if proba is None else proba[k], current.classes)
+                }
+
+        return {
+            "success": True,
+            "count": len(samples),
+            "n_errors": len(errors),
+            "results": results,
+            "model_version": current.version_info()
+        }, 200
+
+    except ModelNotReady as e:
+        metrics.count_error("/predict/batch", "model_not_ready")
+        return {
+            "success": False,
+            "error": str(e)
+        }, 503
+
+    except Exception as e:
+        metrics.count_error("/predict/batch", type(e).__name__)
+        return {
+            "success": False,
+            "error": str(e)
+        }, 400
+
+
+def handle_predict_matrix(raw: bytes, as_matrix=True):
+    """Lot binaire ``application/x-juice-matrix`` : décodage sans copie ni parsing par champ.
+
+    Une ligne est rejetée (NaN en réponse) si une valeur manque (NaN) ou
+    sort des bornes physiques du schéma. ``as_matrix=False`` (client qui
+    préfère ``application/json``) : même matrice en listes JSON (``null``
+    pour NaN).
+    """
+    try:
+        with metrics.stage("decode_matrix"):
+            M = wire.decode_matrix(raw, schema.n_features)
+
+        if len(M) > MAX_BATCH_SIZE:
+            metrics.count_error("/predict/batch", "batch_too_large")
+            return {
+                "success": False,
+                "error": f"Lot trop grand : {len(M)} échantillons (max {MAX_BATCH_SIZE})"
+            }, 413
+
+        current = store.get(MODEL_LOAD_TIMEOUT)
+        with metrics.stage("prepare_batch"):
+            in_range = (M >= schema.lower) & (M <= schema.upper)
+            valid = in_range.all(axis=1)
+            valid_idx = np.flatnonzero(valid)
+            # Seule copie : les lignes valides, en float64, écrêtées sur place
+            X = M[valid_idx].astype(np.float64, copy=False)
+            current.clip(X)
+
+        if len(valid_idx) < len(M):
+            missing = np.isnan(M).any(axis=1)
+            metrics.count_error("/predict/batch", "missing", int(missing.sum()))
+            metrics.count_error("/predict/batch", "out_of_range",
+                                int((~in_range & ~np.isnan(M)).any(axis=1).sum()))
+
+        body = matrix_body(X, valid_idx, len(M), current)
+        if not as_matrix:
+            body["matrix"] = np.where(np.isnan(body["matrix"]), None, body["matrix"]).tolist()
+        return body, 200
+
+    except ModelNotReady as e:
+        metrics.count_error("/predict/batch", "model_not_ready")
+        return {
+            "success": False,
+            "error": str(e)
+        }, 503
+
+    except Exception as e:
+        metrics.count_error("/predict/batch", type(e).__name__)
+        return {
+            "success": False,
+            "error": str(e)
+        }, 400
+
+
+def matrix_body(X: np.ndarray, valid_idx, n_rows: int, current) -> dict:
+    """Résultat d'un lot sous forme de matrice (classe, probabilités...), NaN pour les lignes rejetées."""
+    matrix = np.full((n_rows, 1 + len(current.classes)), np.nan)
+    if len(valid_idx):
+        y_pred, proba = run_model(X, current)
+        matrix[valid_idx, 0] = y_pred
+        if proba is not None:
+            matrix[valid_idx, 1:] = proba
+    return {
+        "success": True,
+        "count": n_rows,
+        "n_errors": n_rows - len(valid_idx),
+        "classes": [int(c) for c in current.classes],
+        "matrix": matrix,
+        "model_version": current.version_info()
+    }
+
+
+def matrix_response(body: dict):
+    """Corps ``application/x-juice-matrix`` et en-têtes HTTP d'un résultat de ``matrix_body``."""
+    return wire.encode_matrix(body["matrix"]), {
+        "X-Juice-Count": str(body["count"]),
+        "X-Juice-Errors": str(body["n_errors"]),
+        "X-Juice-Classes": ",".join(str(c) for c in body["classes"]),
+        "X-Juice-Labels": ",".join(LABEL_MAP.get(c, str(c)) for c in body["classes"]),
+        "X-Model-Version": body["model_version"]["id"],
+    }
+
+
+def handle_model_action(action):
+    """Rechargement (``reload``) ou retour arrière (``rollback``) du modèle."""
+    try:
+        current = store.reload() if action == "reload" else store.rollback()
+    except ModelNotReady as e:
+        return {"success": False, "error": str(e)}, 409
+    except Exception as e:
+        return {"success": False, "error": str(e)}, 500
+
+    if cache is not None:
+        cache.clear()
+    return {"success": True, "model": store.status(), "model_version": current.version_info()}, 200
+
+
+# ===== Routes Flask =====
+
+@app.before_request
+def ensure_started():
+    # Serveur WSGI externe (ou client de test) : démarrage à la première requête
+    if not _started:
+        start()
+
+
+@app.route("/")
+def home():
+    return HOME_HTML
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    body, status = health_status()
+    return jsonify(body), status
+
+
+@app.route("/model", methods=["GET"])
+def model_info():
+    return jsonify(store.status()), 200
+
+
+@app.route("/model/reload", methods=["POST"])
+def model_reload():
+    body, status = handle_model_action("reload")
+    return jsonify(body), status
+
+
+@app.route("/model/rollback", methods=["POST"])
+def model_rollback():
+    body, status = handle_model_action("rollback")
+    return jsonify(body), status
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics_text(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/debug/profile", methods=["GET"])
+def debug_profile():
+    text, status = handle_profile(request.args.get("seconds", 5), request.args.get("interval", 0.005))
+    return Response(text, status=status, mimetype="text/plain")
+
+
+def json_endpoint(endpoint, handler, matrix_handler=None):
+    """Parsing JSON, logique partagée, sérialisation : chaque étape est chronométrée.
+
+    Avec ``matrix_handler``, un corps ``application/x-juice-matrix`` lui est
+    passé tel quel (octets bruts) au lieu d'être parsé en JSON.
+    """
+    start = time.perf_counter()
+    if matrix_handler is not None and request.mimetype == wire.MEDIA_TYPE:
+        body, status = matrix_handler(request.get_data())
+    else:
+        try:
+            with metrics.stage("json_parse"):
+                data = request.get_json(force=True)
+        except Exception as e:
+            metrics.count_error(endpoint, "invalid_json")
+            body, status = {"success": False, "error": str(e)}, 400
+        else:
+            body, status = handler(data)
+
+    with metrics.stage("serialize"):
+        if isinstance(body.get("matrix"), np.ndarray):
+            content, headers = matrix_response(body)
+            response = Response(content, mimetype=wire.MEDIA_TYPE, headers=headers)
+        else:
+            response = jsonify(body)
+    record_request(endpoint, start, status, body)
+    return response, status
+
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    return json_endpoint("/predict", handle_predict)
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    accept = request.headers.get("Accept")
+    return json_endpoint("/predict/batch",
+                         lambda data: handle_predict_batch(data, wire.wants_matrix(accept)),
+                         lambda raw: handle_predict_matrix(raw, wire.wants_matrix(accept, default=True)))
 
 
 if __name__ == "__main__":
+    start()
+    store.ensure_loading()
     print("🚀 API démarrée sur http://localhost:7860")
     print("📌 Utilisez POST /predict pour faire des prédictions")
-    app.run(debug=True, host="0.0.0.0", port=7860)
\ No newline at end of file
+    print("📌 Utilisez POST /predict/batch pour des prédictions par lot")
+    print("📈 Métriques Prometheus sur GET /metrics")
+    print("ℹ️  Serveur de développement Flask ; en production : python asgi.py")
+    app.run(debug=FLASK_DEBUG, host="0.0.0.0", port=7860)
\ No newline at end of file
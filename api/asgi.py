@@ -0,0 +1,148 @@
+"""Mode de service ASGI (production) de l'API de prédiction.
+
+Expose le même contrat que l'app Flask de ``api.py`` (``/``, ``/health``,
+``/model``, ``/predict``, ``/predict/batch`` en JSON ou binaire, ``/metrics``)
+sur Starlette. Le parsing JSON reste dans la boucle d'événements ; l'appel modèle (CPU) est déporté dans un
+pool de threads borné pour que les clients lents ne sérialisent plus
+l'inférence.
+
+Lancement : ``python asgi.py`` ou ``uvicorn asgi:app --host 0.0.0.0 --port 7860``
+"""
+import asyncio
+import contextlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+import api
+import wire
+
+# Nombre de threads dédiés à l'inférence
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+
+executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+
+
+async def read_json(request, endpoint=None):
+    body = await request.body()
+    try:
+        with api.metrics.stage("json_parse"):
+            return json.loads(body), None
+    except Exception as e:
+        if endpoint is not None:
+            api.metrics.count_error(endpoint, "invalid_json")
+        return None, JSONResponse({"success": False, "error": str(e)}, status_code=400)
+
+
+async def run_in_pool(fn, *args, endpoint=None, start=None):
+    loop = asyncio.get_running_loop()
+    body, status = await loop.run_in_executor(executor, fn, *args)
+    with api.metrics.stage("serialize"):
+        if isinstance(body.get("matrix"), np.ndarray):
+            content, headers = api.matrix_response(body)
+            response = Response(content, status_code=status, headers=headers, media_type=wire.MEDIA_TYPE)
+        else:
+            response = JSONResponse(body, status_code=status)
+    if endpoint is not None:
+        api.record_request(endpoint, start, status, body)
+    return response
+
+
+async def home(request):
+    return HTMLResponse(api.HOME_HTML)
+
+
+async def health(request):
+    body, status = api.health_status()
+    return JSONResponse(body, status_code=status)
+
+
+async def model_info(request):
+    return JSONResponse(api.store.status())
+
+
+async def model_reload(request):
+    return await run_in_pool(api.handle_model_action, "reload")
+
+
+async def model_rollback(request):
+    return await run_in_pool(api.handle_model_action, "rollback")
+
+
+async def metrics(request):
+    return PlainTextResponse(api.metrics_text(), media_type="text/plain; version=0.0.4")
+
+
+async def debug_profile(request):
+    # L'échantillonnage bloque : il tourne hors de la boucle d'événements
+    loop = asyncio.get_running_loop()
+    text, status = await loop.run_in_executor(
+        None, api.handle_profile, request.query_params.get("seconds", 5), request.query_params.get("interval", 0.005)
+    )
+    return PlainTextResponse(text, status_code=status)
+
+
+async def predict(request):
+    start = time.perf_counter()
+    data, error = await read_json(request, "/predict")
+    if error is not None:
+        api.record_request("/predict", start, error.status_code)
+        return error
+    return await run_in_pool(api.handle_predict, data, endpoint="/predict", start=start)
+
+
+async def predict_batch(request):
+    start = time.perf_counter()
+    if request.headers.get("content-type", "").split(";")[0].strip() == wire.MEDIA_TYPE:
+        # Corps binaire : décodé sans parsing dans le pool (np.frombuffer)
+        raw = await request.body()
+        as_matrix = wire.wants_matrix(request.headers.get("accept"), default=True)
+        return await run_in_pool(api.handle_predict_matrix, raw, as_matrix, endpoint="/predict/batch", start=start)
+
+    as_matrix = wire.wants_matrix(request.headers.get("accept"))
+    data, error = await read_json(request, "/predict/batch")
+    if error is not None:
+        api.record_request("/predict/batch", start, error.status_code)
+        return error
+    return await run_in_pool(api.handle_predict_batch, data, as_matrix, endpoint="/predict/batch", start=start)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Tâches de fond au démarrage du serveur (pas à l'import : voir api.start)
+    api.start()
+    yield
+    executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route("/", home),
+        Route("/health", health, methods=["GET"]),
+        Route("/model", model_info, methods=["GET"]),
+        Route("/model/reload", model_reload, methods=["POST"]),
+        Route("/model/rollback", model_rollback, methods=["POST"]),
+        Route("/predict", predict, methods=["POST"]),
+        Route("/predict/batch", predict_batch, methods=["POST"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Route("/debug/profile", debug_profile, methods=["GET"]),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    print("🚀 API (ASGI) démarrée sur http://localhost:7860")
+    print(f"🧵 {INFERENCE_WORKERS} threads d'inférence")
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", "7860")))
@@ -0,0 +1,115 @@
+"""Regroupement (micro-batching) des requêtes /predict concurrentes.
+
+Les requêtes mono-ligne qui arrivent dans la même fenêtre de temps sont
+empilées dans une seule matrice et passent ensemble dans le modèle ; chaque
+appelant récupère ensuite sa propre tranche du résultat.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesce les appels concurrents à ``predict_fn`` sur des lignes uniques.
+
+    ``predict_fn(X, context)`` reçoit une matrice (n, d) et retourne
+    ``(y_pred, proba)`` comme ``run_model`` ; ``proba`` peut valoir ``None``.
+    Les lignes ne sont regroupées qu'avec celles du même ``context`` (la
+    version du modèle vue par la requête).
+
+    Un lot est envoyé dès que ``max_batch_size`` lignes sont en attente ou
+    que ``max_wait_ms`` s'est écoulé depuis l'arrivée de la première ligne.
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "rows": 0,
+            "max_batch_size": 0,
+            "queue_wait_total_s": 0.0,
+            "queue_wait_max_s": 0.0,
+        }
+
+        self._worker = threading.Thread(target=self._run, name="microbatcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, x: np.ndarray, context=None) -> Future:
+        """Ajoute une ligne (vecteur 1-D ou matrice 1×d) à la file d'attente."""
+        future = Future()
+        self._queue.put((np.asarray(x, dtype=float).reshape(-1), time.perf_counter(), future, context))
+        return future
+
+    def predict(self, x: np.ndarray, context=None, timeout: float = None):
+        """Version bloquante de ``submit`` : retourne ``(y, proba)`` pour la ligne."""
+        return self.submit(x, context).result(timeout=timeout)
+
+    def _collect(self) -> list:
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _predict_group(self, items, context):
+        X = np.vstack([row for row, _, _, _ in items])
+        try:
+            y_pred, proba = self.predict_fn(X, context)
+        except Exception as e:
+            for _, _, future, _ in items:
+                future.set_exception(e)
+            return
+
+        for k, (_, _, future, _) in enumerate(items):
+            future.set_result((y_pred[k], None if proba is None else proba[k]))
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            start = time.perf_counter()
+
+            groups = {}
+            for item in items:
+                groups.setdefault(id(item[3]), []).append(item)
+            for group in groups.values():
+                self._predict_group(group, group[0][3])
+
+            waits = [start - enqueued for _, enqueued, _, _ in items]
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["rows"] += len(items)
+                self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(items))
+                self._stats["queue_wait_total_s"] += sum(waits)
+                self._stats["queue_wait_max_s"] = max(self._stats["queue_wait_max_s"], max(waits))
+
+    def metrics(self) -> dict:
+        """Taille moyenne des lots et temps d'attente en file."""
+        with self._lock:
+            stats = dict(self._stats)
+
+        batches, rows = stats["batches"], stats["rows"]
+        return {
+            "window_ms": self.max_wait * 1000.0,
+            "max_rows": self.max_batch_size,
+            "batches": batches,
+            "rows": rows,
+            "avg_batch_size": rows / batches if batches else 0.0,
+            "max_batch_size": stats["max_batch_size"],
+            "avg_queue_wait_ms": 1000.0 * stats["queue_wait_total_s"] / rows if rows else 0.0,
+            "max_queue_wait_ms": 1000.0 * stats["queue_wait_max_s"],
+            "pending": self._queue.qsize(),
+        }
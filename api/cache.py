@@ -0,0 +1,96 @@
+"""Cache des prédictions de /predict (LRU + TTL).
+
+La clé est le vecteur de features dans l'ordre de ``FEATURE_ORDER``, arrondi
+à ``decimals`` décimales : des mesures renvoyées à l'identique (retries,
+rafraîchissements de tableau de bord) ne repassent ni par le scaler ni par
+le modèle. Le cache est vidé automatiquement quand le fichier du modèle
+change sur disque.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0, decimals: int = 6,
+                 source_path: str = None, check_interval: float = 1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.decimals = decimals
+        self.source_path = source_path
+        self.check_interval = check_interval
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = self._source_signature()
+        self._last_check = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def key(self, x: np.ndarray) -> tuple:
+        """Clé canonique : valeurs arrondies dans l'ordre des features."""
+        return tuple(np.round(np.asarray(x, dtype=float).reshape(-1), self.decimals).tolist())
+
+    def _source_signature(self):
+        if not self.source_path:
+            return None
+        try:
+            st = os.stat(self.source_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _check_source(self, now: float):
+        if self.source_path is None or now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        signature = self._source_signature()
+        if signature != self._signature:
+            self._signature = signature
+            self._data.clear()
+            self.invalidations += 1
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            self._check_source(now)
+            entry = self._data.get(key)
+            if entry is None or now - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
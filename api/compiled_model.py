@@ -0,0 +1,102 @@
+"""Compilation du modèle en un prédicteur unique, sans prétraitement externe.
+
+``compile_model(model_data)`` prend le dictionnaire du pickle (``model``,
+``scaler``, ...) et retourne un prédicteur qui s'applique directement aux
+valeurs brutes, dans l'ordre de ``FEATURE_ORDER`` :
+
+- XGBoost + ``StandardScaler`` externe : la standardisation est repliée dans
+  les seuils des arbres (``CompiledTrees.fold_scaler``) pour les petits lots,
+  et appliquée en place via un vecteur moyenne/écart-type fusionné pour les
+  lots traités par le moteur XGBoost ;
+- ``Pipeline`` SVM (``StandardScaler`` + ``SVC``) : le scaler est extrait du
+  pipeline et remplacé par le même vecteur fusionné, appliqué en place.
+"""
+import numpy as np
+
+from tree_engine import CompiledTrees, is_xgb_model
+
+
+def scaler_vectors(scaler, n_features):
+    """Retourne ``(mean, scale)`` d'un ``StandardScaler`` ajusté."""
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    return np.ascontiguousarray(mean), np.ascontiguousarray(scale)
+
+
+class AffinePredictor:
+    """Estimateur précédé d'une standardisation fusionnée ``(X - mean) / scale``.
+
+    Les opérations se font en place sur une copie float64 de X : mêmes
+    arrondis que ``StandardScaler.transform``, sans validation sklearn.
+    """
+
+    def __init__(self, estimator, mean, scale):
+        self.estimator = estimator
+        self.mean = mean
+        self.scale = scale
+        self.classes_ = getattr(estimator, "classes_", None)
+        if hasattr(estimator, "predict_proba"):
+            self.predict_proba = self._predict_proba
+
+    def transform(self, X) -> np.ndarray:
+        X = np.array(X, dtype=np.float64, order="C", ndmin=2)
+        np.subtract(X, self.mean, out=X)
+        np.divide(X, self.scale, out=X)
+        return X
+
+    def _predict_proba(self, X) -> np.ndarray:
+        return self.estimator.predict_proba(self.transform(X))
+
+    def predict(self, X) -> np.ndarray:
+        return self.estimator.predict(self.transform(X))
+
+
+class FusedPredictor:
+    """Aiguille vers les arbres compilés (petits lots) ou l'affine + XGBoost."""
+
+    def __init__(self, trees, fallback, max_rows):
+        self.trees = trees
+        self.fallback = fallback
+        self.max_rows = max_rows
+        self.classes_ = fallback.classes_
+
+    def _engine(self, X):
+        return self.trees if len(X) <= self.max_rows else self.fallback
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return self._engine(X).predict_proba(X)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compile_model(model_data: dict, use_tree_engine: bool = True, tree_engine_max_rows: int = 16):
+    """Construit le prédicteur fusionné à partir du contenu de ``juice_model.pkl``."""
+    model = model_data["model"]
+    scaler = model_data.get("scaler")
+    n_features = len(model_data.get("feature_names") or []) or getattr(model, "n_features_in_", 0)
+
+    # Pipeline SVM : on extrait le StandardScaler interne
+    steps = getattr(model, "steps", None)
+    if steps is not None:
+        if len(steps) == 2 and type(steps[0][1]).__name__ == "StandardScaler":
+            mean, scale = scaler_vectors(steps[0][1], n_features)
+            return AffinePredictor(steps[-1][1], mean, scale)
+        return model
+
+    if scaler is None:
+        if use_tree_engine and is_xgb_model(model):
+            return FusedPredictor(CompiledTrees.from_xgb(model), model, tree_engine_max_rows)
+        return model
+
+    mean, scale = scaler_vectors(scaler, n_features)
+    fallback = AffinePredictor(model, mean, scale)
+    if use_tree_engine and is_xgb_model(model):
+        trees = CompiledTrees.from_xgb(model).fold_scaler(mean, scale)
+        return FusedPredictor(trees, fallback, tree_engine_max_rows)
+    return fallback
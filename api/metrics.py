@@ -0,0 +1,243 @@
+"""Instrumentation du chemin de prédiction et export au format Prometheus.
+
+- ``Metrics.stage(name)`` chronomètre une étape (parsing JSON, préparation
+  des features, scaler, ``predict``/``predict_proba``, sérialisation...) ;
+  chaque étape alimente un histogramme à buckets fixes et une fenêtre des
+  dernières mesures pour les quantiles p50/p95/p99 ;
+- ``count_request`` / ``count_error`` : compteurs par endpoint, code HTTP,
+  version du modèle et type d'erreur ;
+- ``render()`` produit le texte exposé sur ``GET /metrics``.
+
+``StackSampler`` est un profileur par échantillonnage (optionnel) : il relève
+périodiquement les piles de tous les threads et les agrège au format
+« folded » (``f1;f2;f3 N``), lisible par ``flamegraph.pl`` ou speedscope.
+"""
+import bisect
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+import numpy as np
+
+# Buckets (secondes) adaptés à une inférence de 10 µs à quelques secondes
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class Histogram:
+    """Histogramme cumulatif (buckets Prometheus) + fenêtre glissante pour les quantiles."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 2048):
+        self.buckets = tuple(float(b) for b in buckets)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        # bucket "le" : première borne >= value
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self, qs=QUANTILES) -> dict:
+        if not self.recent:
+            return {q: float("nan") for q in qs}
+        values = np.quantile(np.fromiter(self.recent, dtype=np.float64), qs)
+        return dict(zip(qs, values.tolist()))
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Metrics:
+    def __init__(self, enabled: bool = True, prefix: str = "juice", window: int = 2048):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._requests = {}
+        self._request_counts = Counter()
+        self._errors = Counter()
+        self.started_at = time.time()
+
+    # ===== Enregistrement =====
+
+    def stage(self, name: str):
+        """Contexte chronométrant l'étape ``name`` (sans effet si désactivé)."""
+        return _Stage(self, name) if self.enabled else _NULL_STAGE
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            hist = self._stages.get(name)
+            if hist is None:
+                hist = self._stages[name] = Histogram(window=self.window)
+            hist.observe(seconds)
+
+    def count_request(self, endpoint: str, status: int, model_version=None, seconds: float = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._request_counts[(endpoint, int(status), model_version or "none")] += 1
+            if seconds is not None:
+                hist = self._requests.get(endpoint)
+                if hist is None:
+                    hist = self._requests[endpoint] = Histogram(window=self.window)
+                hist.observe(seconds)
+
+    def count_error(self, endpoint: str, error_type: str, n: int = 1):
+        if not self.enabled or not n:
+            return
+        with self._lock:
+            self._errors[(endpoint, error_type)] += n
+
+    # ===== Lecture =====
+
+    def summary(self) -> dict:
+        """Quantiles (ms) par étape et par endpoint, pour ``/health``."""
+        with self._lock:
+            hists = {**{f"stage:{k}": v for k, v in self._stages.items()},
+                     **{f"endpoint:{k}": v for k, v in self._requests.items()}}
+            return {
+                name: {"count": h.count,
+                       **{f"p{int(q * 100)}_ms": round(v * 1000, 4) for q, v in h.quantiles().items()}}
+                for name, h in hists.items()
+            }
+
+    def _render_histogram(self, lines, name, help_text, label, hists):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, h in sorted(hists.items()):
+            cumulative = 0
+            for le, n in zip([*h.buckets, "+Inf"], h.counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{{{_labels(**{label: key}, le=le)}}} {cumulative}")
+            lines.append(f"{name}_sum{{{_labels(**{label: key})}}} {h.sum!r}")
+            lines.append(f"{name}_count{{{_labels(**{label: key})}}} {h.count}")
+
+        lines.append(f"# HELP {name}_quantile Quantiles sur les {self.window} dernières mesures")
+        lines.append(f"# TYPE {name}_quantile gauge")
+        for key, h in sorted(hists.items()):
+            for q, v in h.quantiles().items():
+                lines.append(f"{name}_quantile{{{_labels(**{label: key}, quantile=q)}}} {v!r}")
+
+    def render(self, model_status: dict = None, extra: list = None) -> str:
+        """Texte d'exposition Prometheus (``text/plain; version=0.0.4``).
+
+        ``extra`` : séries supplémentaires ``(nom, type, aide, valeur)``.
+        """
+        p = self.prefix
+        lines = []
+        with self._lock:
+            self._render_histogram(lines, f"{p}_stage_duration_seconds",
+                                   "Durée des étapes du chemin de prédiction", "stage", self._stages)
+            self._render_histogram(lines, f"{p}_request_duration_seconds",
+                                   "Durée totale des requêtes par endpoint", "endpoint", self._requests)
+
+            lines.append(f"# HELP {p}_requests_total Requêtes par endpoint, code HTTP et version du modèle")
+            lines.append(f"# TYPE {p}_requests_total counter")
+            for (endpoint, status, version), n in sorted(self._request_counts.items()):
+                lines.append(f"{p}_requests_total{{{_labels(endpoint=endpoint, status=status, model_version=version)}}} {n}")
+
+            lines.append(f"# HELP {p}_errors_total Erreurs par endpoint et par type")
+            lines.append(f"# TYPE {p}_errors_total counter")
+            for (endpoint, error_type), n in sorted(self._errors.items()):
+                lines.append(f"{p}_errors_total{{{_labels(endpoint=endpoint, type=error_type)}}} {n}")
+
+        if model_status is not None:
+            lines.append(f"# HELP {p}_model_info Modèle en service (valeur 1 si prêt)")
+            lines.append(f"# TYPE {p}_model_info gauge")
+            labels = _labels(version=model_status.get("version") or "none",
+                             model_type=model_status.get("model_type") or "none",
+                             engine=model_status.get("engine") or "none",
+                             state=model_status.get("state"))
+            lines.append(f"{p}_model_info{{{labels}}} {int(model_status.get('state') == 'ready')}")
+            if model_status.get("load_time_s") is not None:
+                lines.append(f"# TYPE {p}_model_load_seconds gauge")
+                lines.append(f"{p}_model_load_seconds {model_status['load_time_s']!r}")
+
+        for name, kind, help_text, value in extra or []:
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            lines.append(f"{p}_{name} {float(value)!r}")
+
+        lines.append(f"# TYPE {p}_uptime_seconds gauge")
+        lines.append(f"{p}_uptime_seconds {time.time() - self.started_at!r}")
+        return "\n".join(lines) + "\n"
+
+
+class StackSampler:
+    """Profileur par échantillonnage des piles Python de tous les threads.
+
+    ``sample(seconds, interval)`` bloque l'appelant pendant ``seconds`` et
+    retourne les piles agrégées au format folded, une ligne par pile
+    distincte (racine à gauche), triées par nombre d'échantillons.
+    """
+
+    _lock = threading.Lock()
+
+    def sample(self, seconds: float = 5.0, interval: float = 0.005) -> str:
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Un profilage est déjà en cours")
+        try:
+            stacks = defaultdict(int)
+            own = threading.get_ident()
+            names = {}
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                if len(names) != threading.active_count():
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    stack.append(names.get(ident, f"thread-{ident}"))
+                    stacks[";".join(reversed(stack))] += 1
+                time.sleep(interval)
+        finally:
+            self._lock.release()
+        return "\n".join(f"{stack} {n}" for stack, n in sorted(stacks.items(), key=lambda kv: -kv[1])) + "\n"
@@ -0,0 +1,324 @@
+"""Chargement paresseux, partagé et versionné du modèle.
+
+Le pickle ``juice_model.pkl`` n'est chargé qu'à la première requête (ou au
+premier appel de ``/health``), dans un thread de fond. Le modèle compilé est
+ensuite écrit à côté du pickle dans un fichier joblib non compressé
+(``juice_model.pkl.mmap``) : aux démarrages suivants il est relu avec
+``mmap_mode="r"``, de sorte que les tableaux NumPy (arbres compilés, vecteurs
+du scaler, vecteurs de support du SVM) sont partagés entre workers via le
+cache de pages de l'OS au lieu d'être dupliqués.
+
+Chaque chargement produit un ``LoadedModel`` immuable identifié par un
+numéro de version (empreinte du pickle). Un thread de surveillance peut
+recharger le pickle quand il change : la nouvelle version est chargée et
+préchauffée en arrière-plan puis remplace la courante par simple
+réassignation de référence. Les requêtes en cours gardent leur instantané et
+se terminent sur l'ancienne version ; la version précédente reste disponible
+pour un retour arrière.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+
+SIDECAR_SUFFIX = ".mmap"
+# Format du contenu du sidecar : à incrémenter quand ses clés changent, pour
+# qu'un sidecar écrit par une version antérieure soit ignoré (relu depuis le pickle)
+SIDECAR_FORMAT = 2
+SIDECAR_KEYS = ("signature", "version", "model_data", "predictor")
+
+
+class ModelNotReady(RuntimeError):
+    """Le modèle n'est pas (encore) disponible."""
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def read_artifact(path):
+    """``(signature, version, octets)`` d'un même instantané du pickle.
+
+    Un seul ``open`` : la signature (``fstat``), l'empreinte et le contenu
+    désérialisé proviennent des mêmes octets, même si le fichier est
+    remplacé pendant la lecture.
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        data = f.read()
+    return (st.st_size, st.st_mtime_ns), hashlib.sha256(data).hexdigest()[:12], data
+
+
+def clip_vectors(bounds, feature_names):
+    """Bornes ``clip_bounds`` du pickle alignées sur l'ordre des features du modèle.
+
+    Retourne ``(lower, upper)`` ou ``(None, None)`` ; une feature sans borne
+    n'est pas écrêtée. Les noms du CSV (``"fixed acidity"``) et snake_case
+    (``"fixed_acidity"``) sont équivalents.
+    """
+    if not bounds:
+        return None, None
+    position = {"_".join(name.split()): i for i, name in enumerate(bounds["columns"])}
+    lower = np.full(len(feature_names), -np.inf)
+    upper = np.full(len(feature_names), np.inf)
+    for j, name in enumerate(feature_names):
+        name = "_".join(name.split())
+        if name in position:
+            lower[j] = bounds["lower"][position[name]]
+            upper[j] = bounds["upper"][position[name]]
+    return lower, upper
+
+
+class LoadedModel:
+    """Instantané d'un modèle chargé : modèle, scaler, prédicteur compilé."""
+
+    def __init__(self, model_data, predictor, path, load_time_s, artifact_size, mmap_size=None,
+                 default_classes=None, version=None):
+        self.version = version
+        self.model_data = model_data
+        self.model = model_data["model"]
+        self.scaler = model_data.get("scaler")
+        self.feature_names = model_data.get("feature_names", [])
+        self.clip_lower, self.clip_upper = clip_vectors(model_data.get("clip_bounds"), self.feature_names)
+        self.predictor = predictor
+        self.classes = np.asarray(getattr(self.model, "classes_", default_classes))
+        self.path = path
+        self.load_time_s = load_time_s
+        self.artifact_size = artifact_size
+        self.mmap_size = mmap_size
+        self.mmapped = mmap_size is not None
+        self.loaded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    def clip(self, X: np.ndarray) -> np.ndarray:
+        """Écrêtage IQR du prétraitement, appliqué en place (sans effet si l'artefact n'a pas de bornes)."""
+        if self.clip_lower is not None:
+            np.clip(X, self.clip_lower, self.clip_upper, out=X)
+        return X
+
+    def warm(self):
+        """Premier appel à vide pour initialiser les chemins d'inférence."""
+        n_features = len(self.feature_names) or getattr(self.model, "n_features_in_", 0)
+        X = np.zeros((1, n_features))
+        if hasattr(self.predictor, "predict_proba"):
+            self.predictor.predict_proba(X)
+        else:
+            self.predictor.predict(X)
+
+    def version_info(self) -> dict:
+        return {"id": self.version, "loaded_at": self.loaded_at}
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "model_type": type(self.model).__name__,
+            "engine": type(self.predictor).__name__,
+            "artifact": os.path.basename(self.path),
+            "artifact_size_bytes": self.artifact_size,
+            "load_time_s": round(self.load_time_s, 4),
+            "mmap": self.mmapped,
+            "mmap_size_bytes": self.mmap_size,
+            "clip_bounds": self.clip_lower is not None,
+        }
+
+
+class ModelStore:
+    """Charge le modèle à la demande et expose son état de disponibilité.
+
+    ``compile_fn(model_data)`` construit le prédicteur (voir ``compiled_model``).
+    États : ``cold`` -> ``loading`` -> ``ready`` (ou ``error``).
+    """
+
+    def __init__(self, path, compile_fn, use_mmap=True, default_classes=None, compile_key=None):
+        self.path = path
+        self.compile_fn = compile_fn
+        # Paramètres de compilation : un sidecar compilé autrement est ignoré
+        self.compile_key = compile_key
+        self.use_mmap = use_mmap
+        self.default_classes = default_classes
+
+        self.state = "cold"
+        self.error = None
+        self._current = None
+        self._previous = None
+        self._seen_signature = None
+        # Version du pickle sur disque lors du dernier chargement
+        self.disk_version = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._watcher = None
+
+    @property
+    def sidecar_path(self):
+        return self.path + SIDECAR_SUFFIX
+
+    # ===== Chargement =====
+
+    def _read_sidecar(self, signature):
+        try:
+            payload = joblib.load(self.sidecar_path, mmap_mode="r")
+        except Exception:
+            return None
+        if not isinstance(payload, dict) or tuple(payload.get("signature", ())) != signature:
+            return None
+        if any(key not in payload for key in SIDECAR_KEYS):
+            return None
+        return payload
+
+    def _write_sidecar(self, signature, version, model_data, predictor):
+        tmp = f"{self.sidecar_path}.{os.getpid()}.tmp"
+        try:
+            joblib.dump({"signature": signature, "version": version,
+                         "model_data": model_data, "predictor": predictor}, tmp)
+            os.replace(tmp, self.sidecar_path)
+        except Exception as e:
+            print(f"⚠️  Sidecar mmap non écrit : {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def load(self) -> LoadedModel:
+        """Charge (synchrone) et préchauffe le modèle depuis le sidecar mmap ou le pickle."""
+        start = time.perf_counter()
+        stat = file_signature(self.path)
+        signature = (*stat, repr(self.compile_key), SIDECAR_FORMAT)
+
+        payload = self._read_sidecar(signature) if self.use_mmap else None
+        mmapped = payload is not None
+        if mmapped:
+            model_data, predictor, version = payload["model_data"], payload["predictor"], payload["version"]
+        else:
+            stat, version, data = read_artifact(self.path)
+            signature = (*stat, repr(self.compile_key), SIDECAR_FORMAT)
+            model_data = joblib.load(io.BytesIO(data))
+            del data
+            predictor = self.compile_fn(model_data)
+            if self.use_mmap:
+                self._write_sidecar(signature, version, model_data, predictor)
+
+        loaded = LoadedModel(
+            model_data, predictor, self.path, time.perf_counter() - start, stat[0],
+            os.path.getsize(self.sidecar_path) if mmapped else None, self.default_classes, version,
+        )
+        loaded.warm()
+        self._seen_signature = stat
+        self.disk_version = version
+        return loaded
+
+    def _load_in_background(self):
+        try:
+            current = self.load()
+        except Exception as e:
+            with self._lock:
+                self.state, self.error = "error", str(e)
+            print(f"❌ Échec du chargement du modèle : {e}")
+        else:
+            with self._lock:
+                self._current, self.state, self.error = current, "ready", None
+            print(f"✅ Modèle {current.version} chargé en {current.load_time_s:.2f} s "
+                  f"({'mmap' if current.mmapped else 'pickle'})")
+        finally:
+            self._ready.set()
+
+    # ===== Rechargement à chaud =====
+
+    def reload(self) -> LoadedModel:
+        """Charge la version sur disque et la substitue atomiquement à la courante.
+
+        En cas d'échec, la version courante reste en service et l'erreur est levée.
+        """
+        with self._reload_lock:
+            try:
+                new = self.load()
+            except Exception as e:
+                self.error = f"Rechargement échoué : {e}"
+                raise
+            with self._lock:
+                if self._current is not None and self._current.version != new.version:
+                    self._previous = self._current
+                self._current, self.state, self.error = new, "ready", None
+            self._ready.set()
+            print(f"🔄 Modèle {new.version} en service")
+            return new
+
+    def rollback(self) -> LoadedModel:
+        """Revient à la version précédente (qui devient la courante)."""
+        with self._lock:
+            if self._previous is None:
+                raise ModelNotReady("Aucune version précédente disponible")
+            self._current, self._previous = self._previous, self._current
+            current = self._current
+        print(f"⏪ Retour au modèle {current.version}")
+        return current
+
+    def changed_on_disk(self) -> bool:
+        try:
+            return file_signature(self.path) != self._seen_signature
+        except OSError:
+            return False
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            if self._current is None or not self.changed_on_disk():
+                continue
+            try:
+                self.reload()
+            except Exception as e:
+                # On attend une nouvelle modification avant de réessayer
+                try:
+                    self._seen_signature = file_signature(self.path)
+                except OSError:
+                    # Pickle supprimé ou en cours de remplacement : nouvel essai au prochain tour
+                    pass
+                print(f"❌ {self.error or e}")
+
+    def start_watcher(self, interval: float):
+        """Surveille le pickle toutes les ``interval`` secondes et le recharge s'il change."""
+        if self._watcher is None and interval > 0:
+            self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                             name="model-watcher", daemon=True)
+            self._watcher.start()
+
+    def ensure_loading(self):
+        """Démarre le chargement en arrière-plan s'il n'a pas encore eu lieu."""
+        with self._lock:
+            if self.state not in ("cold", "error"):
+                return
+            self.state = "loading"
+            self._ready.clear()
+        threading.Thread(target=self._load_in_background, name="model-loader", daemon=True).start()
+
+    # ===== Accès =====
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def get(self, timeout=None) -> LoadedModel:
+        """Retourne le modèle courant, en attendant la fin du chargement."""
+        current = self._current
+        if current is not None:
+            return current
+
+        self.ensure_loading()
+        if not self._ready.wait(timeout):
+            raise ModelNotReady("Modèle en cours de chargement")
+        if self._current is None:
+            raise ModelNotReady(f"Modèle indisponible : {self.error}")
+        return self._current
+
+    def status(self) -> dict:
+        current, previous = self._current, self._previous
+        return {
+            "state": self.state,
+            "error": self.error,
+            **(current.info() if current is not None else {}),
+            "previous_version": previous.version_info() if previous is not None else None,
+        }
@@ -0,0 +1,258 @@
+"""Inférence par lots répartie sur plusieurs processus, via mémoire partagée.
+
+``ShardedScorer`` garde un pool persistant de processus (``spawn``) ; chaque
+worker charge une fois le modèle compilé par le ``ModelStore`` (même
+sidecar mmap que l'API : les tableaux du modèle sont partagés entre workers
+par le cache de pages de l'OS) et se limite à un thread BLAS/OpenMP.
+
+Pour un lot, la matrice X est copiée une fois dans un segment
+``multiprocessing.shared_memory`` ; chaque worker reçoit seulement le nom du
+segment et ses bornes de lignes, lit sa tranche sans copie et écrit ses
+probabilités dans un segment de sortie partagé. Rien n'est picklé par
+tranche hormis ces quelques entiers. Les segments sont réutilisés d'un lot à
+l'autre (agrandis au besoin).
+
+Utilisé par ``run_model`` de l'API pour les gros lots (``PARALLEL_WORKERS``)
+et en ligne de commande pour noter un CSV complet :
+
+    python api/parallel.py --input juice.csv --out juice_scored.csv --workers 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from compiled_model import compile_model
+from model_store import ModelStore
+from schema import LABEL_MAP
+
+# Lignes minimales par tranche : en dessous, l'aller-retour inter-processus domine
+MIN_SHARD_ROWS = 256
+
+_WORKER = {}
+
+
+class VersionMismatch(RuntimeError):
+    """Les workers ne peuvent pas servir la version demandée (absente du disque)."""
+
+
+# ===== Côté worker =====
+
+def _init_worker(path, use_tree_engine, tree_engine_max_rows):
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+    store = ModelStore(
+        path,
+        lambda model_data: compile_model(model_data, use_tree_engine, tree_engine_max_rows),
+        compile_key=(use_tree_engine, tree_engine_max_rows),
+    )
+    _WORKER.update(store=store, segments={})
+    _set_current(store.load())
+
+
+def _set_current(current):
+    # Un thread par worker : le parallélisme vient des processus
+    if hasattr(current.model, "get_booster"):
+        current.model.set_params(n_jobs=1)
+    _WORKER["current"] = current
+
+
+def _attach(name):
+    segments = _WORKER["segments"]
+    shm = segments.get(name)
+    if shm is None:
+        if len(segments) >= 16:
+            for old in segments.values():
+                old.close()
+            segments.clear()
+        # Les workers « spawn » partagent le resource_tracker du parent : c'est
+        # l'unlink du parent qui libère le segment
+        shm = shared_memory.SharedMemory(name=name)
+        segments[name] = shm
+    return shm
+
+
+def _ping(_=None):
+    return os.getpid(), _WORKER["current"].version
+
+
+def _score_shard(in_name, out_name, n_rows, n_features, n_out, start, stop, method, version):
+    current = _WORKER["current"]
+    if version is not None and current.version != version:
+        _set_current(_WORKER["store"].load())
+        current = _WORKER["current"]
+        if current.version != version:
+            raise VersionMismatch(f"Version du modèle {current.version} != {version} attendue")
+
+    X = np.ndarray((n_rows, n_features), dtype=np.float64, buffer=_attach(in_name).buf)[start:stop]
+    out = np.ndarray((n_rows, n_out), dtype=np.float64, buffer=_attach(out_name).buf)
+    out[start:stop] = getattr(current.predictor, method)(X).reshape(stop - start, n_out)
+    return stop - start
+
+
+# ===== Côté parent =====
+
+class _Segments:
+    """Paire de segments partagés (entrée, sortie) réutilisable."""
+
+    def __init__(self, in_bytes, out_bytes):
+        self.input = shared_memory.SharedMemory(create=True, size=max(in_bytes, 1))
+        self.output = shared_memory.SharedMemory(create=True, size=max(out_bytes, 1))
+
+    def fits(self, in_bytes, out_bytes) -> bool:
+        return self.input.size >= in_bytes and self.output.size >= out_bytes
+
+    def release(self):
+        for shm in (self.input, self.output):
+            shm.close()
+            shm.unlink()
+
+
+class ShardedScorer:
+    """Pool persistant de workers préchargés ; ``run(X)`` répartit X en tranches."""
+
+    def __init__(self, path, workers=None, use_tree_engine=True, tree_engine_max_rows=16,
+                 min_shard_rows=MIN_SHARD_ROWS):
+        self.path = os.path.abspath(path)
+        self.workers = workers or os.cpu_count() or 1
+        self.min_shard_rows = min_shard_rows
+        self._pool = ProcessPoolExecutor(
+            self.workers, mp_context=get_context("spawn"), initializer=_init_worker,
+            initargs=(self.path, use_tree_engine, tree_engine_max_rows),
+        )
+        self._free = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def warm(self) -> list:
+        """Démarre les workers (chargement du modèle) ; retourne leurs ``(pid, version)``."""
+        return list({r for r in self._pool.map(_ping, range(self.workers * 2))})
+
+    def _acquire(self, in_bytes, out_bytes) -> _Segments:
+        with self._lock:
+            for i, seg in enumerate(self._free):
+                if seg.fits(in_bytes, out_bytes):
+                    return self._free.pop(i)
+            if self._free:
+                # Segment trop petit : remplacé par un plus grand (capacité doublée)
+                self._free.pop().release()
+        return _Segments(2 * in_bytes, 2 * out_bytes)
+
+    def _release(self, seg):
+        with self._lock:
+            if not self._closed:
+                self._free.append(seg)
+                return
+        seg.release()
+
+    def run(self, X: np.ndarray, method="predict_proba", n_out=1, version=None) -> np.ndarray:
+        """``predictor.<method>(X)`` calculé par tranches dans les workers.
+
+        ``n_out`` : colonnes du résultat (nombre de classes pour
+        ``predict_proba``, 1 pour ``predict``). ``version`` : version attendue
+        du modèle (les workers rechargent le pickle s'ils sont en retard).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        n_rows, n_features = X.shape
+        seg = self._acquire(X.nbytes, n_rows * n_out * 8)
+        try:
+            np.ndarray(X.shape, dtype=np.float64, buffer=seg.input.buf)[:] = X
+            n_shards = max(1, min(self.workers, n_rows // self.min_shard_rows))
+            bounds = np.linspace(0, n_rows, n_shards + 1).astype(int)
+            futures = [
+                self._pool.submit(_score_shard, seg.input.name, seg.output.name, n_rows, n_features, n_out,
+                                  int(start), int(stop), method, version)
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            for future in futures:
+                future.result()
+            out = np.ndarray((n_rows, n_out), dtype=np.float64, buffer=seg.output.buf).copy()
+        finally:
+            self._release(seg)
+        return out if method == "predict_proba" else out.reshape(-1)
+
+    def close(self, wait=True):
+        """Arrête le pool ; ``wait=False`` pour un pool cassé (sans attendre ses workers)."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            self._closed = True
+            for seg in self._free:
+                seg.release()
+            self._free.clear()
+
+
+# ===== Ligne de commande : notation d'un CSV complet =====
+
+def score_csv(args):
+    import pandas as pd
+
+    store = ModelStore(args.model, compile_model, compile_key=(True, 16))
+    current = store.load()
+    features = ["_".join(name.split()) for name in current.feature_names]
+    has_proba = hasattr(current.predictor, "predict_proba")
+    method = "predict_proba" if has_proba else "predict"
+    n_out = len(current.classes) if has_proba else 1
+
+    scorer = ShardedScorer(args.model, args.workers) if args.workers > 1 else None
+    if scorer is not None:
+        scorer.warm()
+
+    n_rows, start = 0, time.perf_counter()
+    try:
+        for i, chunk in enumerate(pd.read_csv(args.input, chunksize=args.chunksize)):
+            columns = {"_".join(str(c).split()): c for c in chunk.columns}
+            missing = [name for name in features if name not in columns]
+            if missing:
+                raise SystemExit(f"❌ Colonnes manquantes : {', '.join(missing)}")
+            X = current.clip(chunk[[columns[name] for name in features]].to_numpy(dtype=np.float64))
+
+            if scorer is not None:
+                result = scorer.run(X, method, n_out, current.version)
+            else:
+                result = np.asarray(getattr(current.predictor, method)(X), dtype=np.float64)
+
+            if has_proba:
+                category = current.classes[np.argmax(result, axis=1)]
+            else:
+                category = result.astype(int)
+            scored = {
+                "predicted_category": category,
+                "predicted_label": pd.Series(category, index=chunk.index).map(LABEL_MAP),
+            }
+            if has_proba:
+                scored["confidence"] = result.max(axis=1)
+                for j, c in enumerate(current.classes):
+                    scored[f"proba_{LABEL_MAP.get(int(c), c)}"] = result[:, j]
+            chunk = pd.concat([chunk, pd.DataFrame(scored, index=chunk.index)], axis=1)
+            chunk.to_csv(args.out, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            n_rows += len(chunk)
+    finally:
+        if scorer is not None:
+            scorer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {n_rows} lignes notées en {elapsed:.2f} s ({n_rows / elapsed:,.0f} lignes/s, "
+          f"{args.workers} worker(s)) -> '{args.out}'")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Notation d'un CSV complet, répartie sur plusieurs processus")
+    parser.add_argument("--input", required=True, help="CSV au schéma de juice.csv")
+    parser.add_argument("--out", required=True, help="CSV de sortie (colonnes d'origine + prédictions)")
+    parser.add_argument("--model", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "juice_model.pkl"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processus (1 = sans pool)")
+    parser.add_argument("--chunksize", type=int, default=200000, help="lignes lues par bloc")
+    score_csv(parser.parse_args(argv))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Schéma compilé de validation des requêtes de prédiction.
+
+Le schéma est construit une seule fois : une table nom de champ -> colonne
+(noms snake_case de l'API et noms du CSV, ex. ``"fixed acidity"``) et deux
+vecteurs de bornes physiques. Le parsing remplit un buffer float64
+préalloué en un seul passage sur le payload et retourne des erreurs
+structurées par champ (manquant, non numérique, hors plage).
+"""
+import math
+
+import numpy as np
+
+# Bornes physiques (min, max) par feature, dans l'ordre de FEATURE_ORDER
+PHYSICAL_RANGES = {
+    "fixed_acidity": (0.0, 20.0),
+    "volatile_acidity": (0.0, 2.0),
+    "citric_acid": (0.0, 2.0),
+    "residual_sugar": (0.0, 100.0),
+    "chlorides": (0.0, 1.0),
+    "free_sulfur_dioxide": (0.0, 400.0),
+    "total_sulfur_dioxide": (0.0, 600.0),
+    "density": (0.9, 1.1),
+    "pH": (2.5, 4.5),
+    "sulphates": (0.0, 3.0),
+    "alcohol": (0.0, 20.0),
+}
+
+# Mapping numérique -> label lisible (API, notation CSV de parallel.py, Streamlit)
+LABEL_MAP = {
+    0: "Mauvais",
+    1: "Moyen",
+    2: "Bon",
+}
+
+
+class ValidationError(ValueError):
+    """Erreur de validation portant la liste des erreurs par champ."""
+
+    def __init__(self, errors: list):
+        self.errors = errors
+        super().__init__("; ".join(e["message"] for e in errors))
+
+
+class FeatureSchema:
+    def __init__(self, feature_order: list, ranges: dict = None):
+        self.feature_order = list(feature_order)
+        self.n_features = len(self.feature_order)
+
+        # Alias : nom API, nom CSV (espaces) -> indice de colonne
+        self.columns = {}
+        for i, feat in enumerate(self.feature_order):
+            self.columns[feat] = i
+            self.columns[feat.replace("_", " ")] = i
+
+        ranges = PHYSICAL_RANGES if ranges is None else ranges
+        bounds = [ranges.get(feat, (-math.inf, math.inf)) for feat in self.feature_order]
+        self.lower = np.array([lo for lo, _ in bounds], dtype=np.float64)
+        self.upper = np.array([hi for _, hi in bounds], dtype=np.float64)
+
+        # Table compilée : nom -> (colonne, nom canonique, min, max)
+        self._fields = {
+            name: (i, self.feature_order[i], bounds[i][0], bounds[i][1])
+            for name, i in self.columns.items()
+        }
+        self._complete = (1 << self.n_features) - 1
+
+    def parse(self, payload, out: np.ndarray = None) -> np.ndarray:
+        """Remplit ``out`` (vecteur de taille ``n_features``) depuis ``payload``.
+
+        Lève ``ValidationError`` avec toutes les erreurs du payload.
+        """
+        if not isinstance(payload, dict):
+            raise ValidationError([{
+                "field": None, "error": "invalid",
+                "message": "Échantillon invalide : un objet JSON est attendu",
+            }])
+
+        if out is None:
+            out = np.empty(self.n_features, dtype=np.float64)
+
+        fields = self._fields
+        values = [math.nan] * self.n_features
+        seen = 0
+        errors = []
+        for name, value in payload.items():
+            field = fields.get(name)
+            if field is None:
+                continue
+            i, feat, lo, hi = field
+            seen |= 1 << i
+
+            if type(value) is float or type(value) is int:
+                v = float(value)
+            else:
+                try:
+                    if isinstance(value, bool):
+                        raise TypeError
+                    v = float(value)
+                except (TypeError, ValueError):
+                    v = math.nan
+
+            if lo <= v <= hi:
+                values[i] = v
+            elif v != v or v in (math.inf, -math.inf):
+                errors.append({
+                    "field": feat, "error": "non_numeric",
+                    "message": f"Valeur non numérique : {feat}={value!r}",
+                })
+            else:
+                errors.append({
+                    "field": feat, "error": "out_of_range",
+                    "message": f"Hors plage : {feat}={v:g} (attendu entre {lo:g} et {hi:g})",
+                })
+
+        if seen != self._complete:
+            for i, feat in enumerate(self.feature_order):
+                if not seen >> i & 1:
+                    errors.append({
+                        "field": feat, "error": "missing",
+                        "message": f"Champ manquant : {feat}",
+                    })
+
+        if errors:
+            raise ValidationError(errors)
+
+        # Une seule écriture dans le buffer numpy
+        out[:] = values
+        return out
@@ -0,0 +1,203 @@
+"""Moteur d'inférence NumPy pour les modèles XGBoost exportés.
+
+Le booster entraîné est aplati en tableaux NumPy compacts (un élément par
+nœud : feature, seuil, enfant gauche, valeur de feuille ; l'enfant droit est
+toujours ``gauche + 1`` chez XGBoost) puis évalué de manière vectorisée sur
+toute la matrice X, sans passer par le wrapper Python d'XGBoost
+(construction de DMatrix, etc.).
+
+Le gain est maximal sur les petits lots (requête unitaire) ; au-delà de
+quelques dizaines de lignes, le moteur C++ d'XGBoost reste plus rapide.
+
+Export : ``python tree_engine.py juice_model.pkl juice_model_trees.npz``
+"""
+import json
+import sys
+
+import numpy as np
+
+ARRAY_FIELDS = ("feature", "threshold", "left", "value", "default_left", "roots", "tree_class")
+
+
+class CompiledTrees:
+    """Ensemble d'arbres aplati, avec une interface proche de scikit-learn.
+
+    Expose ``classes_``, ``predict_proba`` et ``predict`` pour pouvoir
+    remplacer un ``XGBClassifier`` dans ``run_model``.
+    """
+
+    def __init__(self, feature, threshold, left, value, default_left,
+                 roots, tree_class, base_score, classes, objective, max_depth):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int64)
+        # float32 comme XGBoost ; float64 seulement pour des seuils repliés (fold_scaler)
+        threshold = np.ascontiguousarray(threshold)
+        self.threshold = threshold if threshold.dtype == np.float64 else threshold.astype(np.float32)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float32)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.tree_class = np.ascontiguousarray(tree_class, dtype=np.int32)
+        self.base_score = np.asarray(base_score, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.objective = str(objective)
+        self.max_depth = int(max_depth)
+
+        # Matrice arbre -> classe pour sommer les feuilles par classe
+        n_groups = len(self.base_score)
+        self._tree_to_class = np.zeros((len(self.roots), n_groups), dtype=np.float64)
+        self._tree_to_class[np.arange(len(self.roots)), self.tree_class] = 1.0
+
+    @classmethod
+    def from_xgb(cls, model):
+        """Aplati un ``XGBClassifier`` (ou un ``Booster``) entraîné."""
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        trees = learner["gradient_booster"]["model"]["trees"]
+        tree_info = learner["gradient_booster"]["model"]["tree_info"]
+        objective = learner["objective"]["name"]
+
+        num_class = int(learner["learner_model_param"].get("num_class", "0"))
+        n_groups = max(num_class, 1)
+        base = [float(v) for v in learner["learner_model_param"]["base_score"].strip("[]").split(",")]
+        base_score = np.broadcast_to(np.asarray(base, dtype=np.float64), (n_groups,)).copy()
+        if objective.startswith("binary:logistic"):
+            # base_score est stocké en probabilité, la marge est son logit
+            base_score = np.log(base_score / (1.0 - base_score))
+
+        feature, threshold, left, value, default_left, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            if any(tree.get("split_type", [])):
+                raise ValueError("Les splits catégoriels ne sont pas supportés")
+
+            lc = np.asarray(tree["left_children"], dtype=np.int64)
+            rc = np.asarray(tree["right_children"], dtype=np.int64)
+            is_leaf = lc == -1
+            if np.any(rc[~is_leaf] != lc[~is_leaf] + 1):
+                raise ValueError("Enfants gauche/droit non contigus : format d'arbre inattendu")
+
+            # Les feuilles pointent sur elles-mêmes (seuil +inf, défaut à
+            # gauche) : l'évaluation s'y stabilise quelle que soit la profondeur
+            own = np.arange(len(lc)) + offset
+            left.append(np.where(is_leaf, own, lc + offset))
+            feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+            threshold.append(np.where(is_leaf, np.inf, tree["split_conditions"]))
+            value.append(np.where(is_leaf, tree["split_conditions"], 0.0))
+            default_left.append(np.where(is_leaf, True, np.asarray(tree["default_left"], dtype=bool)))
+            roots.append(offset)
+
+            depth = np.zeros(len(lc), dtype=np.int64)
+            for node in range(len(lc)):
+                if not is_leaf[node]:
+                    depth[lc[node]] = depth[rc[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()))
+            offset += len(lc)
+
+        classes = getattr(model, "classes_", np.arange(max(num_class, 2)))
+        return cls(
+            np.concatenate(feature), np.concatenate(threshold).astype(np.float32),
+            np.concatenate(left), np.concatenate(value),
+            np.concatenate(default_left), roots, tree_info,
+            base_score, classes, objective, max_depth,
+        )
+
+    def fold_scaler(self, mean, scale):
+        """Replie une standardisation ``(x - mean) / scale`` dans les seuils.
+
+        XGBoost compare ``float32((x - m) / s) < t``. Une valeur standardisée
+        passe à droite dès qu'elle s'arrondit à ``t`` en float32, c'est-à-dire
+        à partir du milieu entre ``t`` et le float32 précédent. Le seuil brut
+        équivalent est donc ``milieu * s + m`` (s > 0), gardé en float64 : le
+        modèle retourné s'applique directement aux valeurs brutes.
+        """
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        t32 = self.threshold.astype(np.float32)
+        below = np.nextafter(t32, np.float32(-np.inf)).astype(np.float64)
+        midpoint = np.where(np.isinf(t32), t32, (below + t32.astype(np.float64)) / 2.0)
+        threshold = midpoint * scale[self.feature] + mean[self.feature]
+        return CompiledTrees(
+            self.feature, threshold, self.left, self.value, self.default_left,
+            self.roots, self.tree_class, self.base_score, self.classes_,
+            self.objective, self.max_depth,
+        )
+
+    # ===== Sérialisation =====
+
+    def save(self, path):
+        np.savez(
+            path,
+            **{name: getattr(self, name) for name in ARRAY_FIELDS},
+            base_score=self.base_score,
+            classes=self.classes_,
+            objective=np.asarray(self.objective),
+            max_depth=np.asarray(self.max_depth),
+        )
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        data = np.load(path, mmap_mode=mmap_mode)
+        return cls(
+            *(data[name] for name in ARRAY_FIELDS),
+            base_score=data["base_score"],
+            classes=data["classes"],
+            objective=str(data["objective"]),
+            max_depth=int(data["max_depth"]),
+        )
+
+    # ===== Inférence =====
+
+    def predict_margin(self, X) -> np.ndarray:
+        """Marges brutes (n, n_groups), équivalent de ``output_margin=True``."""
+        X = np.asarray(X, dtype=self.threshold.dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        n, n_features = X.shape
+        flat = np.ascontiguousarray(X).ravel()
+        row_offset = (np.arange(n, dtype=np.int64) * n_features)[:, None]
+        has_nan = bool(np.isnan(flat).any())
+
+        node = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = flat[row_offset + self.feature[node]]
+            go_right = ~(x < self.threshold[node])
+            if has_nan:
+                go_right &= ~(np.isnan(x) & self.default_left[node])
+            node = self.left[node] + go_right
+
+        return self.value[node].astype(np.float64) @ self._tree_to_class + self.base_score
+
+    def predict_proba(self, X) -> np.ndarray:
+        margin = self.predict_margin(X)
+        if self.objective.startswith("multi:"):
+            margin = margin - margin.max(axis=1, keepdims=True)
+            exp = np.exp(margin)
+            return exp / exp.sum(axis=1, keepdims=True)
+
+        p = 1.0 / (1.0 + np.exp(-margin[:, 0]))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def is_xgb_model(model) -> bool:
+    return type(model).__name__ in ("XGBClassifier", "Booster")
+
+
+if __name__ == "__main__":
+    import joblib
+
+    if len(sys.argv) != 3:
+        print("Usage : python tree_engine.py <juice_model.pkl> <sortie.npz>")
+        sys.exit(1)
+
+    model_data = joblib.load(sys.argv[1])
+    if not is_xgb_model(model_data["model"]):
+        print(f"❌ Modèle {type(model_data['model']).__name__} : seul XGBoost peut être exporté")
+        sys.exit(1)
+
+    CompiledTrees.from_xgb(model_data["model"]).save(sys.argv[2])
+    print(f"💾 Arbres exportés dans '{sys.argv[2]}'")
@@ -0,0 +1,116 @@
+"""Format binaire compact de ``/predict/batch`` (négociation de contenu).
+
+Un corps ``application/x-juice-matrix`` est un en-tête de 16 octets suivi
+d'une matrice little-endian rangée par lignes :
+
+    magic     4 o   b"JUIC"
+    version   1 o   1
+    dtype     1 o   b"f" (float32) ou b"d" (float64)
+    réservé   2 o
+    lignes    4 o   uint32
+    colonnes  4 o   uint32
+
+Requête : une ligne par échantillon, colonnes dans l'ordre ``FEATURE_ORDER``
+(NaN = valeur manquante). Le décodage est un ``np.frombuffer`` sur le corps
+reçu : ni parsing ni copie. Réponse : même format, colonne 0 = classe
+prédite, colonnes suivantes = probabilités dans l'ordre des classes
+(en-tête HTTP ``X-Juice-Classes``) ; NaN pour les lignes rejetées.
+
+Le format de la réponse est négocié sur l'en-tête ``Accept`` (``wants_matrix``) :
+à préférence égale, c'est celui de la requête.
+
+Un échantillon de 11 features pèse 88 octets en float64 contre ~300 en JSON
+(noms de champs répétés à chaque ligne). Le float64 donne exactement les
+mêmes prédictions que le JSON ; le float32 divise encore la taille par deux
+mais arrondit les valeurs (7.4 -> 7.400000095...) et peut changer la branche
+prise quand une valeur tombe sur un seuil de split du modèle.
+"""
+import struct
+
+import numpy as np
+
+MEDIA_TYPE = "application/x-juice-matrix"
+MAGIC = b"JUIC"
+VERSION = 1
+
+HEADER = struct.Struct("<4sBcxxII")
+DTYPES = {b"f": np.dtype("<f4"), b"d": np.dtype("<f8")}
+
+
+def quality(accept, media_type: str) -> float:
+    """Qualité ``q`` accordée à ``media_type`` par l'en-tête ``Accept``.
+
+    La plage la plus précise l'emporte (``type/sous-type``, puis ``type/*``,
+    puis ``*/*``) ; ``q=0`` exclut le type. Sans en-tête, tout est accepté.
+    """
+    if not accept:
+        return 1.0
+    m_type, _, m_subtype = media_type.lower().partition("/")
+    best, best_rank = 0.0, -1
+    for part in accept.split(","):
+        media_range, *params = part.split(";")
+        r_type, _, r_subtype = media_range.strip().lower().partition("/")
+        if (r_type, r_subtype) == (m_type, m_subtype):
+            rank = 2
+        elif r_type == m_type and r_subtype == "*":
+            rank = 1
+        elif (r_type, r_subtype) == ("*", "*"):
+            rank = 0
+        else:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        if rank > best_rank:
+            best, best_rank = q, rank
+    return best
+
+
+def wants_matrix(accept, default: bool = False) -> bool:
+    """Négociation de la réponse : binaire si ``Accept`` le préfère au JSON.
+
+    À qualité égale (``*/*``, en-tête absent ou types ignorés), ``default``
+    l'emporte : le format de la requête. Un binaire exclu (``q=0``) n'est
+    jamais choisi.
+    """
+    q_matrix, q_json = quality(accept, MEDIA_TYPE), quality(accept, "application/json")
+    return q_matrix > 0 and (q_matrix > q_json or (q_matrix == q_json and default))
+
+
+def encode_matrix(M: np.ndarray, dtype="<f8") -> bytes:
+    """En-tête + matrice 2D ``M`` (convertie en ``dtype`` little-endian)."""
+    dtype = np.dtype(dtype)
+    code = next((c for c, dt in DTYPES.items() if dt == dtype), None)
+    if code is None:
+        raise ValueError(f"Type non supporté : {dtype} (float32 ou float64 attendu)")
+    M = np.ascontiguousarray(M, dtype=dtype)
+    if M.ndim != 2:
+        raise ValueError("Une matrice 2D est attendue")
+    return HEADER.pack(MAGIC, VERSION, code, *M.shape) + M.tobytes()
+
+
+def decode_matrix(body, n_cols: int = None) -> np.ndarray:
+    """Vue NumPy (lecture seule, sans copie) sur la matrice de ``body``.
+
+    Lève ``ValueError`` si l'en-tête est invalide, si le nombre de colonnes
+    diffère de ``n_cols`` ou si la taille du corps ne correspond pas.
+    """
+    if len(body) < HEADER.size:
+        raise ValueError("Corps binaire invalide : en-tête tronqué")
+    magic, version, code, n_rows, n = HEADER.unpack_from(body)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Corps binaire invalide : en-tête {MEDIA_TYPE} v{VERSION} attendu")
+    dtype = DTYPES.get(code)
+    if dtype is None:
+        raise ValueError(f"Type non supporté : {code!r} (b'f' ou b'd' attendu)")
+    if n_cols is not None and n != n_cols:
+        raise ValueError(f"Nombre de colonnes invalide : {n} (attendu {n_cols})")
+    expected = HEADER.size + n_rows * n * dtype.itemsize
+    if len(body) != expected:
+        raise ValueError(f"Taille du corps invalide : {len(body)} octets (attendu {expected})")
+    return np.frombuffer(body, dtype=dtype, count=n_rows * n, offset=HEADER.size).reshape(n_rows, n)
@@ -0,0 +1,100 @@
+"""Benchmark du chargement des données : ``pd.read_csv`` vs cache colonnaire mmap.
+
+Chaque méthode est mesurée dans un processus neuf (pas de cache Python
+partagé) : durée du chargement et RSS maximal ajouté par rapport au même
+processus après imports. ``--scale k`` répète les lignes de chaque CSV
+``k`` fois (fichiers temporaires) pour simuler des exports plus gros.
+
+Usage : python benchmarks/bench_dataset.py [--scale 50] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAINING_DIR = os.path.join(ROOT_DIR, "training")
+
+CHILD = r"""
+import json, resource, sys, time
+sys.path.insert(0, {training!r})
+import numpy as np
+import pandas as pd
+import dataset
+
+method, path = sys.argv[1], sys.argv[2]
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t0 = time.perf_counter()
+if method == "read_csv":
+    df = pd.read_csv(path)
+    total = float(df.select_dtypes("number").to_numpy().sum())
+elif method == "load_dataset":
+    df = dataset.load_dataset(path)
+    total = float(df.to_numpy().sum())
+else:  # load_columns : colonnes mmap sans DataFrame
+    cols = dataset.load_columns(path)
+    total = float(sum(c.sum() for c in cols.values()))
+elapsed = time.perf_counter() - t0
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+print(json.dumps({{"time_s": elapsed, "rss_kb": rss, "total": total}}))
+""".format(training=TRAINING_DIR)
+
+METHODS = ["read_csv", "load_dataset", "load_columns"]
+
+
+def run(method, path):
+    out = subprocess.run([sys.executable, "-c", CHILD, method, path],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def scaled_copy(path, scale, tmpdir):
+    """CSV avec les lignes de ``path`` répétées ``scale`` fois (en-tête conservé)."""
+    if scale <= 1:
+        return path
+    target = os.path.join(tmpdir, os.path.basename(path))
+    with open(path) as src:
+        header, body = src.readline(), src.read()
+    with open(target, "w") as dst:
+        dst.write(header)
+        for _ in range(scale):
+            dst.write(body)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="facteur de réplication des lignes")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, TRAINING_DIR)
+    import dataset
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for name in ["juice.csv", "juice_data.csv"]:
+            path = scaled_copy(os.path.join(ROOT_DIR, name), args.scale, tmpdir)
+            if not dataset.is_fresh(path):
+                dataset.convert(path)
+            n_rows = dataset._read_meta(dataset.cache_path(path))["n_rows"]
+            print(f"\n=== {name} ({n_rows} lignes, {os.path.getsize(path) / 1e6:.1f} Mo)")
+
+            totals = set()
+            for method in METHODS:
+                runs = [run(method, path) for _ in range(args.repeat)]
+                totals.add(round(runs[0]["total"], 3))
+                time_ms = statistics.median(r["time_s"] for r in runs) * 1000
+                rss_mb = statistics.median(r["rss_kb"] for r in runs) / 1024
+                print(f"  {method:<14} {time_ms:9.2f} ms   +{rss_mb:7.1f} Mo RSS")
+            assert len(totals) == 1, f"Contenus différents : {totals}"
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
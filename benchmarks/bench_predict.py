@@ -0,0 +1,87 @@
+"""Micro-benchmark du chemin chaud de /predict.
+
+Compare, sur une seule ligne déjà préparée :
+- l'ancien chemin : ``scaler.transform(X)``, ``model.predict(X)`` puis
+  ``model.predict_proba(X)``
+- le chemin actuel : ``run_model(X)`` (prédicteur compilé, une passe
+  ``predict_proba`` + argmax)
+
+Usage : python benchmarks/bench_predict.py [--n 2000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import warnings
+
+warnings.filterwarnings("ignore")
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+sys.path.insert(0, API_DIR)
+os.chdir(API_DIR)
+
+import api  # noqa: E402
+
+SAMPLE = {
+    "fixed_acidity": 7.4,
+    "volatile_acidity": 0.7,
+    "citric_acid": 0.0,
+    "residual_sugar": 1.9,
+    "chlorides": 0.076,
+    "free_sulfur_dioxide": 11.0,
+    "total_sulfur_dioxide": 34.0,
+    "density": 0.9978,
+    "pH": 3.51,
+    "sulphates": 0.56,
+    "alcohol": 9.4,
+}
+
+
+def old_path(X):
+    current = api.store.get()
+    if current.scaler is not None:
+        X = current.scaler.transform(X)
+    y_pred = current.model.predict(X)[0]
+    confidence = None
+    if hasattr(current.model, "predict_proba"):
+        confidence = float(max(current.model.predict_proba(X)[0]))
+    return y_pred, confidence
+
+
+def new_path(X):
+    return api.run_model(X, api.store.get())
+
+
+def bench(fn, X, n):
+    for _ in range(min(n, 50)):
+        fn(X)
+    timings = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=2000, help="nombre d'itérations")
+    args = parser.parse_args()
+
+    X = api.prepare_features(SAMPLE)
+    print(f"Modèle : {type(api.store.get().model).__name__}  ({args.n} itérations)")
+
+    results = {}
+    for name, fn in [("predict + predict_proba", old_path), ("run_model (une passe)", new_path)]:
+        t = bench(fn, X, args.n)
+        results[name] = statistics.median(t)
+        print(f"{name:<26} médiane {statistics.median(t) * 1e6:8.1f} µs   "
+              f"moyenne {statistics.mean(t) * 1e6:8.1f} µs")
+
+    old, new = results.values()
+    print(f"Gain par requête : {(old - new) * 1e6:.1f} µs ({(1 - new / old):.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark de la recherche d'hyperparamètres : aléatoire complète vs successive halving.
+
+Lance les deux recherches du notebook (SVM 20 candidats, XGBoost 40
+candidats, 5 folds) avec ``scheduler.run_searches`` sans puis avec le cache
+des folds, puis avec ``scheduler.run_halving``, et compare durée, meilleur
+f1 pondéré CV et f1 pondéré sur le jeu de test après refit.
+
+Usage : python benchmarks/bench_search.py [--jobs 4] [--svm-iter 20] [--xgb-iter 40]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+warnings.filterwarnings("ignore")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "training"))
+
+from sklearn.metrics import f1_score  # noqa: E402
+from sklearn.model_selection import StratifiedKFold, train_test_split  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+
+from scheduler import SearchSpec, run_halving, run_searches  # noqa: E402
+from train import PARAM_GRID_SVM, PARAM_GRID_XGB, load_data, make_svm_pipeline, make_xgb  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=os.path.join(ROOT_DIR, "juice_data.csv"))
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--svm-iter", type=int, default=20)
+    parser.add_argument("--xgb-iter", type=int, default=40)
+    parser.add_argument("--factor", type=int, default=3)
+    args = parser.parse_args()
+
+    X, y = load_data(args.data)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=args.seed, stratify=y
+    )
+    scaler = StandardScaler().fit(X_train)
+    data = {
+        "raw": (X_train.to_numpy(), X_test.to_numpy()),
+        "scaled": (scaler.transform(X_train), scaler.transform(X_test)),
+    }
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=args.seed)
+
+    def specs():
+        return [
+            SearchSpec("svm", make_svm_pipeline(args.seed), PARAM_GRID_SVM, args.svm_iter, "raw", args.seed),
+            SearchSpec("xgb", make_xgb(args.seed), PARAM_GRID_XGB, args.xgb_iter, "scaled", args.seed),
+        ]
+
+    datasets = {key: train for key, (train, _) in data.items()}
+    modes = [
+        ("aléatoire, sans cache des folds", lambda: run_searches(
+            specs(), datasets, y_train, cv, n_jobs=args.jobs, fold_cache=False, return_train_score=True)),
+        ("aléatoire", lambda: run_searches(specs(), datasets, y_train, cv, n_jobs=args.jobs)),
+        ("halving", lambda: run_halving(specs(), datasets, y_train, cv, n_jobs=args.jobs, factor=args.factor)),
+    ]
+
+    reference = None
+    for mode, run in modes:
+        t0 = time.perf_counter()
+        searches = run()
+        elapsed = time.perf_counter() - t0
+        reference = reference or elapsed
+        print(f"\n=== {mode} : {elapsed:.1f} s ({elapsed / reference:.0%} du temps de la recherche complète)")
+        for name, search in searches.items():
+            X_tr, X_te = data[search.spec.data_key]
+            model = search.refit(X_tr, y_train)
+            test_f1 = f1_score(y_test, model.predict(X_te), average="weighted")
+            print(f"  {name:<4} f1 CV = {search.best_score_:.4f}  f1 test = {test_f1:.4f}  {search.best_params_}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""Suite de benchmarks reproductible de l'API de prédiction (résultats JSON).
+
+Pour chaque artefact (XGBoost déployé, Pipeline SVC) et chaque transport :
+- ``inprocess`` : ``api.py`` piloté par le client de test Flask, dans un
+  processus dédié (``MODEL_PATH`` est lu à l'import de l'API) ;
+- ``socket`` : serveur ASGI (ou Flask, ``--server``) lancé en sous-processus
+  sur un port local, interrogé par des ``requests.Session`` keep-alive ;
+
+trois scénarios sont mesurés :
+- ``single`` : latence d'un ``POST /predict`` d'une ligne (requêtes en série) ;
+- ``batch`` : débit de ``POST /predict/batch`` pour chaque ``--batch-sizes`` ;
+- ``concurrent`` : QPS de ``/predict`` avec ``--clients`` clients simultanés.
+
+Le transport ``inprocess`` mesure en plus le scénario ``sharded`` : débit
+de l'inférence d'un lot de ``--shard-rows`` lignes réparti par
+``parallel.ShardedScorer`` sur ``--shard-workers`` processus (0 = passe
+locale de référence), pour juger du passage à l'échelle avec les cœurs.
+
+Les échantillons sont synthétiques : chaque feature est tirée
+indépendamment selon la distribution empirique de ``juice_data.csv``
+(inverse de la fonction de répartition, graine fixe). Le cache de
+prédictions est désactivé pour mesurer le modèle et non le cache.
+
+L'artefact SVC (``Pipeline(StandardScaler, SVC)``, hyperparamètres par
+défaut) est entraîné une fois et mis en cache dans ``benchmarks/results/``.
+
+Usage :
+    python benchmarks/bench_suite.py                       # tout, JSON dans benchmarks/results/
+    python benchmarks/bench_suite.py --models xgb --transports inprocess --quick
+    python benchmarks/bench_suite.py --compare benchmarks/results/ancien.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT_DIR, "api")
+TRAINING_DIR = os.path.join(ROOT_DIR, "training")
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+
+DATA_PATH = os.path.join(ROOT_DIR, "juice_data.csv")
+MODELS = {
+    "xgb": os.path.join(API_DIR, "juice_model.pkl"),
+    "svc": os.path.join(RESULTS_DIR, "svc_model.pkl"),
+}
+SERVERS = {
+    "asgi": lambda port: [sys.executable, "-m", "uvicorn", "asgi:app",
+                          "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+    "flask": lambda port: [sys.executable, "-c",
+                           f"import api; api.app.run(host='127.0.0.1', port={port}, threaded=True)"],
+}
+# Environnement de l'API pendant les mesures
+API_ENV = {"PREDICT_CACHE_SIZE": "0", "MODEL_PRELOAD": "1", "MODEL_POLL_INTERVAL": "0"}
+
+
+# ===== Données et artefacts =====
+
+def synthetic_samples(n, seed=0, data_path=DATA_PATH):
+    """``n`` échantillons (dicts snake_case) tirés par feature selon la distribution empirique."""
+    sys.path.insert(0, TRAINING_DIR)
+    from dataset import FEATURE_ORDER, load_columns
+
+    columns = load_columns(data_path, FEATURE_ORDER)
+    rng = np.random.default_rng(seed)
+    matrix = np.column_stack([np.quantile(columns[name], rng.random(n)) for name in FEATURE_ORDER])
+    return [dict(zip(FEATURE_ORDER, row)) for row in matrix.tolist()]
+
+
+def build_svc_artifact(path, seed=123):
+    """Entraîne le Pipeline SVC de ``train.py`` (hyperparamètres par défaut) et l'enregistre."""
+    sys.path.insert(0, TRAINING_DIR)
+    import joblib
+    from sklearn.model_selection import train_test_split
+
+    from dataset import load_xy
+    from train import make_svm_pipeline
+
+    X, y = load_xy(DATA_PATH)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
+    model = make_svm_pipeline(seed).fit(X_train, y_train)
+    reference = joblib.load(MODELS["xgb"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump({
+        "model": model,
+        "feature_names": X.columns.tolist(),
+        "accuracy": float(model.score(X_test, y_test)),
+        "best_params": {},
+        "scaler": None,
+        "clip_bounds": reference.get("clip_bounds"),
+    }, path)
+    print(f"💾 Artefact SVC entraîné : {path}")
+
+
+# ===== Scénarios (communs aux deux transports) =====
+
+def latency_stats(latencies, elapsed=None, rows_per_request=1):
+    lat_ms = np.asarray(latencies) * 1000.0
+    stats = {
+        "requests": len(lat_ms),
+        "mean_ms": float(lat_ms.mean()),
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p95_ms": float(np.percentile(lat_ms, 95)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+    }
+    elapsed = elapsed if elapsed is not None else float(np.sum(latencies))
+    stats["qps"] = len(lat_ms) / elapsed
+    stats["rows_per_s"] = stats["qps"] * rows_per_request
+    return stats
+
+
+def timed_calls(post, path, payloads):
+    latencies, errors = [], 0
+    for payload in payloads:
+        t0 = time.perf_counter()
+        status = post(path, payload)
+        latencies.append(time.perf_counter() - t0)
+        errors += status != 200
+    return latencies, errors
+
+
+def run_scenarios(make_client, samples, args):
+    """Exécute les trois scénarios ; ``make_client()`` retourne ``post(path, payload) -> status``."""
+    results = []
+    post = make_client()
+
+    # Préchauffage (chemins d'inférence, connexions)
+    timed_calls(post, "/predict", samples[:args.warmup])
+    timed_calls(post, "/predict/batch", [samples[:max(args.batch_sizes)]] * 2)
+
+    latencies, errors = timed_calls(post, "/predict", samples[:args.single])
+    results.append({"scenario": "single", "batch_size": 1, "clients": 1, "errors": errors,
+                    **latency_stats(latencies)})
+
+    for size in args.batch_sizes:
+        n_requests = max(5, min(args.batch_requests, args.batch_rows // size))
+        offsets = [(k * size) % (len(samples) - size + 1) for k in range(n_requests)]
+        payloads = [samples[o:o + size] for o in offsets]
+        latencies, errors = timed_calls(post, "/predict/batch", payloads)
+        results.append({"scenario": "batch", "batch_size": size, "clients": 1, "errors": errors,
+                        **latency_stats(latencies, rows_per_request=size)})
+
+    for n_clients in args.clients:
+        per_client = max(1, args.concurrent_requests // n_clients)
+        outputs = [None] * n_clients
+        barrier = threading.Barrier(n_clients + 1)
+
+        def worker(i):
+            client_post = make_client()
+            payloads = [samples[(i * per_client + k) % len(samples)] for k in range(per_client)]
+            barrier.wait()
+            outputs[i] = timed_calls(client_post, "/predict", payloads)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_clients)]
+        for t in threads:
+            t.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        latencies = [lat for lats, _ in outputs for lat in lats]
+        results.append({"scenario": "concurrent", "batch_size": 1, "clients": n_clients,
+                        "errors": sum(err for _, err in outputs), **latency_stats(latencies, elapsed)})
+    return results
+
+
+def run_sharded(args, samples, model_path, current):
+    """Scénario ``sharded`` : débit de ``ShardedScorer.run`` par nombre de workers et taille de lot."""
+    from parallel import ShardedScorer
+
+    features = [name for name in samples[0]]
+    base = current.clip(np.array([[s[name] for name in features] for s in samples], dtype=np.float64))
+    has_proba = hasattr(current.predictor, "predict_proba")
+    method = "predict_proba" if has_proba else "predict"
+    n_out = len(current.classes) if has_proba else 1
+
+    results = []
+    for workers in args.shard_workers:
+        scorer = ShardedScorer(model_path, workers) if workers > 0 else None
+        try:
+            if scorer is not None:
+                scorer.warm()
+            for rows in args.shard_rows:
+                X = np.resize(base, (rows, base.shape[1]))
+                run = (lambda: scorer.run(X, method, n_out)) if scorer is not None else \
+                    (lambda: getattr(current.predictor, method)(X))
+                run()
+                latencies = []
+                for _ in range(args.shard_repeats):
+                    t0 = time.perf_counter()
+                    run()
+                    latencies.append(time.perf_counter() - t0)
+                results.append({"scenario": "sharded", "batch_size": rows, "clients": 1, "workers": workers,
+                                "errors": 0, **latency_stats(latencies, rows_per_request=rows)})
+        finally:
+            if scorer is not None:
+                scorer.close()
+    return results
+
+
+# ===== Transports =====
+
+def run_inprocess(args, samples):
+    """Processus enfant : l'API est importée avec ``MODEL_PATH`` déjà positionné."""
+    os.chdir(API_DIR)
+    sys.path.insert(0, API_DIR)
+    import api
+
+    current = api.store.get(api.MODEL_LOAD_TIMEOUT)
+
+    def make_client():
+        client = api.app.test_client()
+        return lambda path, payload: client.post(path, json=payload).status_code
+
+    results = run_scenarios(make_client, samples, args)
+    if args.shard_workers:
+        results += run_sharded(args, samples, api.store.path, current)
+    return {"model": current.info(), "results": results}
+
+
+def run_socket(args, samples, model_path):
+    import requests
+
+    port = args.port
+    env = {**os.environ, **API_ENV, "MODEL_PATH": model_path}
+    proc = subprocess.Popen(SERVERS[args.server](port), cwd=API_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 120
+        while True:
+            try:
+                if requests.get(f"{url}/health", timeout=1).status_code == 200:
+                    break
+            except requests.RequestException:
+                pass
+            if time.time() > deadline or proc.poll() is not None:
+                raise RuntimeError(f"Serveur {args.server} non prêt sur {url}")
+            time.sleep(0.2)
+
+        def make_client():
+            session = requests.Session()
+            return lambda path, payload: session.post(f"{url}{path}", json=payload, timeout=60).status_code
+
+        model = requests.get(f"{url}/model", timeout=5).json()
+        return {"model": model, "results": run_scenarios(make_client, samples, args)}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run_child(args, transport, model_path):
+    """Lance ``--child`` dans un processus neuf et relit son résultat JSON."""
+    env = {**os.environ, **API_ENV, "MODEL_PATH": model_path}
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", transport, *args.passthrough]
+    out = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+# ===== Rapport =====
+
+def environment():
+    import sklearn
+    import xgboost
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "scikit_learn": sklearn.__version__,
+        "xgboost": xgboost.__version__,
+    }
+
+
+def result_key(r):
+    return (r["model"], r["transport"], r["scenario"], r["batch_size"], r["clients"], r.get("workers"))
+
+
+def print_results(results, baseline=None):
+    previous = {result_key(r): r for r in (baseline or {}).get("results", [])}
+    print(f"\n{'modèle':<5} {'transport':<10} {'scénario':<10} {'lot':>6} {'clients':>7} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'QPS':>9} {'lignes/s':>11}  {'Δ p50':>7}")
+    for r in results:
+        delta = ""
+        old = previous.get(result_key(r))
+        if old is not None:
+            delta = f"{r['p50_ms'] / old['p50_ms'] - 1:+7.1%}"
+        scenario = r["scenario"] if "workers" not in r else f"{r['scenario']}/{r['workers']}w"
+        print(f"{r['model']:<5} {r['transport']:<10} {scenario:<10} {r['batch_size']:>6} {r['clients']:>7} "
+              f"{r['p50_ms']:9.3f} {r['p99_ms']:9.3f} {r['qps']:9.1f} {r['rows_per_s']:11.0f}  {delta:>7}"
+              f"{'  ⚠️ ' + str(r['errors']) + ' erreurs' if r['errors'] else ''}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--transports", nargs="+", default=["inprocess", "socket"], choices=["inprocess", "socket"])
+    parser.add_argument("--server", default="asgi", choices=list(SERVERS), help="serveur du transport socket")
+    parser.add_argument("--port", type=int, default=7881)
+    parser.add_argument("--seed", type=int, default=0, help="graine des échantillons synthétiques")
+    parser.add_argument("--samples", type=int, default=20000, help="taille du réservoir d'échantillons")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--single", type=int, default=1000, help="requêtes du scénario single")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--batch-requests", type=int, default=200, help="requêtes max par taille de lot")
+    parser.add_argument("--batch-rows", type=int, default=20000, help="lignes visées par taille de lot")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--concurrent-requests", type=int, default=2000, help="requêtes totales par niveau")
+    parser.add_argument("--shard-workers", type=int, nargs="*", default=[0, 1, 2, 4],
+                        help="processus du scénario sharded (0 = passe locale ; vide pour l'ignorer)")
+    parser.add_argument("--shard-rows", type=int, nargs="+", default=[10000, 100000], help="lignes par lot sharded")
+    parser.add_argument("--shard-repeats", type=int, default=5, help="lots mesurés par configuration sharded")
+    parser.add_argument("--quick", action="store_true", help="mesures réduites (fumée)")
+    parser.add_argument("--out", help="fichier JSON de sortie (défaut : benchmarks/results/bench_<date>_<commit>.json)")
+    parser.add_argument("--compare", help="JSON d'une exécution précédente : affiche l'écart de p50")
+    parser.add_argument("--child", choices=["inprocess"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.samples, args.warmup, args.single = 2000, 10, 100
+        args.batch_requests, args.batch_rows, args.concurrent_requests = 20, 2000, 200
+        args.shard_rows, args.shard_repeats = [10000], 2
+    # Options de mesure transmises au processus enfant
+    args.passthrough = [
+        "--seed", str(args.seed), "--samples", str(args.samples), "--warmup", str(args.warmup),
+        "--single", str(args.single), "--batch-requests", str(args.batch_requests),
+        "--batch-rows", str(args.batch_rows), "--concurrent-requests", str(args.concurrent_requests),
+        "--batch-sizes", *map(str, args.batch_sizes), "--clients", *map(str, args.clients),
+        "--shard-rows", *map(str, args.shard_rows), "--shard-repeats", str(args.shard_repeats),
+        "--shard-workers", *map(str, args.shard_workers),
+    ]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    samples = synthetic_samples(args.samples, args.seed)
+
+    if args.child:
+        print(json.dumps(run_inprocess(args, samples)))
+        return 0
+
+    if "svc" in args.models and not os.path.exists(MODELS["svc"]):
+        build_svc_artifact(MODELS["svc"])
+
+    report = {"environment": environment(), "config": {
+        k: v for k, v in vars(args).items() if k not in ("passthrough", "child", "out", "compare")
+    }, "models": {}, "results": []}
+
+    for name in args.models:
+        for transport in args.transports:
+            print(f"⏳ {name} / {transport}...")
+            if transport == "inprocess":
+                run = run_child(args, transport, MODELS[name])
+            else:
+                run = run_socket(args, samples, MODELS[name])
+            report["models"][name] = {"artifact": os.path.relpath(MODELS[name], ROOT_DIR),
+                                      "version": run["model"].get("version"),
+                                      "model_type": run["model"].get("model_type"),
+                                      "engine": run["model"].get("engine")}
+            for r in run["results"]:
+                report["results"].append({"model": name, "transport": transport, **r})
+
+    out = args.out
+    if out is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        out = os.path.join(RESULTS_DIR, f"bench_{stamp}_{report['environment']['git_commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(report["results"], baseline)
+    print(f"\n💾 Résultats écrits dans '{out}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Benchmark du moteur d'arbres NumPy face au wrapper XGBoost.
+
+Mesure la latence (1 ligne) et le débit (lots de plusieurs tailles) de
+``predict_proba`` pour l'``XGBClassifier`` du pickle et pour sa version
+compilée (``tree_engine.CompiledTrees``), et vérifie l'écart maximal
+entre les probabilités.
+
+Usage : python benchmarks/bench_tree_engine.py [--repeat 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import warnings
+
+warnings.filterwarnings("ignore")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from tree_engine import CompiledTrees, is_xgb_model  # noqa: E402
+
+
+def timeit(fn, X, repeat):
+    fn(X)
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(ROOT_DIR, "api", "juice_model.pkl"))
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    model_data = joblib.load(args.model)
+    model, scaler = model_data["model"], model_data["scaler"]
+    if not is_xgb_model(model):
+        print(f"Modèle {type(model).__name__} : rien à comparer (XGBoost uniquement)")
+        return
+
+    compiled = CompiledTrees.from_xgb(model)
+
+    df = pd.read_csv(os.path.join(ROOT_DIR, "juice_data.csv"))
+    X_all = df.drop(columns=["quality", "quality_category"]).to_numpy()
+    if scaler is not None:
+        X_all = scaler.transform(X_all)
+
+    diff = np.abs(model.predict_proba(X_all) - compiled.predict_proba(X_all)).max()
+    same = (model.predict(X_all) == compiled.predict(X_all)).mean()
+    print(f"{len(compiled.roots)} arbres, {len(compiled.feature)} nœuds, profondeur {compiled.max_depth}")
+    print(f"Écart max des probabilités : {diff:.2e}   classes identiques : {same:.2%}\n")
+
+    print(f"{'lot':>6} {'xgboost':>14} {'numpy':>14} {'xgboost lignes/s':>18} {'numpy lignes/s':>16}")
+    for size in (1, 8, 64, 512, len(X_all)):
+        X = X_all[:size]
+        repeat = max(5, args.repeat // max(1, size // 64))
+        t_xgb = timeit(model.predict_proba, X, repeat)
+        t_np = timeit(compiled.predict_proba, X, repeat)
+        print(f"{size:>6} {t_xgb * 1e6:>11.1f} µs {t_np * 1e6:>11.1f} µs "
+              f"{size / t_xgb:>18,.0f} {size / t_np:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark du parsing + validation d'une requête /predict.
+
+Compare :
+- l'ancien ``prepare_features`` (boucle sur FEATURE_ORDER, ``float()`` par
+  champ, ``np.array(...).reshape`` puis ``scaler.transform``) ;
+- la même boucle sans le scaler (désormais replié dans le modèle) ;
+- le schéma compilé (``schema.FeatureSchema.parse`` dans un buffer
+  préalloué, avec alias CSV et contrôle des bornes physiques).
+
+Usage : python benchmarks/bench_validation.py [--n 100000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+warnings.filterwarnings("ignore")
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+sys.path.insert(0, API_DIR)
+
+from schema import FeatureSchema  # noqa: E402
+
+FEATURE_ORDER = [
+    "fixed_acidity",
+    "volatile_acidity",
+    "citric_acid",
+    "residual_sugar",
+    "chlorides",
+    "free_sulfur_dioxide",
+    "total_sulfur_dioxide",
+    "density",
+    "pH",
+    "sulphates",
+    "alcohol",
+]
+
+SAMPLE = {
+    "fixed_acidity": 7.4,
+    "volatile_acidity": 0.7,
+    "citric_acid": 0.0,
+    "residual_sugar": 1.9,
+    "chlorides": 0.076,
+    "free_sulfur_dioxide": 11.0,
+    "total_sulfur_dioxide": 34.0,
+    "density": 0.9978,
+    "pH": 3.51,
+    "sulphates": 0.56,
+    "alcohol": 9.4,
+}
+
+
+def loop_prepare(payload):
+    values = []
+    for feat in FEATURE_ORDER:
+        if feat not in payload:
+            raise ValueError(f"Champ manquant : {feat}")
+        values.append(float(payload[feat]))
+    return np.array(values).reshape(1, -1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=100000, help="nombre d'itérations")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    schema = FeatureSchema(FEATURE_ORDER)
+    scaler = joblib.load(os.path.join(API_DIR, "juice_model.pkl"))["scaler"]
+
+    def old_prepare(payload):
+        X = loop_prepare(payload)
+        if scaler is not None:
+            X = scaler.transform(X)
+        return X
+
+    def new_prepare(payload):
+        X = np.empty((1, schema.n_features), dtype=np.float64)
+        schema.parse(payload, X[0])
+        return X
+
+    assert np.array_equal(loop_prepare(SAMPLE), new_prepare(SAMPLE))
+
+    candidates = [
+        ("prepare_features d'origine", old_prepare),
+        ("boucle + float + np.array", loop_prepare),
+        ("schéma compilé", new_prepare),
+    ]
+    for name, fn in candidates:
+        n = args.n if fn is not old_prepare else max(1, args.n // 20)
+        rounds = []
+        for _ in range(args.rounds):
+            t0 = time.perf_counter()
+            for _ in range(n):
+                fn(SAMPLE)
+            rounds.append((time.perf_counter() - t0) / n)
+        print(f"{name:<28} {statistics.median(rounds) * 1e6:6.2f} µs / requête")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark du format de /predict/batch : JSON contre ``application/x-juice-matrix``.
+
+Pour chaque taille de lot, mesure :
+- les octets sur le fil (requête et réponse) ;
+- le décodage côté serveur jusqu'à la matrice X validée : ``json.loads`` +
+  ``split_batch`` + ``prepare_batch`` pour le JSON (lignes ou colonnes),
+  ``wire.decode_matrix`` + contrôle vectorisé des bornes pour le binaire ;
+- l'aller-retour complet via le client de test Flask (modèle compris).
+
+Les échantillons sont ceux de ``bench_suite.py`` (synthétiques, graine fixe).
+
+Usage : python benchmarks/bench_wire.py [--batch-sizes 100 1000 10000] [--rounds 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+sys.path.insert(0, API_DIR)
+os.environ.setdefault("MODEL_PATH", os.path.join(API_DIR, "juice_model.pkl"))
+os.environ.setdefault("PREDICT_CACHE_SIZE", "0")
+os.environ.setdefault("MODEL_POLL_INTERVAL", "0")
+os.environ["MAX_BATCH_SIZE"] = str(10 ** 7)
+
+import api  # noqa: E402
+import wire  # noqa: E402
+from bench_suite import synthetic_samples  # noqa: E402
+
+
+def timed(fn, rounds):
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def decode_json(body: bytes):
+    samples = api.split_batch(json.loads(body))
+    return api.prepare_batch(samples)[0]
+
+
+def decode_binary(body: bytes):
+    M = wire.decode_matrix(body, api.schema.n_features)
+    valid = ((M >= api.schema.lower) & (M <= api.schema.upper)).all(axis=1)
+    return M[valid].astype(np.float64, copy=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    client = api.app.test_client()
+    api.store.get(api.MODEL_LOAD_TIMEOUT)
+
+    print(f"{'lot':>6}  {'format':<16} {'requête':>11} {'réponse':>11} {'décodage':>11} {'aller-retour':>13}")
+    for n in args.batch_sizes:
+        samples = synthetic_samples(n)
+        X = np.array([[s[name] for name in api.FEATURE_ORDER] for s in samples])
+        bodies = {
+            "json lignes": json.dumps({"samples": samples}).encode(),
+            "json colonnes": json.dumps({name: X[:, j].tolist() for j, name in enumerate(api.FEATURE_ORDER)}).encode(),
+            "binaire float64": wire.encode_matrix(X, "<f8"),
+            "binaire float32": wire.encode_matrix(X, "<f4"),
+        }
+        reference = decode_json(bodies["json lignes"])
+        assert np.array_equal(decode_binary(bodies["binaire float64"]), reference)
+
+        for name, body in bodies.items():
+            binary = name.startswith("binaire")
+            decode = decode_binary if binary else decode_json
+            headers = {"Content-Type": wire.MEDIA_TYPE if binary else "application/json"}
+            if binary:
+                headers["Accept"] = wire.MEDIA_TYPE
+
+            response = client.post("/predict/batch", data=body, headers=headers)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            decode_s = timed(lambda: decode(body), args.rounds)
+            round_trip_s = timed(lambda: client.post("/predict/batch", data=body, headers=headers).get_data(),
+                                 args.rounds)
+            print(f"{n:>6}  {name:<16} {len(body) / 1024:>8.1f} Ko {len(response.get_data()) / 1024:>8.1f} Ko "
+                  f"{decode_s * 1000:>8.2f} ms {round_trip_s * 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
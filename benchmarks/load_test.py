@@ -0,0 +1,133 @@
+"""Test de charge : serveur Flask (développement) vs serveur ASGI.
+
+Démarre chaque serveur dans un sous-processus sur un port local, puis envoie
+des requêtes ``POST /predict`` depuis ``--clients`` clients concurrents.
+Affiche le débit (QPS) et les latences p50 / p95 / p99.
+
+Usage :
+    python benchmarks/load_test.py --clients 16 --requests 200
+    python benchmarks/load_test.py --url http://localhost:7860   # serveur déjà lancé
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+
+SAMPLE = {
+    "fixed_acidity": 7.4,
+    "volatile_acidity": 0.7,
+    "citric_acid": 0.0,
+    "residual_sugar": 1.9,
+    "chlorides": 0.076,
+    "free_sulfur_dioxide": 11.0,
+    "total_sulfur_dioxide": 34.0,
+    "density": 0.9978,
+    "pH": 3.51,
+    "sulphates": 0.56,
+    "alcohol": 9.4,
+}
+
+SERVERS = {
+    "flask": lambda port: [
+        sys.executable, "-c",
+        f"import api; api.app.run(host='127.0.0.1', port={port}, threaded=True)",
+    ],
+    "asgi": lambda port: [
+        sys.executable, "-m", "uvicorn", "asgi:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+    ],
+}
+
+
+def wait_ready(url, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Serveur non prêt : {url}")
+
+
+def run_load(url, n_clients, n_requests):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def client():
+        session = requests.Session()
+        local = []
+        for _ in range(n_requests):
+            t0 = time.perf_counter()
+            try:
+                ok = session.post(f"{url}/predict", json=SAMPLE, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            local.append(time.perf_counter() - t0)
+            if not ok:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(n_clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    lat_ms = np.array(latencies) * 1000.0
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "qps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p95_ms": float(np.percentile(lat_ms, 95)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+    }
+
+
+def report(name, r):
+    print(f"{name:<8} {r['requests']:>6} req  {r['errors']:>4} err  {r['qps']:>8.1f} QPS  "
+          f"p50 {r['p50_ms']:7.2f} ms  p95 {r['p95_ms']:7.2f} ms  p99 {r['p99_ms']:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16, help="clients concurrents")
+    parser.add_argument("--requests", type=int, default=200, help="requêtes par client")
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument("--port", type=int, default=7871)
+    parser.add_argument("--url", help="cible un serveur déjà démarré au lieu d'en lancer un")
+    args = parser.parse_args()
+
+    if args.url:
+        report("url", run_load(args.url.rstrip("/"), args.clients, args.requests))
+        return
+
+    for name in args.servers:
+        proc = subprocess.Popen(
+            SERVERS[name](args.port), cwd=API_DIR,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        url = f"http://127.0.0.1:{args.port}"
+        try:
+            wait_ready(url)
+            report(name, run_load(url, args.clients, args.requests))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
+import os
+import sys
 import streamlit as st
-import requests
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
 
+# Service de modèle partagé avec l'app Streamlit (SN/stream/model_service.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "stream"))
+from api_client import refresh_health
+from model_service import backend_selector
+
 # CONFIGURATION DE LA PAGE
 st.set_page_config(
     page_title="Prédiction Qualité de Jus",
@@ -61,31 +67,22 @@ st.markdown('<p class="sub-header">Système de classification basé sur modèle
 if "history" not in st.session_state:
     st.session_state.history = []
 
-if "api_url" not in st.session_state:
-    st.session_state.api_url = "https://calypso-mb-api-j.hf.space"
-
 # SIDEBAR - CONFIGURATION
 with st.sidebar:
     st.header("⚙️ Configuration")
 
-    # URL de l'API
-    api_url = st.text_input(
-        "URL de l'API",
-        value=st.session_state.api_url,
-        help="Adresse du serveur Flask"
-    )
-    st.session_state.api_url = api_url
+    # Backend : API distante (par défaut) ou modèle local en mémoire
+    backend = backend_selector(default="http")
 
     # Test de connexion
     if st.button("🔍 Tester la connexion"):
-        try:
-            response = requests.get(f"{api_url}/health", timeout=3)
-            if response.status_code == 200:
-                st.success("✅ API connectée !")
-            else:
-                st.error("❌ API inaccessible")
-        except Exception:
-            st.error("❌ Impossible de se connecter à l'API")
+        # L'état de santé est mis en cache : le bouton force un nouvel appel
+        refresh_health()
+        health = backend.health()
+        if health["ok"]:
+            st.success("✅ API connectée !" if backend.name == "http" else "✅ Modèle local chargé !")
+        else:
+            st.error(f"❌ Backend inaccessible : {health['status']}")
 
 
     st.divider()
@@ -223,108 +220,87 @@ with col_btn2:
 # PRÉDICTION
 if predict_button:
     with st.spinner("🔄 Analyse en cours..."):
-        try:
-            input_data = {
-                "fixed_acidity": fixed_acidity,
-                "volatile_acidity": volatile_acidity,
-                "citric_acid": citric_acid,
-                "residual_sugar": residual_sugar,
-                "chlorides": chlorides,
-                "free_sulfur_dioxide": free_sulfur_dioxide,
-                "total_sulfur_dioxide": total_sulfur_dioxide,
-                "density": density,
-                "pH": pH,
-                "sulphates": sulphates,
-                "alcohol": alcohol,
+        input_data = {
+            "fixed_acidity": fixed_acidity,
+            "volatile_acidity": volatile_acidity,
+            "citric_acid": citric_acid,
+            "residual_sugar": residual_sugar,
+            "chlorides": chlorides,
+            "free_sulfur_dioxide": free_sulfur_dioxide,
+            "total_sulfur_dioxide": total_sulfur_dioxide,
+            "density": density,
+            "pH": pH,
+            "sulphates": sulphates,
+            "alcohol": alcohol,
+        }
+        result = backend.predict(input_data)
+
+    if result.get("success"):
+        pred_dict = result["prediction"]
+        label = pred_dict["label"]
+        confidence = result.get("confidence", None)
+
+        # Ajout à l'historique
+        st.session_state.history.append({
+            "timestamp": datetime.now(),
+            "prediction": label,
+            "confidence": confidence if confidence is not None else 0.0,
+        })
+
+        st.success("✅ Prédiction réussie !")
+
+        st.markdown("---")
+        col_res1, col_res2, col_res3 = st.columns([1, 2, 1])
+
+        with col_res2:
+            color_map = {
+                "Mauvais": "#ef4444",
+                "Moyen": "#eab308",
+                "Bon": "#22c55e",
+            }
+            color = color_map.get(label, "#666")
+
+            emoji_map = {
+                "Mauvais": "😞",
+                "Moyen": "😐",
+                "Bon": "😄",
             }
+            emoji = emoji_map.get(label, "🍊")
 
-            response = requests.post(
-                f"{st.session_state.api_url}/predict",
-                json=input_data,
-                timeout=10,
+            desc_map = {
+                "Mauvais": "Qualité jugée faible.",
+                "Moyen": "Qualité correcte.",
+                "Bon": "Qualité élevée.",
+            }
+            description = desc_map.get(label, "Résultat de la prédiction.")
+
+            conf_str = f"{confidence*100:.1f}%" if confidence is not None else "N/A"
+
+            st.markdown(
+                f"""
+                <div style='text-align: center; padding: 2rem;
+                         background: linear-gradient(135deg, {color}22 0%, {color}44 100%);
+                         border-radius: 15px; border: 2px solid {color};'>
+                    <div style='font-size: 5rem; margin-bottom: 1rem;'>
+                        {emoji}
+                    </div>
+                    <h2 style='color: {color}; margin: 0;'>
+                        {label}
+                    </h2>
+                    <p style='color: #666; margin-top: 0.5rem;'>
+                        {description}
+                    </p>
+                    <p style='font-size: 1.2rem; font-weight: bold; color: {color};'>
+                        Confiance: {conf_str}
+                    </p>
+                </div>
+                """,
+                unsafe_allow_html=True,
             )
 
-            if response.status_code == 200:
-                result = response.json()
-
-                if result.get("success"):
-                    pred_dict = result["prediction"]
-                    label = pred_dict["label"]
-                    confidence = result.get("confidence", None)
-
-                    # Ajout à l'historique
-                    st.session_state.history.append({
-                        "timestamp": datetime.now(),
-                        "prediction": label,
-                        "confidence": confidence if confidence is not None else 0.0,
-                    })
-
-                    st.success("✅ Prédiction réussie !")
-
-                    st.markdown("---")
-                    col_res1, col_res2, col_res3 = st.columns([1, 2, 1])
-
-                    with col_res2:
-                        color_map = {
-                            "Mauvais": "#ef4444",
-                            "Moyen": "#eab308",
-                            "Bon": "#22c55e",
-                        }
-                        color = color_map.get(label, "#666")
-
-                        emoji_map = {
-                            "Mauvais": "😞",
-                            "Moyen": "😐",
-                            "Bon": "😄",
-                        }
-                        emoji = emoji_map.get(label, "🍊")
-
-                        desc_map = {
-                            "Mauvais": "Qualité jugée faible.",
-                            "Moyen": "Qualité correcte.",
-                            "Bon": "Qualité élevée.",
-                        }
-                        description = desc_map.get(label, "Résultat de la prédiction.")
-
-                        conf_str = f"{confidence*100:.1f}%" if confidence is not None else "N/A"
-
-                        st.markdown(
-                            f"""
-                            <div style='text-align: center; padding: 2rem;
-                                     background: linear-gradient(135deg, {color}22 0%, {color}44 100%);
-                                     border-radius: 15px; border: 2px solid {color};'>
-                                <div style='font-size: 5rem; margin-bottom: 1rem;'>
-                                    {emoji}
-                                </div>
-                                <h2 style='color: {color}; margin: 0;'>
-                                    {label}
-                                </h2>
-                                <p style='color: #666; margin-top: 0.5rem;'>
-                                    {description}
-                                </p>
-                                <p style='font-size: 1.2rem; font-weight: bold; color: {color};'>
-                                    Confiance: {conf_str}
-                                </p>
-                            </div>
-                            """,
-                            unsafe_allow_html=True,
-                        )
-                    
-                else:
-                    st.error(f"❌ Erreur: {result.get('error', 'Erreur inconnue')}")
-            else:
-                st.error(f"❌ Erreur API: Code {response.status_code}")
-
-        except requests.exceptions.ConnectionError:
-            st.error("❌ Impossible de se connecter à l'API. Vérifiez que le serveur Flask est démarré.")
-        except requests.exceptions.Timeout:
-            st.error("⏱️ Délai d'attente dépassé. Le serveur met trop de temps à répondre.")
-        except Exception as e:
-            st.error(f"❌ Erreur inattendue: {str(e)}")
-
-
-
-    
+    else:
+        st.error(f"❌ Erreur: {result.get('error', 'Erreur inconnue')}")
+
 
 # FOOTER
 st.markdown("---")
@@ -0,0 +1,91 @@
+"""Client HTTP partagé pour l'API de prédiction (pages Streamlit, ``classi.py``).
+
+- une ``requests.Session`` par URL d'API et par processus
+  (``st.cache_resource``) : connexions keep-alive réutilisées d'un rerun à
+  l'autre, sans nouvelle poignée de main TLS à chaque appel ;
+- des réessais avec backoff exponentiel sur les erreurs de connexion et les
+  codes 502/503/504 (API Hugging Face en réveil, modèle en chargement) ;
+- un état de santé mis en cache ``HEALTH_TTL`` secondes (``st.cache_data``),
+  pour ne pas interroger ``/health`` à chaque interaction ;
+- ``post_many`` : plusieurs appels envoyés en parallèle sur le pool de
+  connexions, résultats dans l'ordre des requêtes.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_TIMEOUT = float(os.environ.get("JUICE_API_TIMEOUT", "30"))
+# Requêtes parallèles (et taille du pool de connexions) par URL d'API
+API_WORKERS = int(os.environ.get("JUICE_API_WORKERS", "8"))
+API_RETRIES = int(os.environ.get("JUICE_API_RETRIES", "3"))
+API_BACKOFF = float(os.environ.get("JUICE_API_BACKOFF", "0.5"))
+HEALTH_TTL = float(os.environ.get("JUICE_HEALTH_TTL", "30"))
+
+
+@st.cache_resource(show_spinner=False)
+def get_session(url: str) -> requests.Session:
+    """Session poolée pour ``url`` (partagée entre reruns, pages et sessions)."""
+    retry = Retry(
+        total=API_RETRIES,
+        backoff_factor=API_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        # Les prédictions sont idempotentes : POST peut être réessayé
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=API_WORKERS, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_resource(show_spinner=False)
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="api-client")
+
+
+def request(url: str, method: str, path: str, timeout=API_TIMEOUT, session=None, **kwargs) -> dict:
+    """Appel de l'API ; retourne le corps JSON ou ``{"success": False, "error": ...}``.
+
+    ``session`` : session déjà résolue (obligatoire hors du thread du script
+    Streamlit, où ``st.cache_resource`` n'a pas de contexte d'exécution).
+    """
+    url = url.rstrip("/")
+    session = session or get_session(url)
+    try:
+        response = session.request(method, f"{url}{path}", timeout=timeout, **kwargs)
+    except requests.exceptions.RequestException as e:
+        return {"success": False, "error": f"Impossible de joindre l'API : {e}"}
+    try:
+        return response.json()
+    except ValueError:
+        return {"success": False, "error": f"Erreur HTTP : code {response.status_code}"}
+
+
+def post_many(url: str, path: str, payloads: list, timeout=API_TIMEOUT) -> list:
+    """Envoie les ``payloads`` en parallèle (``API_WORKERS`` au plus) ; résultats dans l'ordre."""
+    # Session et pool résolus dans le thread du script, puis passés aux workers
+    session = get_session(url.rstrip("/"))
+    if len(payloads) <= 1:
+        return [request(url, "POST", path, timeout, session, json=p) for p in payloads]
+    return list(get_executor().map(lambda p: request(url, "POST", path, timeout, session, json=p), payloads))
+
+
+@st.cache_data(ttl=HEALTH_TTL, show_spinner=False)
+def health(url: str) -> dict:
+    """État de ``/health`` (mis en cache ``HEALTH_TTL`` s) : ``{"ok", "status", "model"}``."""
+    result = request(url, "GET", "/health", timeout=min(API_TIMEOUT, 5))
+    if "error" in result and "status" not in result:
+        return {"ok": False, "status": result["error"], "model": None}
+    return {"ok": result.get("status") == "healthy", "status": result.get("status", "N/A"),
+            "model": result.get("model")}
+
+
+def refresh_health():
+    """Invalide le cache de santé (bouton « Tester la connexion »)."""
+    health.clear()
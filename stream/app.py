@@ -1,8 +1,8 @@
-import os
 import streamlit as st
-import joblib
 import warnings
 
+from model_service import load_model
+
 warnings.filterwarnings("ignore")
 
 st.set_page_config(
@@ -36,25 +36,17 @@ with st.sidebar:
         Cette application permet de :
         - Explorer les données
         - Entraîner et comparer des modèles
+        - Noter un fichier CSV complet
         - Faire des prédictions locales
         - Tester une API de prédiction déployée
         """
     )
 
-@st.cache_resource
-def load_model():
-    try:
-
-        stream_dir = os.path.dirname(__file__)
-        
-        model_path = os.path.join(stream_dir, "models", "juice_model.pkl")
-
-        model_data = joblib.load(model_path)
-        return model_data
-    except Exception:
-        return None
-
-model_data = load_model()
+# Modèle partagé avec les pages (SN/stream/model_service.py)
+try:
+    model_data = load_model().model_data
+except Exception:
+    model_data = None
 
 st.markdown(
     "<h1 class='main-title'>🍊 Application de Prédiction de Qualité de Jus</h1>",
@@ -72,7 +64,8 @@ st.write(
     Navigue dans le menu latéral pour accéder aux différentes sections :
     1. **Exploration** : aperçu du jeu de données et statistiques descriptives.
     2. **Modèles** : description du modèle final et de ses hyperparamètres.
-    3. **Prédiction locale** : saisie de caractéristiques et prédiction via le modèle en mémoire.
-    4. **Test API** : appel de l'API déployée sur Hugging Face.
+    3. **Scoring CSV** : notation en lot d'un export du laboratoire, téléchargeable.
+    4. **Prédiction locale** : saisie de caractéristiques et prédiction via le modèle en mémoire.
+    5. **Test API** : appel de l'API déployée sur Hugging Face.
     """
 )
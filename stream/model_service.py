@@ -0,0 +1,296 @@
+"""Service de modèle partagé par toutes les pages Streamlit.
+
+Le pickle ``stream/models/juice_model.pkl`` est chargé une seule fois par
+processus (``st.cache_resource``) via le ``ModelStore`` de l'API : mêmes
+bornes IQR, même scaler replié dans le prédicteur compilé, même sidecar mmap
+et même rechargement quand le pickle est redéployé. Les prédictions
+locales ont donc exactement la forme et les valeurs de ``POST /predict``.
+
+Chaque page choisit son backend :
+- ``LocalBackend`` : inférence en mémoire (échantillon unique, lot, matrice) ;
+- ``HttpBackend`` : appel de l'API déployée (``JUICE_API_URL``) via le
+  client poolé d'``api_client``.
+
+``score_frame`` note un bloc de CSV (schéma ``juice.csv``) en une passe
+vectorisée : une seule inférence par bloc en local, des lots colonnaires
+``POST /predict/batch`` en HTTP.
+
+Usage dans une page :
+    from model_service import backend_selector
+    backend = backend_selector(default="local")
+    result = backend.predict({"fixed_acidity": 7.4, ...})
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import api_client
+from api_client import API_TIMEOUT
+
+STREAM_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(STREAM_DIR), "api"))
+from compiled_model import compile_model  # noqa: E402
+from model_store import ModelNotReady, ModelStore  # noqa: E402
+from schema import LABEL_MAP, FeatureSchema, ValidationError  # noqa: E402
+
+MODEL_PATH = os.environ.get("STREAM_MODEL_PATH", os.path.join(STREAM_DIR, "models", "juice_model.pkl"))
+MODEL_LOAD_TIMEOUT = float(os.environ.get("MODEL_LOAD_TIMEOUT", "60"))
+# Mêmes paramètres de compilation que l'API (sidecar mmap partagé, voir api/api.py)
+USE_TREE_ENGINE = os.environ.get("USE_TREE_ENGINE", "1") == "1"
+TREE_ENGINE_MAX_ROWS = int(os.environ.get("TREE_ENGINE_MAX_ROWS", "16"))
+
+# API distante par défaut (Hugging Face)
+API_URL = os.environ.get("JUICE_API_URL", "https://calypso-mb-api-j.hf.space")
+# Taille des lots envoyés à /predict/batch (MAX_BATCH_SIZE de l'API)
+API_BATCH_SIZE = int(os.environ.get("JUICE_API_BATCH_SIZE", "1000"))
+
+# Ordre des features, comme dans api/api.py (LABEL_MAP : api/schema.py)
+FEATURE_ORDER = [
+    "fixed_acidity",
+    "volatile_acidity",
+    "citric_acid",
+    "residual_sugar",
+    "chlorides",
+    "free_sulfur_dioxide",
+    "total_sulfur_dioxide",
+    "density",
+    "pH",
+    "sulphates",
+    "alcohol",
+]
+
+BACKENDS = {
+    "local": "🖥️ Modèle local (en mémoire)",
+    "http": "🛰️ API HTTP",
+}
+
+schema = FeatureSchema(FEATURE_ORDER)
+
+
+@st.cache_resource
+def get_store(path=MODEL_PATH) -> ModelStore:
+    """``ModelStore`` unique du processus (partagé entre pages et sessions)."""
+    return ModelStore(
+        path,
+        lambda model_data: compile_model(model_data, USE_TREE_ENGINE, TREE_ENGINE_MAX_ROWS),
+        default_classes=sorted(LABEL_MAP),
+        compile_key=(USE_TREE_ENGINE, TREE_ENGINE_MAX_ROWS),
+    )
+
+
+def load_model():
+    """Version courante du modèle (``LoadedModel``), rechargée si le pickle a changé.
+
+    Lève ``ModelNotReady`` si le pickle est absent ou illisible.
+    """
+    store = get_store()
+    if not os.path.exists(store.path):
+        raise ModelNotReady(f"Modèle introuvable : {store.path}")
+    if store.ready and store.changed_on_disk():
+        store.reload()
+    return store.get(MODEL_LOAD_TIMEOUT)
+
+
+def format_prediction(y, proba=None, classes=None) -> dict:
+    """Même format que ``format_prediction`` de l'API."""
+    y_int = int(y)
+    probabilities = None
+    confidence = None
+    if proba is not None:
+        probabilities = {LABEL_MAP.get(int(c), str(c)): float(p) for c, p in zip(classes, proba)}
+        confidence = float(np.max(proba))
+
+    return {
+        "prediction": {"label": LABEL_MAP.get(y_int, str(y_int)), "raw": y_int},
+        "confidence": confidence,
+        "probabilities": probabilities,
+    }
+
+
+class LocalBackend:
+    """Inférence en mémoire avec le modèle partagé."""
+
+    name = "local"
+
+    def health(self) -> dict:
+        try:
+            current = load_model()
+        except Exception as e:
+            return {"ok": False, "status": str(e)}
+        return {"ok": True, "status": "healthy", "model": current.info()}
+
+    def predict_matrix(self, X: np.ndarray, current=None):
+        """Prédit une matrice brute (colonnes dans ``FEATURE_ORDER``).
+
+        Écrêtage IQR puis une seule passe modèle, comme ``run_model`` de
+        l'API. Retourne ``(y, proba, current)`` ; ``proba`` vaut ``None``
+        si le modèle n'expose pas ``predict_proba``.
+        """
+        current = current or load_model()
+        X = current.clip(np.array(X, dtype=np.float64))
+        predictor = current.predictor
+        if hasattr(predictor, "predict_proba"):
+            proba = predictor.predict_proba(X)
+            return current.classes[np.argmax(proba, axis=1)], proba, current
+        return predictor.predict(X), None, current
+
+    def score(self, X: np.ndarray):
+        """``(y, proba, classes)`` pour une matrice déjà validée."""
+        y, proba, current = self.predict_matrix(X)
+        return y, proba, current.classes
+
+    def predict(self, sample: dict) -> dict:
+        try:
+            X = schema.parse(sample).reshape(1, -1)
+            y, proba, current = self.predict_matrix(X)
+        except ValidationError as e:
+            return {"success": False, "error": str(e), "errors": e.errors}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        result = format_prediction(y[0], None if proba is None else proba[0], current.classes)
+        return {"success": True, **result, "model_version": current.version_info()}
+
+    def predict_batch(self, samples: list) -> dict:
+        X = np.empty((len(samples), schema.n_features), dtype=np.float64)
+        valid_idx, results = [], [None] * len(samples)
+        for i, sample in enumerate(samples):
+            try:
+                schema.parse(sample, X[len(valid_idx)])
+                valid_idx.append(i)
+            except ValidationError as e:
+                results[i] = {"index": i, "success": False, "error": str(e), "errors": e.errors}
+
+        try:
+            current = load_model()
+            if valid_idx:
+                y, proba, _ = self.predict_matrix(X[:len(valid_idx)], current)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+        for k, i in enumerate(valid_idx):
+            results[i] = {"index": i, "success": True,
+                          **format_prediction(y[k], None if proba is None else proba[k], current.classes)}
+        return {
+            "success": True,
+            "count": len(samples),
+            "n_errors": len(samples) - len(valid_idx),
+            "results": results,
+            "model_version": current.version_info(),
+        }
+
+
+class HttpBackend:
+    """Appel de l'API de prédiction (mêmes réponses que ``LocalBackend``).
+
+    Les appels passent par la session poolée d'``api_client`` (keep-alive,
+    réessais) ; l'état de santé est mis en cache quelques secondes.
+    """
+
+    name = "http"
+
+    def __init__(self, url=API_URL, timeout=API_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def health(self) -> dict:
+        return api_client.health(self.url)
+
+    def predict(self, sample: dict) -> dict:
+        return api_client.request(self.url, "POST", "/predict", self.timeout, json=sample)
+
+    def predict_batch(self, samples) -> dict:
+        return api_client.request(self.url, "POST", "/predict/batch", self.timeout, json=samples)
+
+    def score(self, X: np.ndarray):
+        """``(y, proba, classes)`` via des lots colonnaires de ``API_BATCH_SIZE`` lignes, en parallèle."""
+        classes = np.array(sorted(LABEL_MAP))
+        y = np.empty(len(X), dtype=np.int64)
+        proba = np.full((len(X), len(classes)), np.nan)
+        blocks = [X[start:start + API_BATCH_SIZE] for start in range(0, len(X), API_BATCH_SIZE)]
+        payloads = [{name: block[:, j].tolist() for j, name in enumerate(FEATURE_ORDER)} for block in blocks]
+        k = 0
+        for result in api_client.post_many(self.url, "/predict/batch", payloads, self.timeout):
+            if not result.get("success"):
+                raise RuntimeError(result.get("error", "Erreur inconnue"))
+            for row in result["results"]:
+                if not row["success"]:
+                    raise RuntimeError(row["error"])
+                y[k] = row["prediction"]["raw"]
+                if row.get("probabilities"):
+                    proba[k] = [row["probabilities"].get(LABEL_MAP[c], np.nan) for c in classes]
+                k += 1
+        return y, None if np.isnan(proba).all() else proba, classes
+
+
+def frame_matrix(df: pd.DataFrame):
+    """Matrice ``FEATURE_ORDER`` d'un bloc de CSV et masque des lignes valides.
+
+    Les noms du CSV (``"fixed acidity"``) et snake_case sont acceptés ; une
+    ligne est invalide si une valeur manque, n'est pas numérique ou sort des
+    bornes physiques du schéma de l'API. Lève ``ValueError`` si des
+    colonnes manquent.
+    """
+    columns = {"_".join(str(c).split()): c for c in df.columns}
+    missing = [name for name in FEATURE_ORDER if name not in columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)}")
+
+    X = np.empty((len(df), schema.n_features), dtype=np.float64)
+    for j, name in enumerate(FEATURE_ORDER):
+        X[:, j] = pd.to_numeric(df[columns[name]], errors="coerce")
+    valid = ((X >= schema.lower) & (X <= schema.upper)).all(axis=1)
+    return X, valid
+
+
+def score_frame(backend, df: pd.DataFrame) -> pd.DataFrame:
+    """``df`` complété des colonnes de prédiction (une seule passe modèle).
+
+    Colonnes ajoutées : ``predicted_category`` (classe, vide si la ligne est
+    invalide), ``predicted_label``, ``confidence``, ``proba_<label>``.
+    """
+    X, valid = frame_matrix(df)
+    out = df.copy()
+    category = np.full(len(df), -1, dtype=np.int64)
+    if valid.any():
+        y, proba, classes = backend.score(X[valid])
+        category[valid] = y
+        if proba is not None:
+            confidence = np.full(len(df), np.nan)
+            confidence[valid] = proba.max(axis=1)
+            for j, c in enumerate(classes):
+                column = np.full(len(df), np.nan)
+                column[valid] = proba[:, j]
+                out[f"proba_{LABEL_MAP.get(int(c), c)}"] = column
+            out.insert(len(df.columns), "confidence", confidence)
+
+    out.insert(len(df.columns), "predicted_category", pd.array(np.where(valid, category, None), dtype="Int64"))
+    out.insert(len(df.columns) + 1, "predicted_label",
+               pd.Series(category, index=df.index).map(LABEL_MAP).where(valid, "invalide"))
+    return out
+
+
+def backend_selector(default="local", key=None):
+    """Choix du backend dans la barre latérale ; retourne le backend sélectionné.
+
+    Le choix (par page, ``key``) et l'URL de l'API (commune) sont conservés
+    dans ``st.session_state`` d'une page à l'autre.
+    """
+    key = key or f"backend_{default}"
+    if key not in st.session_state:
+        st.session_state[key] = default
+    if "api_url" not in st.session_state:
+        st.session_state.api_url = API_URL
+
+    with st.sidebar:
+        choice = st.radio("Backend de prédiction", list(BACKENDS), format_func=BACKENDS.get,
+                          index=list(BACKENDS).index(st.session_state[key]))
+        st.session_state[key] = choice
+        if choice == "http":
+            st.session_state.api_url = st.text_input("URL de l'API", value=st.session_state.api_url)
+
+    if choice == "http":
+        return HttpBackend(st.session_state.api_url)
+    return LocalBackend()
@@ -1,45 +1,56 @@
 import os
+import sys
 import streamlit as st
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+import plotly.express as px
+
+# Statistiques précalculées par le prétraitement (SN/training/dataset_stats.py)
+project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(project_dir, "training"))
+from dataset_stats import ensure_stats
 
 st.set_page_config(page_title="1 – Exploration des Données", page_icon="📊")
 
-@st.cache_data
-def load_data():
-    pages_dir = os.path.dirname(__file__)             
-    project_dir = os.path.dirname(os.path.dirname(pages_dir)) 
-    csv_path = os.path.join(project_dir, "juice_data.csv")
+csv_path = os.path.join(project_dir, "juice_data.csv")
+
+
+@st.cache_resource
+def load_stats(signature):
+    # Artefact juice_data.csv.stats : relu s'il correspond au CSV, complété si des
+    # lignes ont été ajoutées, recalculé sinon. La signature invalide le cache.
+    return ensure_stats(csv_path)["views"]
 
-    return pd.read_csv(csv_path)
 
 st.title("📊 Exploration des Données de Jus")
 
-df = load_data()
+st_csv = os.stat(csv_path)
+stats = load_stats((st_csv.st_size, st_csv.st_mtime_ns))
+
 st.subheader("Aperçu du jeu de données")
-st.dataframe(df.head())
+st.dataframe(stats["head"])
 
 st.subheader("Dimensions et informations")
 col1, col2 = st.columns(2)
 with col1:
-    st.write(f"Nombre de lignes : **{df.shape[0]}**")
-    st.write(f"Nombre de colonnes : **{df.shape[1]}**")
+    st.write(f"Nombre de lignes : **{stats['n_rows']}**")
+    st.write(f"Nombre de colonnes : **{len(stats['columns'])}**")
 with col2:
     st.write("Colonnes :")
-    st.write(list(df.columns))
+    st.write(stats["columns"])
 
 st.subheader("Statistiques descriptives")
-st.dataframe(df.describe())
+st.dataframe(stats["describe"])
 
 st.subheader("Distribution de la cible (quality_category)")
-fig, ax = plt.subplots()
-sns.countplot(data=df, x="quality_category", ax=ax)
-ax.set_xlabel("Catégorie de qualité")
-ax.set_ylabel("Nombre d'échantillons")
-st.pyplot(fig)
+counts = stats["class_counts"].rename_axis("Catégorie de qualité").rename("Nombre d'échantillons")
+st.bar_chart(counts)
+
+st.subheader("Distribution d'une variable")
+feature = st.selectbox("Variable", stats["columns"])
+hist_counts, edges = stats["histograms"][feature]
+st.bar_chart(pd.Series(hist_counts, index=[f"{(a + b) / 2:.4g}" for a, b in zip(edges[:-1], edges[1:])],
+                       name="Nombre d'échantillons"))
 
 st.subheader("Matrice de corrélation")
-fig, ax = plt.subplots(figsize=(10, 6))
-sns.heatmap(df.corr(), cmap="coolwarm", center=0, ax=ax)
-st.pyplot(fig)
+fig = px.imshow(stats["corr"], color_continuous_scale="RdBu_r", zmin=-1, zmax=1, aspect="auto")
+st.plotly_chart(fig)
@@ -1,7 +1,11 @@
 import os
+import sys
 import streamlit as st
 import pandas as pd
-import joblib
+
+# Modèle partagé avec les autres pages (SN/stream/model_service.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_service import load_model
 
 st.set_page_config(page_title="2 – Modèles", page_icon="🧠")
 
@@ -15,24 +19,11 @@ st.write(
     """
 )
 
-@st.cache_resource
-def load_model_data():
-    try:
-        pages_dir = os.path.dirname(__file__)              
-        stream_dir = os.path.dirname(pages_dir)            
-
-
-        model_path = os.path.join(stream_dir, "models", "juice_model.pkl")
-
-        
-
-        model_data = joblib.load(model_path)
-        return model_data
-    except Exception as e:
-        st.error(f"Modèle non trouvé ou erreur de chargement : {e}")
-        return None
-
-model_data = load_model_data()
+try:
+    model_data = load_model().model_data
+except Exception as e:
+    st.error(f"Modèle non trouvé ou erreur de chargement : {e}")
+    model_data = None
 
 if model_data is None:
     st.error("Le fichier `stream/models/juice_model.pkl` est introuvable. Entraîne d'abord le modèle.")
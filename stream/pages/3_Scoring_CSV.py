@@ -0,0 +1,157 @@
+import os
+import sys
+import tempfile
+import time
+import uuid
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+# Service de modèle partagé avec l'API et les autres pages (SN/stream/model_service.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_service import LABEL_MAP, backend_selector, score_frame
+
+st.set_page_config(page_title="3 – Scoring de fichiers", page_icon="📦")
+
+st.title("📦 Scoring en Lot d'un Export CSV")
+
+# Local : une inférence vectorisée par bloc ; HTTP : lots colonnaires /predict/batch
+backend = backend_selector(default="local")
+
+# Lignes lues par bloc : la mémoire reste bornée quelle que soit la taille du fichier
+CHUNK_SIZE = int(os.environ.get("SCORING_CHUNK_SIZE", "20000"))
+SCORING_DIR = os.path.join(tempfile.gettempdir(), "juice_scoring")
+# Fichiers notés des sessions abandonnées : supprimés après ce délai (secondes)
+SCORING_TTL = float(os.environ.get("SCORING_TTL", str(24 * 3600)))
+
+st.write(
+    """
+    Charge un export du laboratoire au format `juice.csv` (colonnes `fixed acidity`, …, `alcohol` ;
+    les colonnes supplémentaires sont conservées). Le fichier est lu par blocs, chaque bloc est noté
+    en une passe et écrit directement dans le fichier de sortie.
+    """
+)
+
+uploaded = st.file_uploader("Fichier CSV", type="csv")
+
+
+def purge_scored_files(keep=None):
+    """Supprime les fichiers de ``SCORING_DIR`` plus vieux que ``SCORING_TTL``.
+
+    ``keep`` (fichier de la session courante) est conservé et rajeuni : une
+    session encore ouverte ne perd pas son fichier.
+    """
+    if keep is not None and os.path.exists(keep):
+        os.utime(keep)
+    limit = time.time() - SCORING_TTL
+    try:
+        entries = list(os.scandir(SCORING_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.path == keep or not entry.is_file():
+            continue
+        try:
+            if entry.stat().st_mtime < limit:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # supprimé entre-temps par une autre session
+
+
+def read_scored(path) -> bytes:
+    """Contenu du fichier noté (lu au clic, fichier refermé aussitôt)."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def score_upload(uploaded, backend):
+    """Note le fichier bloc par bloc vers un CSV temporaire ; retourne un résumé.
+
+    Seuls le chemin du fichier noté et les compteurs sont conservés : les
+    résultats ne restent ni en mémoire ni dans ``st.session_state``.
+    """
+    os.makedirs(SCORING_DIR, exist_ok=True)
+    path = os.path.join(SCORING_DIR, f"{uuid.uuid4().hex}.csv")
+    counts = np.zeros(len(LABEL_MAP), dtype=np.int64)
+    n_rows = n_invalid = 0
+
+    progress = st.progress(0.0, text="Scoring en cours…")
+    start = time.perf_counter()
+    uploaded.seek(0)
+    try:
+        for i, chunk in enumerate(pd.read_csv(uploaded, chunksize=CHUNK_SIZE)):
+            scored = score_frame(backend, chunk)
+            scored.to_csv(path, mode="a", header=i == 0, index=False)
+
+            category = scored["predicted_category"]
+            counts += np.bincount(category.dropna().to_numpy(np.int64), minlength=len(LABEL_MAP))[:len(LABEL_MAP)]
+            n_invalid += int(category.isna().sum())
+            n_rows += len(chunk)
+            progress.progress(min(uploaded.tell() / max(uploaded.size, 1), 1.0),
+                              text=f"{n_rows:,} lignes notées".replace(",", " "))
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    finally:
+        progress.empty()
+
+    return {
+        "file_id": uploaded.file_id,
+        "name": uploaded.name,
+        "path": path,
+        "backend": backend.name,
+        "n_rows": n_rows,
+        "n_invalid": n_invalid,
+        "counts": counts.tolist(),
+        "elapsed_s": time.perf_counter() - start,
+    }
+
+
+summary = st.session_state.get("bulk_scoring")
+purge_scored_files(keep=summary["path"] if summary else None)
+if uploaded is None:
+    st.info("Aucun fichier chargé.")
+    st.stop()
+
+if st.button("🚀 Lancer le scoring"):
+    # Un seul fichier noté par session : le précédent est supprimé
+    if summary is not None and os.path.exists(summary["path"]):
+        os.remove(summary["path"])
+    st.session_state.bulk_scoring = summary = None
+    try:
+        summary = score_upload(uploaded, backend)
+    except Exception as e:
+        st.error(f"❌ Erreur de scoring : {e}")
+        st.stop()
+    st.session_state.bulk_scoring = summary
+
+if summary is None or summary["file_id"] != uploaded.file_id or not os.path.exists(summary["path"]):
+    st.stop()
+
+rate = f"{summary['n_rows'] / max(summary['elapsed_s'], 1e-9):,.0f}".replace(",", " ")
+st.success(f"✅ {summary['n_rows']} lignes notées en {summary['elapsed_s']:.2f} s "
+           f"({rate} lignes/s, backend {summary['backend']}).")
+
+col1, col2 = st.columns(2)
+with col1:
+    st.metric("Lignes notées", summary["n_rows"] - summary["n_invalid"])
+with col2:
+    st.metric("Lignes invalides", summary["n_invalid"],
+              help="Valeur manquante, non numérique ou hors des bornes physiques de l'API")
+
+st.subheader("Distribution des classes prédites")
+distribution = pd.Series(summary["counts"], index=[LABEL_MAP[c] for c in sorted(LABEL_MAP)],
+                         name="Nombre d'échantillons").rename_axis("Qualité prédite")
+st.bar_chart(distribution)
+
+st.dataframe(pd.read_csv(summary["path"], nrows=20))
+
+# Lecture différée : le fichier n'est chargé qu'au clic, sans relancer la page
+st.download_button(
+    "💾 Télécharger le fichier noté",
+    data=lambda: read_scored(summary["path"]),
+    file_name=f"{os.path.splitext(summary['name'])[0]}_scored.csv",
+    mime="text/csv",
+    on_click="ignore",
+)
@@ -1,35 +1,19 @@
 import os
+import sys
 import streamlit as st
-import joblib
-import numpy as np
 from datetime import datetime
 import pandas as pd
 
+# Service de modèle partagé avec l'API et les autres pages (SN/stream/model_service.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_service import backend_selector
+
 st.set_page_config(page_title="4 – Prédiction locale", page_icon="🎯")
 
 st.title("🎯 Prédiction Locale de Qualité de Jus")
 
-@st.cache_resource
-def load_model_data():
-    # Dossier courant du fichier : SN/stream/pages
-    pages_dir = os.path.dirname(__file__)
-    # Dossier stream : parent de pages
-    stream_dir = os.path.dirname(pages_dir)
-
-    # Modèle situé dans SN/stream/models/juice_model.pkl
-    model_path = os.path.join(stream_dir, "models", "juice_model.pkl")
-
-    model_data = joblib.load(model_path)
-    return model_data
-
-try:
-    model_data = load_model_data()
-except Exception as e:
-    st.error(f"Erreur de chargement du modèle : {e}")
-    st.stop()
-
-model = model_data["model"]
-feature_names = model_data["feature_names"]
+# Local : écrêtage IQR + scaler replié, exactement comme l'API ; HTTP : l'API elle-même
+backend = backend_selector(default="local")
 
 st.write("Renseigne les caractéristiques du jus pour obtenir une prédiction à partir du modèle local.")
 
@@ -68,35 +52,36 @@ with col3:
 if "history" not in st.session_state:
     st.session_state.history = []
 
-if st.button("🔮 Prédire (modèle local)"):
-    X = np.array(
-        [
-            fixed_acidity,
-            volatile_acidity,
-            citric_acid,
-            residual_sugar,
-            chlorides,
-            free_sulfur_dioxide,
-            total_sulfur_dioxide,
-            density,
-            pH,
-            sulphates,
-            alcohol,
-        ]
-    ).reshape(1, -1)
-
-    y_pred = model.predict(X)[0]
-    label_map = {0: "Mauvais", 1: "Moyen", 2: "Bon"}
-    label = label_map.get(int(y_pred), str(y_pred))
-
-    st.success(f"Qualité prédite : **{label}** (classe {int(y_pred)})")
-
-    st.session_state.history.append(
-        {
-            "timestamp": datetime.now(),
-            "prediction": label,
-        }
-    )
+if st.button("🔮 Prédire"):
+    sample = {
+        "fixed_acidity": fixed_acidity,
+        "volatile_acidity": volatile_acidity,
+        "citric_acid": citric_acid,
+        "residual_sugar": residual_sugar,
+        "chlorides": chlorides,
+        "free_sulfur_dioxide": free_sulfur_dioxide,
+        "total_sulfur_dioxide": total_sulfur_dioxide,
+        "density": density,
+        "pH": pH,
+        "sulphates": sulphates,
+        "alcohol": alcohol,
+    }
+    result = backend.predict(sample)
+
+    if result.get("success"):
+        label, raw = result["prediction"]["label"], result["prediction"]["raw"]
+        confidence = result.get("confidence")
+        conf_str = f" – confiance {confidence:.1%}" if confidence is not None else ""
+        st.success(f"Qualité prédite : **{label}** (classe {raw}){conf_str}")
+
+        st.session_state.history.append(
+            {
+                "timestamp": datetime.now(),
+                "prediction": label,
+            }
+        )
+    else:
+        st.error(f"Erreur de prédiction : {result.get('error', 'Erreur inconnue')}")
 
 if st.session_state.history:
     st.markdown("---")
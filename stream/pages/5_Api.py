@@ -1,25 +1,31 @@
+import os
+import sys
 import streamlit as st
-import requests
+
+# Backends partagés avec les autres pages (SN/stream/model_service.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api_client import HEALTH_TTL, refresh_health
+from model_service import backend_selector
 
 st.set_page_config(page_title="5 – Test de l'API", page_icon="🛰️")
 
 st.title("🛰️ Test de l'API de Prédiction (Hugging Face)")
 
-API_URL = "https://calypso-mb-api-j.hf.space"
+backend = backend_selector(default="http")
 
 st.sidebar.header("🔗 Informations API")
-st.sidebar.write(f"**URL :** {API_URL}")
-
-try:
-    health_response = requests.get(f"{API_URL}/health", timeout=5)
-    if health_response.status_code == 200:
-        health_data = health_response.json()
-        st.sidebar.success("✅ API connectée")
-        st.sidebar.write(f"Statut: {health_data.get('status', 'N/A')}")
-    else:
-        st.sidebar.warning(f"⚠️ Statut: {health_response.status_code}")
-except Exception as e:
-    st.sidebar.error(f"❌ Erreur connexion: {e}")
+if backend.name == "http":
+    st.sidebar.write(f"**URL :** {backend.url}")
+
+# /health est mis en cache HEALTH_TTL s : pas d'appel réseau à chaque interaction
+if st.sidebar.button("🔄 Actualiser l'état", help=f"État mis en cache {HEALTH_TTL:g} s"):
+    refresh_health()
+health = backend.health()
+if health["ok"]:
+    st.sidebar.success("✅ API connectée" if backend.name == "http" else "✅ Modèle local chargé")
+    st.sidebar.write(f"Statut: {health['status']}")
+else:
+    st.sidebar.error(f"❌ Erreur connexion: {health['status']}")
 
 FEATURES = {
     "fixed_acidity": "Acidité fixe (g/L)",
@@ -76,46 +82,32 @@ with st.form("api_form"):
 
 if submit:
     with st.spinner("🔮 Interrogation de l'API..."):
-        try:
-            payload = {k: float(v) for k, v in inputs.items()}
-
-            response = requests.post(
-                f"{API_URL}/predict",
-                json=payload,
-                timeout=30,
-                headers={"Content-Type": "application/json"},
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("success"):
-                    pred = result["prediction"]
-                    raw = pred.get("raw")
-                    label = pred.get("label")
-                    confidence = result.get("confidence")
-
-                    quality_info = {
-                        0: {"emoji": "😞", "text": "Mauvaise qualité", "color": "red"},
-                        1: {"emoji": "😐", "text": "Qualité moyenne", "color": "orange"},
-                        2: {"emoji": "😊", "text": "Bonne qualité", "color": "green"},
-                    }.get(int(raw) if raw is not None else -1, {"emoji": "❓", "text": label, "color": "gray"})
-
-                    st.success("✅ Prédiction réussie !")
-
-                    st.markdown(
-                        f"""
-                        <div style='border: 2px solid {quality_info['color']}; padding: 1rem; border-radius: 10px; text-align: center;'>
-                            <div style='font-size: 3rem;'>{quality_info['emoji']}</div>
-                            <h3 style='color: {quality_info['color']};'>{quality_info['text']}</h3>
-                            <p>Label API : <b>{label}</b> (classe {raw})</p>
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-                else:
-                    st.error(f"❌ Erreur retournée par l'API : {result.get('error', 'Inconnue')}")
-            else:
-                st.error(f"❌ Erreur HTTP : code {response.status_code}")
-
-        except Exception as e:
-            st.error(f"❌ Erreur lors de l'appel API : {e}")
+        payload = {k: float(v) for k, v in inputs.items()}
+        result = backend.predict(payload)
+
+    if result.get("success"):
+        pred = result["prediction"]
+        raw = pred.get("raw")
+        label = pred.get("label")
+        confidence = result.get("confidence")
+
+        quality_info = {
+            0: {"emoji": "😞", "text": "Mauvaise qualité", "color": "red"},
+            1: {"emoji": "😐", "text": "Qualité moyenne", "color": "orange"},
+            2: {"emoji": "😊", "text": "Bonne qualité", "color": "green"},
+        }.get(int(raw) if raw is not None else -1, {"emoji": "❓", "text": label, "color": "gray"})
+
+        st.success("✅ Prédiction réussie !")
+
+        st.markdown(
+            f"""
+            <div style='border: 2px solid {quality_info['color']}; padding: 1rem; border-radius: 10px; text-align: center;'>
+                <div style='font-size: 3rem;'>{quality_info['emoji']}</div>
+                <h3 style='color: {quality_info['color']};'>{quality_info['text']}</h3>
+                <p>Label API : <b>{label}</b> (classe {raw})</p>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+    else:
+        st.error(f"❌ Erreur retournée par l'API : {result.get('error', 'Inconnue')}")
@@ -0,0 +1,191 @@
+"""Jeux de données au format colonnaire binaire (une colonne NumPy par fichier, en mmap).
+
+Les CSV (``juice.csv``, ``juice_data.csv``) ne sont analysés qu'une fois :
+``convert`` les réécrit, bloc par bloc, dans un dossier ``<csv>.cols/``
+contenant un fichier binaire brut par colonne et un ``meta.json`` (noms,
+types, nombre de lignes, signature du CSV source). ``load_dataset`` relit
+ces colonnes avec ``np.memmap`` : pas d'analyse de texte, pages partagées
+entre processus (sessions Streamlit, workers d'entraînement) via le cache
+de l'OS. Le cache est reconstruit automatiquement si le CSV change.
+
+Les noms de colonnes sont normalisés en snake_case, comme ``FEATURE_ORDER``
+de l'API (``"fixed acidity"`` -> ``"fixed_acidity"``).
+
+Usage :
+    python training/dataset.py juice.csv juice_data.csv   # conversion explicite
+"""
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CACHE_SUFFIX = ".cols"
+META_FILE = "meta.json"
+
+# Ordre des features attendu par l'API
+FEATURE_ORDER = [
+    "fixed_acidity",
+    "volatile_acidity",
+    "citric_acid",
+    "residual_sugar",
+    "chlorides",
+    "free_sulfur_dioxide",
+    "total_sulfur_dioxide",
+    "density",
+    "pH",
+    "sulphates",
+    "alcohol",
+]
+TARGET = "quality"
+CATEGORY = "quality_category"
+DTYPES = {**{col: "float64" for col in FEATURE_ORDER}, TARGET: "int64", CATEGORY: "int64"}
+
+
+def snake_case(name: str) -> str:
+    """Nom de colonne du CSV -> nom de l'API (``"free sulfur dioxide"`` -> ``"free_sulfur_dioxide"``)."""
+    return "_".join(name.strip().split())
+
+
+def cache_path(csv_path) -> str:
+    return os.fspath(csv_path) + CACHE_SUFFIX
+
+
+def _signature(csv_path):
+    st = os.stat(csv_path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(csv_path) -> bool:
+    meta = _read_meta(cache_path(csv_path))
+    return meta is not None and meta.get("source_signature") == _signature(csv_path)
+
+
+def convert(csv_path, chunksize=100000) -> str:
+    """Convertit ``csv_path`` en colonnes binaires ; retourne le dossier du cache.
+
+    L'écriture se fait dans un dossier temporaire renommé à la fin, pour
+    qu'un lecteur concurrent ne voie jamais un cache partiel. Un ancien cache
+    est d'abord mis de côté (renommage) puis supprimé une fois le nouveau en
+    place : il ne manque que le temps de deux renommages, et un arrêt entre
+    les deux laisse au pire un cache absent, reconstruit au prochain accès.
+    """
+    target = cache_path(csv_path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    os.makedirs(tmp, exist_ok=True)
+    signature = _signature(csv_path)
+
+    columns, dtypes, files, n_rows = None, {}, {}, 0
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            chunk.columns = [snake_case(c) for c in chunk.columns]
+            if columns is None:
+                columns = list(chunk.columns)
+                for col in columns:
+                    dtypes[col] = DTYPES.get(col, str(chunk[col].dtype))
+                    files[col] = open(os.path.join(tmp, f"{col}.bin"), "wb")
+            for col in columns:
+                np.ascontiguousarray(chunk[col].to_numpy(), dtype=dtypes[col]).tofile(files[col])
+            n_rows += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+
+    with open(os.path.join(tmp, META_FILE), "w") as f:
+        json.dump({
+            "columns": columns or [],
+            "dtypes": dtypes,
+            "n_rows": n_rows,
+            "source": os.path.basename(csv_path),
+            "source_signature": signature,
+        }, f, indent=2)
+
+    old = f"{target}.{os.getpid()}.old"
+    try:
+        if os.path.isdir(target):
+            os.replace(target, old)
+        os.replace(tmp, target)
+    except OSError:
+        # Un autre processus a remplacé ou publié le cache entre-temps
+        shutil.rmtree(tmp, ignore_errors=True)
+    finally:
+        shutil.rmtree(old, ignore_errors=True)
+    return target
+
+
+def _map_columns(cache_dir, columns):
+    """Colonnes mmap de ``cache_dir`` ; ``None`` si le cache a été remplacé pendant l'ouverture."""
+    meta = _read_meta(cache_dir)
+    if meta is None:
+        return None
+
+    arrays = {}
+    try:
+        for col in columns or meta["columns"]:
+            if col not in meta["dtypes"]:
+                raise KeyError(f"Colonne inconnue : {col}")
+            if meta["n_rows"] == 0:
+                arrays[col] = np.empty(0, dtype=meta["dtypes"][col])
+            else:
+                arrays[col] = np.memmap(os.path.join(cache_dir, f"{col}.bin"), dtype=meta["dtypes"][col],
+                                        mode="r", shape=(meta["n_rows"],))
+    except (FileNotFoundError, ValueError):
+        # Fichier supprimé ou plus court que prévu : cache remplacé entre-temps
+        return None
+    # Les fichiers ouverts sont bien ceux décrits par ``meta``
+    return arrays if _read_meta(cache_dir) == meta else None
+
+
+def load_columns(csv_path, columns=None, attempts=5) -> dict:
+    """Colonnes (``np.memmap`` en lecture seule) du jeu de données, converti au besoin.
+
+    Si un autre processus remplace le cache pendant l'ouverture, la lecture
+    est reprise sur le nouveau cache.
+    """
+    for _ in range(attempts):
+        if not is_fresh(csv_path):
+            convert(csv_path)
+        arrays = _map_columns(cache_path(csv_path), columns)
+        if arrays is not None:
+            return arrays
+    raise OSError(f"Cache '{cache_path(csv_path)}' remplacé à chaque lecture ({attempts} essais)")
+
+
+def load_dataset(csv_path, columns=None) -> pd.DataFrame:
+    """DataFrame (noms snake_case) adossé aux colonnes mmap, sans analyse du CSV."""
+    arrays = load_columns(csv_path, columns)
+    return pd.DataFrame({col: np.asarray(a) for col, a in arrays.items()}, copy=False)
+
+
+def load_xy(csv_path):
+    """``(X, y)`` pour l'entraînement : features dans l'ordre de l'API, cible ``quality_category``."""
+    df = load_dataset(csv_path, FEATURE_ORDER + [CATEGORY])
+    return df[FEATURE_ORDER], df[CATEGORY]
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:]) or [
+        os.path.join(ROOT_DIR, "juice.csv"),
+        os.path.join(ROOT_DIR, "juice_data.csv"),
+    ]
+    for path in paths:
+        target = convert(path)
+        meta = _read_meta(target)
+        print(f"✅ {path} -> {target} ({meta['n_rows']} lignes, {len(meta['columns'])} colonnes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
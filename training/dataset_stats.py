@@ -0,0 +1,223 @@
+"""Statistiques d'exploration précalculées (page Streamlit « Exploration »).
+
+``DatasetStats`` accumule, bloc par bloc et en mémoire bornée :
+
+- les moments (effectif, moyennes, matrice des co-moments) fusionnés avec
+  la formule de Chan : moyennes, écarts-types et matrice de corrélation ;
+- une ``QuantileSketch`` par colonne : min, quartiles et max de
+  ``describe()``, histogrammes et effectifs par classe.
+
+L'artefact ``<csv>.stats`` (joblib) est identifié par l'empreinte SHA-256
+du CSV et contient aussi les vues prêtes à afficher (``describe``,
+``corr``, ``class_counts``, ``histograms``, ``head``). ``ensure_stats`` le
+relit s'il est à jour ; si le CSV a seulement reçu des lignes en fin de
+fichier (même préfixe), seules ces lignes sont lues et ajoutées aux
+moments ; sinon tout est recalculé.
+
+Usage :
+    python training/dataset_stats.py juice_data.csv
+"""
+import hashlib
+import io
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from dataset import CATEGORY, ROOT_DIR, snake_case
+from preprocess import QuantileSketch
+
+STATS_SUFFIX = ".stats"
+STATS_VERSION = 1
+HIST_BINS = 30
+HEAD_ROWS = 5
+
+
+class DatasetStats:
+    """Moments et esquisses des colonnes numériques d'un jeu de données."""
+
+    def __init__(self, columns, capacity=65536):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+        self.sketches = {col: QuantileSketch(capacity) for col in self.columns}
+        self.head = None
+
+    def update(self, df):
+        """Ajoute les lignes de ``df`` (colonnes ``columns``) aux statistiques."""
+        if not len(df):
+            return
+        if self.head is None or len(self.head) < HEAD_ROWS:
+            head = df[self.columns].head(HEAD_ROWS)
+            self.head = head if self.head is None else pd.concat([self.head, head]).head(HEAD_ROWS)
+
+        X = df[self.columns].to_numpy(dtype=np.float64)
+        n_b = len(X)
+        mean_b = X.mean(axis=0)
+        centered = X - mean_b
+        comoment_b = centered.T @ centered
+
+        # Fusion de Chan : (n_a, mean_a, C_a) + (n_b, mean_b, C_b)
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.comoment += comoment_b + np.outer(delta, delta) * (self.n * n_b / n)
+        self.mean += delta * (n_b / n)
+        self.n = n
+
+        for j, col in enumerate(self.columns):
+            self.sketches[col].update(X[:, j])
+
+    # ===== Vues =====
+
+    def describe(self) -> pd.DataFrame:
+        """Équivalent de ``df.describe()`` (quartiles exacts tant que les esquisses le sont)."""
+        std = np.sqrt(np.diag(self.comoment) / (self.n - 1)) if self.n > 1 else np.full(len(self.columns), np.nan)
+        rows = {"count": [], "mean": [], "std": [], "min": [], "25%": [], "50%": [], "75%": [], "max": []}
+        for j, col in enumerate(self.columns):
+            sketch = self.sketches[col]
+            rows["count"].append(float(sketch.n))
+            rows["mean"].append(self.mean[j])
+            rows["std"].append(std[j])
+            rows["min"].append(sketch.values[0] if sketch.n else np.nan)
+            for q, name in [(0.25, "25%"), (0.5, "50%"), (0.75, "75%")]:
+                rows[name].append(sketch.quantile(q))
+            rows["max"].append(sketch.values[-1] if sketch.n else np.nan)
+        return pd.DataFrame(rows, index=self.columns).T
+
+    def corr(self) -> pd.DataFrame:
+        """Matrice de corrélation de Pearson (comme ``df.corr()``)."""
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.comoment / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def class_counts(self, col=CATEGORY) -> pd.Series:
+        sketch = self.sketches[col]
+        return pd.Series(sketch.counts, index=sketch.values.astype(np.int64), name="count")
+
+    def histogram(self, col, bins=HIST_BINS):
+        """``(effectifs, bornes)`` de la colonne, calculés sur l'esquisse."""
+        sketch = self.sketches[col]
+        return np.histogram(sketch.values, bins=bins, weights=sketch.counts)
+
+    def views(self) -> dict:
+        """Vues prêtes à afficher, stockées dans l'artefact."""
+        return {
+            "n_rows": self.n,
+            "columns": self.columns,
+            "head": self.head,
+            "describe": self.describe(),
+            "corr": self.corr(),
+            "class_counts": self.class_counts() if CATEGORY in self.sketches else None,
+            "histograms": {col: self.histogram(col) for col in self.columns},
+            "exact": all(s.exact for s in self.sketches.values()),
+        }
+
+
+# ===== Artefact =====
+
+def stats_path(csv_path) -> str:
+    return os.fspath(csv_path) + STATS_SUFFIX
+
+
+def _signature(csv_path):
+    st = os.stat(csv_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _hash_file(path, n_bytes=None, block=1 << 20):
+    """Hachage SHA-256 des ``n_bytes`` premiers octets (tout le fichier par défaut)."""
+    h = hashlib.sha256()
+    remaining = n_bytes if n_bytes is not None else float("inf")
+    with open(path, "rb") as f:
+        while remaining > 0:
+            data = f.read(int(min(block, remaining)))
+            if not data:
+                break
+            h.update(data)
+            remaining -= len(data)
+    return h
+
+
+def _read_csv(source, chunksize, **kwargs):
+    for chunk in pd.read_csv(source, chunksize=chunksize, **kwargs):
+        chunk.columns = [snake_case(c) for c in chunk.columns]
+        yield chunk
+
+
+def save_stats(stats, csv_path):
+    payload = {
+        "version": STATS_VERSION,
+        "dataset_hash": _hash_file(csv_path).hexdigest(),
+        "n_bytes": os.path.getsize(csv_path),
+        "signature": _signature(csv_path),
+        "state": stats,
+        "views": stats.views(),
+    }
+    tmp = f"{stats_path(csv_path)}.{os.getpid()}.tmp"
+    joblib.dump(payload, tmp)
+    os.replace(tmp, stats_path(csv_path))
+    return payload
+
+
+def build_stats(csv_path, chunksize=100000, capacity=65536) -> DatasetStats:
+    """Statistiques complètes de ``csv_path`` (un passage, par blocs)."""
+    stats = None
+    for chunk in _read_csv(csv_path, chunksize):
+        if stats is None:
+            stats = DatasetStats(chunk.select_dtypes("number").columns, capacity)
+        stats.update(chunk)
+    return stats
+
+
+def _load_payload(csv_path):
+    try:
+        payload = joblib.load(stats_path(csv_path))
+    except Exception:
+        return None
+    return payload if payload.get("version") == STATS_VERSION else None
+
+
+def ensure_stats(csv_path, chunksize=100000) -> dict:
+    """Artefact à jour pour ``csv_path`` : relu, complété (ajout en fin de fichier) ou recalculé.
+
+    Retourne le contenu de l'artefact (``views`` pour l'affichage,
+    ``dataset_hash``, ``mode`` = ``"cached"``, ``"appended"`` ou ``"rebuilt"``).
+    """
+    payload = _load_payload(csv_path)
+    if payload is not None and tuple(payload["signature"]) == _signature(csv_path):
+        return {**payload, "mode": "cached"}
+
+    size = os.path.getsize(csv_path)
+    if payload is not None and size >= payload["n_bytes"]:
+        if _hash_file(csv_path, payload["n_bytes"]).hexdigest() == payload["dataset_hash"]:
+            stats = payload["state"]
+            with open(csv_path, "rb") as f:
+                f.seek(payload["n_bytes"])
+                tail = f.read()
+            if tail.strip():
+                names = list(pd.read_csv(csv_path, nrows=0).columns)
+                for chunk in _read_csv(io.BytesIO(tail), chunksize, header=None, names=names):
+                    stats.update(chunk)
+            return {**save_stats(stats, csv_path), "mode": "appended"}
+
+    return {**save_stats(build_stats(csv_path, chunksize), csv_path), "mode": "rebuilt"}
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:]) or [os.path.join(ROOT_DIR, "juice_data.csv")]
+    for path in paths:
+        payload = ensure_stats(path)
+        print(f"✅ {stats_path(path)} ({payload['mode']}, {payload['views']['n_rows']} lignes, "
+              f"empreinte {payload['dataset_hash'][:12]})")
+    return 0
+
+
+if __name__ == "__main__":
+    # Via le module importé : l'état picklé doit référencer dataset_stats.DatasetStats, pas __main__
+    import dataset_stats
+    sys.exit(dataset_stats.main())
@@ -0,0 +1,115 @@
+"""Cache des folds pour la recherche d'hyperparamètres.
+
+Chaque découpage (fold, sous-échantillon, validation d'arrêt précoce) n'est
+calculé qu'une fois par worker puis réutilisé par tous les candidats :
+
+- les tableaux train/test du fold, contigus (float64 pour scikit-learn,
+  float32 pour XGBoost, qui convertit sinon à chaque ``fit``/``predict``) ;
+- pour le Pipeline SVM, le ``StandardScaler`` ajusté sur la partie
+  entraînement du fold et les tableaux transformés : le Pipeline n'a plus
+  à réajuster son scaler pour chaque candidat ;
+- pour XGBoost, les ``QuantileDMatrix`` (esquisses de quantiles calculées
+  une fois par fold au lieu d'une fois par ``fit``).
+"""
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+# Part du fold d'entraînement réservée à l'arrêt précoce de XGBoost
+EARLY_STOPPING_FRACTION = 0.1
+
+
+class FoldSplit:
+    """Tableaux d'un fold : ``X_train``, ``y_train``, ``X_test``, ``y_test``."""
+
+    def __init__(self, X_train, y_train, X_test, y_test):
+        self.X_train = X_train
+        self.y_train = y_train
+        self.X_test = X_test
+        self.y_test = y_test
+
+
+class FoldCache:
+    """Découpages et matrices des folds, mémorisés à la première demande.
+
+    ``datasets`` associe chaque ``data_key`` à sa matrice d'entraînement,
+    ``folds`` est la liste des ``(train_idx, test_idx)``.
+    """
+
+    def __init__(self, datasets, y, folds):
+        self.datasets = datasets
+        self.y = y
+        self.folds = folds
+        self._indices = {}
+        self._splits = {}
+        self._dmatrices = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _memo(self, store, key, build):
+        if key in store:
+            self.hits += 1
+            return store[key]
+        self.misses += 1
+        store[key] = value = build()
+        return value
+
+    # ===== Indices =====
+
+    def train_indices(self, fold, n_samples=None, seed=None):
+        """Indices d'entraînement du fold, éventuellement réduits à ``n_samples`` (stratifié)."""
+        train_idx = self.folds[fold][0]
+        if n_samples is None or n_samples >= len(train_idx):
+            return train_idx
+        return self._memo(self._indices, ("sub", fold, n_samples, seed), lambda: np.sort(train_test_split(
+            train_idx, train_size=n_samples, random_state=seed, stratify=self.y[train_idx],
+        )[0]))
+
+    def early_stopping_indices(self, fold, n_samples=None, seed=None):
+        """``(fit_idx, val_idx)`` : validation d'arrêt précoce prise dans l'entraînement du fold."""
+        train_idx = self.train_indices(fold, n_samples, seed)
+        return self._memo(self._indices, ("es", fold, n_samples, seed), lambda: train_test_split(
+            train_idx, test_size=EARLY_STOPPING_FRACTION, random_state=seed, stratify=self.y[train_idx],
+        ))
+
+    # ===== Tableaux =====
+
+    def split(self, data_key, fold, n_samples=None, seed=None, scale=False, dtype=np.float64):
+        """Tableaux contigus du fold ; ``scale`` applique un StandardScaler ajusté sur l'entraînement."""
+        key = (data_key, fold, n_samples, seed, scale, np.dtype(dtype).str)
+
+        def build():
+            X = self.datasets[data_key]
+            train_idx = self.train_indices(fold, n_samples, seed)
+            test_idx = self.folds[fold][1]
+            X_train, X_test = X[train_idx], X[test_idx]
+            if scale:
+                scaler = StandardScaler().fit(X_train)
+                X_train, X_test = scaler.transform(X_train), scaler.transform(X_test)
+            return FoldSplit(
+                np.ascontiguousarray(X_train, dtype=dtype), self.y[train_idx],
+                np.ascontiguousarray(X_test, dtype=dtype), self.y[test_idx],
+            )
+
+        return self._memo(self._splits, key, build)
+
+    def dmatrices(self, data_key, fold, n_samples=None, seed=None, early_stopping=False):
+        """``QuantileDMatrix`` d'entraînement (et de validation si ``early_stopping``)."""
+        key = (data_key, fold, n_samples, seed, early_stopping)
+
+        def build():
+            X = self.datasets[data_key]
+            if not early_stopping:
+                idx = self.train_indices(fold, n_samples, seed)
+                return xgb.QuantileDMatrix(np.ascontiguousarray(X[idx], dtype=np.float32), self.y[idx]), None
+            fit_idx, val_idx = self.early_stopping_indices(fold, n_samples, seed)
+            dfit = xgb.QuantileDMatrix(np.ascontiguousarray(X[fit_idx], dtype=np.float32), self.y[fit_idx])
+            dval = xgb.QuantileDMatrix(np.ascontiguousarray(X[val_idx], dtype=np.float32), self.y[val_idx],
+                                       ref=dfit)
+            return dfit, dval
+
+        return self._memo(self._dmatrices, key, build)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
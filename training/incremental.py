@@ -0,0 +1,302 @@
+"""Mise à jour incrémentale du modèle sur de nouveaux échantillons étiquetés.
+
+Au lieu de relancer toute la recherche d'hyperparamètres (``train.py``), on
+part du modèle en service :
+
+- XGBoost : le boosting reprend depuis le booster de ``juice_model.pkl``
+  (``xgb_model=``) pour ``--rounds`` arbres supplémentaires, ajustés sur les
+  données complétées (entraînement + nouveaux échantillons) mises à
+  l'échelle avec le scaler existant. Seuls ces arbres sont entraînés ; les
+  nouveaux échantillons seuls, peu nombreux, feraient sur-apprendre ;
+- SVM (Pipeline) : réentraînement « à chaud » sur les vecteurs de support
+  actuels (ramenés dans l'espace d'origine) plus les nouveaux échantillons,
+  avec les mêmes hyperparamètres.
+
+Les nouveaux échantillons sont écrêtés avec les ``clip_bounds`` de
+l'artefact, comme les données d'entraînement, et ceux déjà présents dans
+``--data`` (ou répétés) sont ignorés. ``--append`` n'ajoute que ces lignes
+prétraitées (``preprocess_new``) : ``juice_data.csv`` reste la sortie de
+``preprocess.py``.
+
+Garde-fou : un réentraînement complet avec les mêmes ``best_params`` (un
+seul ``fit``, sans recherche) est évalué sur le même holdout ; si le F1 de la
+mise à jour incrémentale est inférieur de plus de ``--tolerance``, c'est le
+modèle complet qui est sauvegardé.
+
+Le holdout est fixe : l'artefact garde les empreintes de ses lignes (clé
+``holdout``, voir ``train.row_hashes``), auxquelles s'ajoutent 20 % des
+nouveaux échantillons. Après ``--append``, ces lignes restent exclues de
+l'entraînement aux mises à jour suivantes, et les modèles sont toujours
+comparés sur des lignes qu'aucun d'eux n'a vues.
+
+Usage :
+    python training/incremental.py --new new_samples.csv
+    python training/incremental.py --new new_samples.csv --append --deploy
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from dataset import snake_case
+from dataset_stats import ensure_stats
+from preprocess import CATEGORY, DTYPES, ClipBounds, RowDeduplicator, read_chunks, transform_chunk
+from train import DEPLOY_PATHS, ROOT_DIR, StageTimer, evaluate, load_data, row_hashes
+
+warnings.filterwarnings("ignore")
+
+
+def is_xgb(model) -> bool:
+    return hasattr(model, "get_booster")
+
+
+def support_vectors(pipeline):
+    """Vecteurs de support d'un Pipeline(StandardScaler, SVC), dans l'espace d'origine, avec leurs labels."""
+    svc = pipeline.steps[-1][1]
+    X_sv = svc.support_vectors_
+    for _, step in reversed(pipeline.steps[:-1]):
+        X_sv = step.inverse_transform(X_sv)
+    y_sv = np.repeat(svc.classes_, svc.n_support_)
+    return X_sv, y_sv
+
+
+def update_xgb(model, scaler, X, y, rounds):
+    """Poursuit le boosting du modèle existant pour ``rounds`` arbres supplémentaires."""
+    updated = clone(model).set_params(n_estimators=rounds)
+    if scaler is not None:
+        X = scaler.transform(X)
+    updated.fit(X, y, xgb_model=model.get_booster())
+    return updated
+
+
+def update_svm(model, X_new, y_new):
+    """Réentraîne le Pipeline sur les vecteurs de support actuels + les nouveaux échantillons."""
+    X_sv, y_sv = support_vectors(model)
+    updated = clone(model)
+    updated.fit(np.vstack([X_sv, X_new]), np.concatenate([y_sv, y_new]))
+    return updated, len(y_sv)
+
+
+def full_retrain(model, X, y):
+    """Réentraînement complet avec les mêmes hyperparamètres ; retourne ``(modèle, scaler)``."""
+    if is_xgb(model):
+        scaler = StandardScaler().fit(X)
+        return clone(model).fit(scaler.transform(X), y), scaler
+    return clone(model).fit(X, y), None
+
+
+def holdout_f1(model, scaler, X, y, X_test, y_test, name):
+    if scaler is not None:
+        X, X_test = scaler.transform(X), scaler.transform(X_test)
+    return evaluate(model, X, y, X_test, y_test, name)
+
+
+def split_holdout(X, y, holdout, seed):
+    """``(X_train, X_test, y_train, y_test)`` selon les empreintes ``holdout`` de l'artefact.
+
+    Artefact antérieur sans ``holdout`` : découpage stratifié de ``train.py``
+    (même graine), qui ne retrouve le jeu de test d'origine que si les
+    données n'ont pas été complétées depuis.
+    """
+    if holdout is None:
+        print("   ⚠️  Artefact sans holdout enregistré : découpage train/test recalculé")
+        return train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
+    in_test = np.isin(row_hashes(X, y), holdout)
+    return X[~in_test], X[in_test], y[~in_test], y[in_test]
+
+
+def artifact_bounds(current, X_base) -> ClipBounds:
+    """Bornes ``clip_bounds`` de l'artefact, colonnes en snake_case.
+
+    Artefact antérieur sans bornes : refaites sur ``X_base``, déjà écrêté
+    (mêmes bornes que le prétraitement, voir ``ClipBounds.fit``).
+    """
+    data = current.get("clip_bounds")
+    if data is None:
+        return ClipBounds.fit(X_base, columns=list(X_base.columns))
+    return ClipBounds([snake_case(c) for c in data["columns"]], data["lower"], data["upper"])
+
+
+def clip_frame(df, bounds):
+    """Copie de ``df`` écrêtée sur les colonnes de ``bounds`` qu'il contient."""
+    columns = [c for c in bounds.columns if c in df.columns]
+    index = [bounds.columns.index(c) for c in columns]
+    df = df.copy()
+    df[columns] = np.clip(df[columns].to_numpy(), bounds.lower[index], bounds.upper[index])
+    return df
+
+
+def preprocess_new(new_path, data_path, bounds, chunksize=100000):
+    """``(lignes, n_ignorées)`` : ``new_path`` prétraité comme par ``preprocess.py``, aux colonnes de ``data_path``.
+
+    En-têtes CSV ou snake_case acceptés. Les lignes sont écrêtées avec
+    ``bounds`` (``transform_chunk``, qui recalcule ``quality_category``) ;
+    celles déjà présentes dans ``data_path`` ou répétées sont écartées. Après
+    ``--append``, les bornes refaites par ``train.py`` et les caches
+    ``.cols``/``.stats`` ne voient ainsi ni valeurs aberrantes ni doublons.
+    """
+    data_columns = list(pd.read_csv(data_path, nrows=0).columns)
+    by_name = {snake_case(c): c for c in data_columns}
+    new_rows = pd.read_csv(new_path)
+    new_rows.columns = [by_name.get(snake_case(str(c)), c) for c in new_rows.columns]
+    missing = [c for c in data_columns if c not in new_rows.columns and c != CATEGORY]
+    if missing:
+        raise SystemExit(f"❌ Colonnes manquantes dans '{new_path}' : {', '.join(missing)}")
+
+    # Mêmes types que ``read_chunks`` : les empreintes des deux fichiers sont comparables
+    dtypes = {**DTYPES, CATEGORY: np.int64}
+    bounds = ClipBounds([by_name.get(c, c) for c in bounds.columns], bounds.lower, bounds.upper)
+    new_rows = new_rows.astype({col: dtypes[col] for col in DTYPES})
+    new_rows = transform_chunk(new_rows, bounds)[data_columns]
+    # Valeurs telles que relues dans ``data_path`` : ``read_csv`` ne relit pas toujours
+    # exactement le float écrit par ``to_csv`` (0.07100000000000001 -> 0.071)
+    new_rows = pd.read_csv(io.StringIO(new_rows.to_csv(index=False))).astype(dtypes)
+
+    dedup = RowDeduplicator()
+    for chunk in read_chunks(data_path, chunksize):
+        dedup.first_occurrences(chunk[data_columns])
+    keep = dedup.first_occurrences(new_rows)
+    return new_rows[keep].reset_index(drop=True), int((~keep).sum())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mise à jour incrémentale du modèle de qualité de jus")
+    parser.add_argument("--new", required=True, help="CSV des nouveaux échantillons (colonnes de juice.csv)")
+    parser.add_argument("--data", default=os.path.join(ROOT_DIR, "juice_data.csv"))
+    parser.add_argument("--model", default=os.path.join(ROOT_DIR, "juice_model.pkl"))
+    parser.add_argument("--out", default=None, help="artefact de sortie (par défaut : --model)")
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--rounds", type=int, default=25, help="arbres XGBoost ajoutés")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="écart de F1 toléré face au réentraînement complet")
+    parser.add_argument("--append", action="store_true", help="ajouter les nouveaux échantillons à --data")
+    parser.add_argument("--deploy", action="store_true", help="copier l'artefact vers api/ et stream/models/")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out = args.out or args.model
+    timer = StageTimer()
+
+    with timer.stage("Chargement"):
+        current = joblib.load(args.model)
+        model, scaler = current["model"], current.get("scaler")
+        feature_names = current["feature_names"]
+        # Anciens artefacts : noms du CSV ("fixed acidity") -> noms du chargeur
+        columns = [snake_case(name) for name in feature_names]
+
+        X_base, y_base = load_data(args.data)
+        X_base = X_base[columns]
+
+        # Nouveaux échantillons prétraités (écrêtage IQR de l'artefact, doublons écartés),
+        # tels qu'ils seront relus dans --data après --append
+        bounds = artifact_bounds(current, X_base)
+        new_rows, n_ignored = preprocess_new(args.new, args.data, bounds)
+        if new_rows.empty:
+            raise SystemExit(f"❌ Aucun nouvel échantillon : les lignes de '{args.new}' sont déjà dans '{args.data}'")
+        if n_ignored:
+            print(f"   {n_ignored} lignes déjà présentes dans '{args.data}' ou répétées : ignorées")
+        X_new = new_rows.rename(columns=snake_case)[columns]
+        y_new = new_rows[CATEGORY]
+
+        # Holdout : celui de l'artefact (lignes du fichier) + 20 % des nouveaux échantillons
+        Xb_train, Xb_test, yb_train, yb_test = split_holdout(X_base, y_base, current.get("holdout"), args.seed)
+        stratify = y_new if y_new.value_counts().min() >= 2 else None
+        Xn_train, Xn_test, yn_train, yn_test = train_test_split(
+            X_new, y_new, test_size=0.2, random_state=args.seed, stratify=stratify
+        )
+        holdout = np.unique(np.concatenate([row_hashes(Xb_test, yb_test), row_hashes(Xn_test, yn_test)]))
+
+        # Écrêtage IQR de l'artefact, comme à l'entraînement
+        Xb_train, Xb_test = clip_frame(Xb_train, bounds), clip_frame(Xb_test, bounds)
+
+        X_test = pd.concat([Xb_test, Xn_test]).to_numpy()
+        y_test = pd.concat([yb_test, yn_test]).to_numpy()
+        X_all = pd.concat([Xb_train, Xn_train]).to_numpy()
+        y_all = pd.concat([yb_train, yn_train]).to_numpy()
+        print(f"   {len(Xn_train)} nouveaux échantillons d'entraînement, holdout de {len(y_test)} lignes")
+
+    with timer.stage("Mise à jour incrémentale"):
+        if is_xgb(model):
+            inc_model, inc_scaler = update_xgb(model, scaler, X_all, y_all, args.rounds), scaler
+            print(f"   XGBoost : +{args.rounds} arbres depuis le booster existant")
+        elif isinstance(model, Pipeline):
+            inc_model, n_sv = update_svm(model, Xn_train.to_numpy(), yn_train.to_numpy())
+            inc_scaler = None
+            print(f"   SVM : {n_sv} vecteurs de support + {len(yn_train)} nouveaux échantillons")
+        else:
+            raise SystemExit(f"Modèle non pris en charge : {type(model).__name__}")
+
+    with timer.stage("Réentraînement complet (garde-fou)"):
+        full_model, full_scaler = full_retrain(model, X_all, y_all)
+
+    with timer.stage("Évaluation sur le holdout"):
+        results = {
+            "actuel": holdout_f1(model, scaler, X_all, y_all, X_test, y_test, "actuel"),
+            "incrémental": holdout_f1(inc_model, inc_scaler, X_all, y_all, X_test, y_test, "incrémental"),
+            "complet": holdout_f1(full_model, full_scaler, X_all, y_all, X_test, y_test, "complet"),
+        }
+        for name, m in results.items():
+            print(f"   {name:<12} F1 holdout = {m['F1-Score']:.4f}  Accuracy = {m['Test_Accuracy']:.4f}")
+
+        f1_inc, f1_full = results["incrémental"]["F1-Score"], results["complet"]["F1-Score"]
+        if f1_inc >= f1_full - args.tolerance:
+            mode, new_model, new_scaler = "incremental", inc_model, inc_scaler
+            print("   ✅ Mise à jour incrémentale retenue")
+        else:
+            mode, new_model, new_scaler = "full", full_model, full_scaler
+            print(f"   ⚠️  F1 incrémental < F1 complet - {args.tolerance} : repli sur le réentraînement complet")
+
+    with timer.stage("Sauvegarde"):
+        kept = "incrémental" if mode == "incremental" else "complet"
+        model_data = {
+            "model": new_model,
+            "feature_names": feature_names,
+            "accuracy": results[kept]["Test_Accuracy"],
+            "best_params": current.get("best_params"),
+            "scaler": new_scaler,
+            "clip_bounds": current.get("clip_bounds"),
+            "holdout": holdout,
+            "timings": timer.timings,
+            "update": {
+                "mode": mode,
+                "n_new": int(len(y_new)),
+                "f1_incremental": float(f1_inc),
+                "f1_full": float(f1_full),
+                "f1_previous": float(results["actuel"]["F1-Score"]),
+            },
+        }
+        joblib.dump(model_data, out)
+        print(f"   💾 Modèle sauvegardé dans '{out}'")
+
+        if args.append:
+            new_rows.to_csv(args.data, mode="a", header=False, index=False)
+            print(f"   ➕ {len(new_rows)} lignes ajoutées à '{args.data}'")
+            # Statistiques d'exploration : seuls les ajouts sont lus
+            print(f"   📊 Statistiques : {ensure_stats(args.data)['mode']}")
+
+        if args.deploy:
+            for path in DEPLOY_PATHS:
+                if os.path.abspath(path) != os.path.abspath(out):
+                    shutil.copyfile(out, path)
+                    print(f"   📦 Copié vers '{path}'")
+
+    print("\nDurées par étape :")
+    for name, seconds in timer.timings.items():
+        print(f"  {name:<45} {seconds:8.2f} s")
+    return model_data
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() is not None else 1)
@@ -0,0 +1,314 @@
+"""Prétraitement en flux de ``juice.csv`` -> ``juice_data.csv`` (extrait de ``preprocessing.ipynb``).
+
+Mêmes étapes que le notebook, sans jamais charger tout le fichier :
+
+1. lecture par blocs (``--chunksize`` lignes) et suppression des doublons
+   (lignes complètes, première occurrence conservée) par empreinte 64 bits
+   de chaque ligne ;
+2. bornes IQR par colonne (``Q1 - 1.5 IQR``, ``Q3 + 1.5 IQR``) à partir
+   d'esquisses de quantiles ``QuantileSketch`` : exactes (même
+   interpolation linéaire que ``Series.quantile``) tant que le nombre de
+   valeurs distinctes d'une colonne tient dans ``capacity``, approchées
+   au-delà, avec une mémoire bornée ;
+3. second passage : écrêtage vectorisé (un seul ``np.clip`` par bloc),
+   catégorie de qualité vectorisée (``np.searchsorted``) et écriture du
+   CSV bloc par bloc, avec calcul au passage des statistiques d'exploration
+   (``dataset_stats``, artefact ``<output>.stats``).
+
+La mémoire est bornée par la taille d'un bloc et des esquisses, plus
+8 octets par ligne unique pour la déduplication.
+
+Les bornes d'écrêtage (``ClipBounds``) sont aussi enregistrées dans
+``juice_model.pkl`` (clé ``clip_bounds``) pour être réappliquées à
+l'inférence ; ``--attach`` les ajoute à des artefacts existants.
+
+Usage :
+    python training/preprocess.py --input juice.csv --output juice_data.csv [--chunksize 100000]
+    python training/preprocess.py --attach juice_model.pkl api/juice_model.pkl
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Colonnes de juice.csv (ordre du fichier)
+FEATURE_COLUMNS = [
+    "fixed acidity",
+    "volatile acidity",
+    "citric acid",
+    "residual sugar",
+    "chlorides",
+    "free sulfur dioxide",
+    "total sulfur dioxide",
+    "density",
+    "pH",
+    "sulphates",
+    "alcohol",
+]
+TARGET = "quality"
+CATEGORY = "quality_category"
+DTYPES = {**{col: np.float64 for col in FEATURE_COLUMNS}, TARGET: np.int64}
+
+# Mauvais (3-4-5) / Moyen (6) / Bon (7-8-9) : catégorie = nombre de seuils dépassés
+QUALITY_THRESHOLDS = np.array([5, 6])
+
+IQR_FACTOR = 1.5
+
+
+def categorize_quality(quality) -> np.ndarray:
+    """Version vectorisée de ``categorize_quality`` du notebook (0, 1 ou 2)."""
+    return np.searchsorted(QUALITY_THRESHOLDS, np.asarray(quality), side="left")
+
+
+def _lerp(a, b, t):
+    # Même formule que np.quantile (method="linear")
+    diff = b - a
+    return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+
+
+class QuantileSketch:
+    """Esquisse de quantiles d'une colonne : valeurs distinctes triées et leurs effectifs.
+
+    Exacte tant que la colonne compte au plus ``capacity`` valeurs
+    distinctes ; au-delà, les valeurs voisines sont regroupées en
+    ``capacity // 2`` paquets de même poids (erreur de rang bornée par le
+    poids d'un paquet). Deux esquisses se fusionnent avec ``merge``.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+        self.values = np.empty(0, dtype=np.float64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.exact = True
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    def _add(self, values, counts):
+        values = np.concatenate([self.values, values])
+        counts = np.concatenate([self.counts, counts])
+        self.values, inverse = np.unique(values, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts, minlength=len(self.values)).astype(np.int64)
+        if len(self.values) > self.capacity:
+            self._compress()
+
+    def update(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        x = x[~np.isnan(x)]
+        values, counts = np.unique(x, return_counts=True)
+        self._add(values, counts)
+
+    def merge(self, other):
+        self._add(other.values, other.counts)
+        self.exact = self.exact and other.exact
+
+    def _compress(self):
+        n_bins = max(1, self.capacity // 2)
+        cum = np.cumsum(self.counts)
+        # Paquet de chaque valeur selon son rang cumulé ; représentant = valeur médiane du paquet
+        bins = np.minimum((cum - 1) * n_bins // cum[-1], n_bins - 1)
+        bin_counts = np.bincount(bins, weights=self.counts, minlength=n_bins).astype(np.int64)
+        mid_rank = np.cumsum(bin_counts) - (bin_counts + 1) // 2
+        keep = bin_counts > 0
+        self.values = self.values[np.searchsorted(cum, mid_rank[keep], side="right")]
+        self.counts = bin_counts[keep]
+        self.exact = False
+
+    def _value_at(self, cum, rank):
+        return self.values[np.searchsorted(cum, rank, side="right")]
+
+    def quantile(self, q: float) -> float:
+        """Quantile ``q`` avec interpolation linéaire (comme ``Series.quantile``)."""
+        cum = np.cumsum(self.counts)
+        if not len(cum):
+            return np.nan
+        h = (cum[-1] - 1) * q
+        lo = int(np.floor(h))
+        hi = min(lo + 1, int(cum[-1]) - 1)
+        return _lerp(self._value_at(cum, lo), self._value_at(cum, hi), h - lo)
+
+
+class RowDeduplicator:
+    """Suppression des doublons en flux, sur une empreinte 64 bits de chaque ligne.
+
+    Les empreintes vues sont gardées dans quelques tableaux triés (fusionnés
+    par tailles voisines), soit 8 octets par ligne unique.
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def _seen(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[pos] == hashes
+        return found
+
+    def first_occurrences(self, df) -> np.ndarray:
+        """Masque des lignes de ``df`` jamais vues (première occurrence dans le bloc)."""
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        _, first = np.unique(hashes, return_index=True)
+        keep = np.zeros(len(hashes), dtype=bool)
+        keep[first] = True
+        keep &= ~self._seen(hashes)
+
+        self._runs.append(np.sort(hashes[keep]))
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            last = self._runs.pop()
+            self._runs[-1] = np.union1d(self._runs[-1], last)
+        return keep
+
+    @property
+    def n_unique(self) -> int:
+        return sum(len(run) for run in self._runs)
+
+
+def read_chunks(path, chunksize):
+    """Blocs de ``path`` aux types du notebook (features float64, qualité int64)."""
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield chunk.astype({col: dtype for col, dtype in DTYPES.items() if col in chunk.columns})
+
+
+def unique_chunks(path, chunksize):
+    """Blocs dédupliqués (à travers tout le fichier) de ``path``."""
+    dedup = RowDeduplicator()
+    for chunk in read_chunks(path, chunksize):
+        yield chunk[dedup.first_occurrences(chunk)]
+
+
+class ClipBounds:
+    """Bornes d'écrêtage IQR par feature (tableaux ``lower``/``upper`` alignés sur ``columns``)."""
+
+    def __init__(self, columns, lower, upper):
+        self.columns = list(columns)
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, df, columns=FEATURE_COLUMNS, factor=IQR_FACTOR):
+        """Bornes d'un DataFrame en mémoire (mêmes quantiles que ``Series.quantile``).
+
+        Sur ``juice_data.csv``, déjà écrêté, on retrouve exactement les bornes
+        du prétraitement : l'écrêtage ne déplace pas les quartiles.
+        """
+        sketches = {col: QuantileSketch() for col in columns}
+        for col, sketch in sketches.items():
+            sketch.update(df[col].to_numpy())
+        return cls.from_sketches(sketches, factor)
+
+    @classmethod
+    def from_sketches(cls, sketches, factor=IQR_FACTOR):
+        lower, upper = [], []
+        for sketch in sketches.values():
+            q1, q3 = sketch.quantile(0.25), sketch.quantile(0.75)
+            iqr = q3 - q1
+            lower.append(q1 - factor * iqr)
+            upper.append(q3 + factor * iqr)
+        return cls(sketches.keys(), lower, upper)
+
+    def transform(self, X) -> np.ndarray:
+        """Écrêtage vectorisé d'une matrice (n, len(columns))."""
+        return np.clip(X, self.lower, self.upper)
+
+    def to_dict(self) -> dict:
+        """Forme sérialisée stockée dans ``juice_model.pkl`` (tableaux NumPy uniquement)."""
+        return {"columns": list(self.columns), "lower": self.lower.copy(), "upper": self.upper.copy()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["columns"], data["lower"], data["upper"])
+
+
+def attach_bounds(model_path, bounds):
+    """Ajoute (ou remplace) les bornes d'écrêtage dans un artefact existant."""
+    model_data = joblib.load(model_path)
+    model_data["clip_bounds"] = bounds.to_dict()
+    joblib.dump(model_data, model_path)
+
+
+def fit_bounds(path, chunksize=100000, capacity=65536):
+    """Premier passage : bornes IQR des lignes dédupliquées de ``path``."""
+    sketches = {col: QuantileSketch(capacity) for col in FEATURE_COLUMNS}
+    n_rows = 0
+    for chunk in unique_chunks(path, chunksize):
+        n_rows += len(chunk)
+        for col, sketch in sketches.items():
+            sketch.update(chunk[col].to_numpy())
+    return ClipBounds.from_sketches(sketches), sketches, n_rows
+
+
+def transform_chunk(chunk, bounds):
+    """Écrête les features et ajoute ``quality_category`` (sur une copie)."""
+    chunk = chunk.copy()
+    chunk[bounds.columns] = bounds.transform(chunk[bounds.columns].to_numpy())
+    chunk[CATEGORY] = categorize_quality(chunk[TARGET].to_numpy())
+    return chunk
+
+
+def preprocess(input_path, output_path, chunksize=100000, capacity=65536, with_stats=True):
+    """Pipeline complet en deux passages ; retourne ``(bounds, infos)``."""
+    from dataset import snake_case
+    from dataset_stats import DatasetStats, save_stats
+
+    bounds, sketches, n_unique = fit_bounds(input_path, chunksize, capacity)
+
+    stats = None
+    n_written = 0
+    with open(output_path, "w", newline="") as f:
+        for chunk in unique_chunks(input_path, chunksize):
+            out = transform_chunk(chunk, bounds)
+            out.to_csv(f, header=n_written == 0, index=False)
+            n_written += len(chunk)
+            if with_stats:
+                out = out.rename(columns=snake_case)
+                stats = stats or DatasetStats(out.columns, capacity)
+                stats.update(out)
+
+    if stats is not None:
+        save_stats(stats, output_path)
+
+    return bounds, {
+        "rows": n_written,
+        "exact_quantiles": all(sketch.exact for sketch in sketches.values()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prétraitement en flux de juice.csv")
+    parser.add_argument("--input", default=os.path.join(ROOT_DIR, "juice.csv"))
+    parser.add_argument("--output", default=os.path.join(ROOT_DIR, "juice_data.csv"))
+    parser.add_argument("--chunksize", type=int, default=100000)
+    parser.add_argument("--capacity", type=int, default=65536,
+                        help="valeurs distinctes par colonne avant approximation des quantiles")
+    parser.add_argument("--no-stats", action="store_true", help="ne pas produire l'artefact <output>.stats")
+    parser.add_argument("--attach", nargs="+", metavar="MODEL",
+                        help="ajouter les bornes de --input à ces artefacts, sans réécrire --output")
+    args = parser.parse_args(argv)
+
+    if args.attach:
+        bounds = fit_bounds(args.input, args.chunksize, args.capacity)[0]
+        for path in args.attach:
+            attach_bounds(path, bounds)
+            print(f"📎 Bornes d'écrêtage ajoutées à '{path}'")
+        return 0
+
+    start = time.perf_counter()
+    bounds, info = preprocess(args.input, args.output, args.chunksize, args.capacity, not args.no_stats)
+    print(f"✅ {info['rows']} lignes uniques écrites dans '{args.output}' "
+          f"en {time.perf_counter() - start:.2f} s"
+          f" (quantiles {'exacts' if info['exact_quantiles'] else 'approchés'})")
+    for col, lo, hi in zip(bounds.columns, bounds.lower, bounds.upper):
+        print(f"   {col:<22} [{lo:.4g}, {hi:.4g}]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
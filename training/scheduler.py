@@ -0,0 +1,373 @@
+"""Ordonnanceur parallèle des recherches d'hyperparamètres.
+
+Remplace les ``RandomizedSearchCV`` séquentiels du notebook par un unique
+pool de processus alimenté par des tâches (candidat, fold) de toutes les
+recherches à la fois. Les données sont envoyées une seule fois à chaque
+worker (initialiseur du pool) et les estimateurs multi-threadés (XGBoost)
+tournent avec ``n_jobs=1`` dans les workers pour ne pas sur-souscrire les
+cœurs face au parallélisme externe.
+
+Deux modes : ``run_searches`` (équivalent de ``RandomizedSearchCV``, chaque
+candidat sur tous les folds avec toutes les données) et ``run_halving``
+(successive halving : les candidats sont d'abord évalués sur une fraction
+des données de chaque fold, seul le meilleur tiers passe au palier suivant ;
+XGBoost s'arrête tôt sur une validation interne au fold, sauf au dernier
+palier).
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+from sklearn.base import clone
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterSampler
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from fold_cache import FoldCache, FoldSplit
+
+# État partagé par worker : cache des folds, nombre de threads, mode.
+# Le nombre de threads est imposé aux estimateurs via ``n_jobs`` (``_set_threads``).
+_WORKER = {}
+
+
+def _init_worker(datasets, y, folds, inner_threads, use_cache=True):
+    _WORKER["cache"] = FoldCache(datasets, y, folds)
+    _WORKER["threads"] = inner_threads
+    _WORKER["use_cache"] = use_cache
+
+
+def _set_threads(estimator, n_threads):
+    params = estimator.get_params()
+    for name in params:
+        if name == "n_jobs" or name.endswith("__n_jobs"):
+            estimator.set_params(**{name: n_threads})
+    return estimator
+
+
+def supports_early_stopping(estimator) -> bool:
+    return "early_stopping_rounds" in estimator.get_params()
+
+
+def _strip_scaler(estimator):
+    """Pipeline(StandardScaler, ...) -> reste du Pipeline, ou ``None`` si pas de scaler en tête."""
+    if isinstance(estimator, Pipeline) and isinstance(estimator.steps[0][1], StandardScaler):
+        rest = estimator[1:]
+        return rest.steps[0][1] if len(rest.steps) == 1 else rest
+    return None
+
+
+def _xgb_params(est, n_classes):
+    params = {k: v for k, v in est.get_xgb_params().items() if v is not None}
+    if n_classes > 2:
+        params.update(objective="multi:softprob", num_class=n_classes)
+    return params
+
+
+def _xgb_predict(booster, X, n_classes, iteration_range=(0, 0)):
+    proba = booster.inplace_predict(X, iteration_range=iteration_range)
+    return proba.argmax(axis=1) if n_classes > 2 else (proba > 0.5).astype(int)
+
+
+def _fit_xgb_cached(est, cache, data_key, fold, n_samples, early_stopping_rounds, seed, return_train_score):
+    """XGBoost natif sur les ``QuantileDMatrix`` du cache (mêmes prédictions que ``XGBClassifier``)."""
+    data = cache.split(data_key, fold, n_samples, seed, dtype=np.float32)
+    n_classes = len(np.unique(cache.y))
+    params = _xgb_params(est, n_classes)
+    dtrain, dval = cache.dmatrices(data_key, fold, n_samples, seed, early_stopping=bool(early_stopping_rounds))
+
+    start = time.perf_counter()
+    if early_stopping_rounds:
+        booster = xgb.train(params, dtrain, num_boost_round=est.get_num_boosting_rounds(),
+                            evals=[(dval, "validation")], early_stopping_rounds=early_stopping_rounds,
+                            verbose_eval=False)
+        iteration_range = (0, booster.best_iteration + 1)
+    else:
+        booster = xgb.train(params, dtrain, num_boost_round=est.get_num_boosting_rounds())
+        iteration_range = (0, 0)
+    fit_time = time.perf_counter() - start
+
+    test_score = f1_score(data.y_test, _xgb_predict(booster, data.X_test, n_classes, iteration_range),
+                          average="weighted")
+    train_score = np.nan
+    if return_train_score:
+        train_score = f1_score(data.y_train, _xgb_predict(booster, data.X_train, n_classes, iteration_range),
+                               average="weighted")
+    return test_score, train_score, fit_time
+
+
+def fit_and_score(estimator, params, data_key, fold, n_samples=None, early_stopping_rounds=None, seed=None,
+                  return_train_score=False):
+    """Tâche élémentaire : entraîne un candidat sur un fold et le score (f1 pondéré).
+
+    ``n_samples`` limite l'entraînement à un sous-échantillon stratifié du
+    fold ; ``early_stopping_rounds`` active l'arrêt précoce (XGBoost) sur
+    une validation prise dans la partie entraînement du fold. Avec le cache
+    des folds, le scaler de tête d'un Pipeline est remplacé par les tableaux
+    déjà transformés et XGBoost est entraîné sur ses ``QuantileDMatrix``.
+    Comme ``RandomizedSearchCV``, le score d'entraînement (une prédiction de
+    plus sur tout le fold) n'est calculé que si ``return_train_score``.
+    """
+    cache, use_cache = _WORKER["cache"], _WORKER["use_cache"]
+    est = _set_threads(clone(estimator).set_params(**params), _WORKER["threads"])
+
+    if use_cache and isinstance(est, xgb.XGBModel):
+        return _fit_xgb_cached(est, cache, data_key, fold, n_samples, early_stopping_rounds, seed,
+                               return_train_score)
+
+    stripped = _strip_scaler(est) if use_cache else None
+    if stripped is not None:
+        est = stripped
+        data = cache.split(data_key, fold, n_samples, seed, scale=True)
+    elif use_cache:
+        data = cache.split(data_key, fold, n_samples, seed)
+    else:
+        X, y = cache.datasets[data_key], cache.y
+        train_idx, test_idx = cache.train_indices(fold, n_samples, seed), cache.folds[fold][1]
+        data = FoldSplit(X[train_idx], y[train_idx], X[test_idx], y[test_idx])
+
+    start = time.perf_counter()
+    if early_stopping_rounds:
+        fit_idx, val_idx = cache.early_stopping_indices(fold, n_samples, seed)
+        X, y = cache.datasets[data_key], cache.y
+        est.set_params(early_stopping_rounds=early_stopping_rounds)
+        est.fit(X[fit_idx], y[fit_idx], eval_set=[(X[val_idx], y[val_idx])], verbose=False)
+    else:
+        est.fit(data.X_train, data.y_train)
+    fit_time = time.perf_counter() - start
+
+    test_score = f1_score(data.y_test, est.predict(data.X_test), average="weighted")
+    train_score = np.nan
+    if return_train_score:
+        train_score = f1_score(data.y_train, est.predict(data.X_train), average="weighted")
+    return test_score, train_score, fit_time
+
+
+class SearchSpec:
+    """Une recherche aléatoire : estimateur, distributions, nombre de candidats.
+
+    ``data_key`` désigne la matrice d'entraînement à utiliser (ex. ``"raw"``
+    pour le Pipeline SVM, ``"scaled"`` pour XGBoost).
+    """
+
+    def __init__(self, name, estimator, param_distributions, n_iter, data_key, random_state=None):
+        self.name = name
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.data_key = data_key
+        self.random_state = random_state
+
+    def candidates(self) -> list:
+        # Même échantillonnage que RandomizedSearchCV(random_state=...)
+        return list(ParameterSampler(self.param_distributions, self.n_iter, random_state=self.random_state))
+
+
+class SearchResult:
+    """Résultat d'une recherche, avec les attributs usuels de ``RandomizedSearchCV``."""
+
+    def __init__(self, spec, candidates, test_scores, train_scores, fit_times, n_resources=None):
+        self.spec = spec
+        # Historique des paliers (successive halving) : [(n_candidats, n_échantillons)]
+        self.rungs_ = []
+        self.n_resources_ = n_resources
+        test_scores = np.asarray(test_scores)
+        train_scores = np.asarray(train_scores)
+        self.cv_results_ = {
+            "params": candidates,
+            "mean_test_score": test_scores.mean(axis=1),
+            "std_test_score": test_scores.std(axis=1),
+            "mean_fit_time": np.asarray(fit_times).mean(axis=1),
+        }
+        if not np.isnan(train_scores).all():
+            self.cv_results_["mean_train_score"] = train_scores.mean(axis=1)
+        self.best_index_ = int(np.argmax(self.cv_results_["mean_test_score"]))
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(self.cv_results_["mean_test_score"][self.best_index_])
+        self.best_estimator_ = None
+
+    def refit(self, X, y, n_jobs=-1):
+        self.best_estimator_ = _set_threads(clone(self.spec.estimator).set_params(**self.best_params_), n_jobs)
+        self.best_estimator_.fit(X, y)
+        return self.best_estimator_
+
+
+def task_cost(params) -> float:
+    """Estimation grossière du coût d'une tâche (pour lancer les plus longues d'abord)."""
+    return float(params.get("n_estimators", 100)) * (params.get("max_depth", 3) or 3)
+
+
+def _prepare(datasets, y, cv):
+    y = np.asarray(y)
+    datasets = {key: np.ascontiguousarray(X) for key, X in datasets.items()}
+    folds = list(cv.split(next(iter(datasets.values())), y))
+    return datasets, y, folds
+
+
+class _Runner:
+    """Exécute des lots de tâches, en série ou dans un pool réutilisé entre paliers."""
+
+    def __init__(self, datasets, y, folds, n_jobs, use_cache=True):
+        self.n_jobs = n_jobs
+        self.pool = None
+        if n_jobs == 1:
+            _init_worker(datasets, y, folds, 1, use_cache)
+        else:
+            self.pool = ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_init_worker,
+                initargs=(datasets, y, folds, 1, use_cache),
+            )
+
+    def map(self, tasks):
+        """``tasks`` : liste de ``(clé, kwargs de fit_and_score)`` -> ``{clé: résultat}``."""
+        # Les tâches les plus coûteuses d'abord (meilleur remplissage du pool)
+        tasks = sorted(tasks, key=lambda t: task_cost(t[1]["params"]), reverse=True)
+        if self.pool is None:
+            return {key: fit_and_score(**kwargs) for key, kwargs in tasks}
+        futures = [(key, self.pool.submit(fit_and_score, **kwargs)) for key, kwargs in tasks]
+        return {key: future.result() for key, future in futures}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def _collect(results, names, n_candidates, n_folds):
+    scores = {name: [np.zeros((n_candidates[name], n_folds)) for _ in range(3)] for name in names}
+    for (name, c, fold), result in results.items():
+        for k in range(3):
+            scores[name][k][c, fold] = result[k]
+    return scores
+
+
+def run_searches(specs, datasets, y, cv, n_jobs=None, fold_cache=True, return_train_score=False):
+    """Exécute toutes les recherches dans un même pool de processus.
+
+    ``datasets`` associe chaque ``data_key`` à sa matrice ; ``cv`` est un
+    splitter scikit-learn (les folds sont calculés une seule fois sur la
+    première matrice). ``fold_cache`` active le cache des folds (voir
+    ``fold_cache``). Retourne ``{nom: SearchResult}`` (sans refit).
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    datasets, y, folds = _prepare(datasets, y, cv)
+    n_folds = len(folds)
+
+    candidates = {spec.name: spec.candidates() for spec in specs}
+    tasks = [
+        ((spec.name, c, fold), dict(estimator=spec.estimator, params=params, data_key=spec.data_key, fold=fold,
+                                    return_train_score=return_train_score))
+        for spec in specs
+        for c, params in enumerate(candidates[spec.name])
+        for fold in range(n_folds)
+    ]
+    with _Runner(datasets, y, folds, n_jobs, fold_cache) as runner:
+        results = runner.map(tasks)
+
+    scores = _collect(results, candidates, {n: len(c) for n, c in candidates.items()}, n_folds)
+    return {
+        spec.name: SearchResult(spec, candidates[spec.name], *scores[spec.name])
+        for spec in specs
+    }
+
+
+def halving_schedule(n_candidates, max_resources, factor=3, min_resources=None):
+    """Paliers ``[(n_candidats, n_échantillons)]`` du successive halving.
+
+    Le nombre de paliers est choisi pour qu'il reste au plus ``factor``
+    candidats au dernier, entraînés sur toutes les données du fold. Si
+    ``min_resources`` impose moins de paliers (premier palier trop petit), il
+    en reste davantage : 40 candidats au facteur 3 limités à trois paliers
+    finissent avec 5 candidats (40 -> 14 -> 5).
+    """
+    n_rungs = 1
+    while n_candidates > factor ** n_rungs:
+        n_rungs += 1
+    if min_resources:
+        while n_rungs > 1 and max_resources // factor ** (n_rungs - 1) < min_resources:
+            n_rungs -= 1
+
+    rungs = []
+    for r in range(n_rungs):
+        n_keep = max(1, int(np.ceil(n_candidates / factor ** r)))
+        n_samples = max_resources // factor ** (n_rungs - 1 - r)
+        rungs.append((n_keep, n_samples))
+    return rungs
+
+
+def run_halving(specs, datasets, y, cv, n_jobs=None, factor=3, min_resources=100, early_stopping_rounds=20,
+                fold_cache=True, return_train_score=False):
+    """Successive halving sur la taille d'échantillon, toutes recherches confondues.
+
+    À chaque palier, les candidats restants de toutes les recherches sont
+    évalués sur tous les folds (sous-échantillon stratifié de la partie
+    entraînement, même partie test), puis seul le meilleur ``1/factor`` est
+    conservé. Les estimateurs qui l'acceptent (XGBoost) s'arrêtent tôt sur
+    une validation interne au fold, sauf au dernier palier. Les scores
+    retournés sont ceux de ce dernier palier, où les finalistes sont
+    entraînés sur tout le fold avec tous leurs arbres, comme au ``refit`` :
+    ``best_params_`` et ``best_score_`` (f1 pondéré CV) décrivent donc le
+    modèle réentraîné et sont comparables à ``run_searches``.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    datasets, y, folds = _prepare(datasets, y, cv)
+    n_folds = len(folds)
+    max_resources = min(len(train_idx) for train_idx, _ in folds)
+
+    candidates = {spec.name: spec.candidates() for spec in specs}
+    schedules = {
+        spec.name: halving_schedule(len(candidates[spec.name]), max_resources, factor, min_resources)
+        for spec in specs
+    }
+    alive = {name: list(range(len(c))) for name, c in candidates.items()}
+    final = {}
+
+    with _Runner(datasets, y, folds, n_jobs, fold_cache) as runner:
+        for r in range(max(len(s) for s in schedules.values())):
+            tasks = []
+            for spec in specs:
+                schedule = schedules[spec.name]
+                if r >= len(schedule):
+                    continue
+                # Dernier palier : toute la partie entraînement de chaque fold, sans
+                # arrêt précoce (le refit utilise le n_estimators complet du candidat)
+                last = r == len(schedule) - 1
+                n_samples = None if last else schedule[r][1]
+                es = early_stopping_rounds if supports_early_stopping(spec.estimator) and not last else None
+                for c in alive[spec.name]:
+                    for fold in range(n_folds):
+                        tasks.append(((spec.name, c, fold), dict(
+                            estimator=spec.estimator, params=candidates[spec.name][c],
+                            data_key=spec.data_key, fold=fold, n_samples=n_samples,
+                            early_stopping_rounds=es, seed=spec.random_state,
+                            return_train_score=return_train_score,
+                        )))
+            results = runner.map(tasks)
+
+            for spec in specs:
+                schedule = schedules[spec.name]
+                if r >= len(schedule):
+                    continue
+                ids = alive[spec.name]
+                mean = {c: np.mean([results[(spec.name, c, f)][0] for f in range(n_folds)]) for c in ids}
+                if r == len(schedule) - 1:
+                    final[spec.name] = (ids, results, schedule[r][1])
+                else:
+                    n_next = schedule[r + 1][0]
+                    alive[spec.name] = sorted(ids, key=lambda c: mean[c], reverse=True)[:n_next]
+
+    out = {}
+    for spec in specs:
+        ids, results, n_samples = final[spec.name]
+        remap = {(spec.name, k, f): results[(spec.name, c, f)]
+                 for k, c in enumerate(ids) for f in range(n_folds)}
+        scores = _collect(remap, [spec.name], {spec.name: len(ids)}, n_folds)[spec.name]
+        result = SearchResult(spec, [candidates[spec.name][c] for c in ids], *scores, n_resources=n_samples)
+        result.rungs_ = schedules[spec.name]
+        out[spec.name] = result
+    return out
@@ -0,0 +1,244 @@
+"""Pipeline d'entraînement scriptable (extrait de ``juice_model.ipynb``).
+
+Reprend les étapes du notebook : découpage train/test stratifié, scaler,
+modèles de base, recherches aléatoires SVM (Pipeline) et XGBoost, comparaison
+finale sur le jeu de test et sauvegarde du meilleur modèle dans le même
+dictionnaire que le notebook (``model``, ``scaler``, ``feature_names``,
+``accuracy``, ``best_params``), complété des durées par étape (``timings``)
+et des bornes d'écrêtage IQR du prétraitement (``clip_bounds``), réappliquées
+par l'API à l'inférence. Les empreintes des lignes du jeu de test
+(``holdout``) servent de holdout fixe aux mises à jour incrémentales.
+
+Usage :
+    python training/train.py --data juice_data.csv --out juice_model.pkl --jobs 8 --seed 123
+    python training/train.py --deploy   # copie aussi vers api/ et stream/models/
+    python training/train.py --search halving   # successive halving + arrêt précoce
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+import warnings
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import StratifiedKFold, learning_curve, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from xgboost import XGBClassifier
+
+from dataset import load_xy
+from preprocess import ClipBounds
+from scheduler import SearchSpec, run_halving, run_searches
+
+warnings.filterwarnings("ignore")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEPLOY_PATHS = [
+    os.path.join(ROOT_DIR, "api", "juice_model.pkl"),
+    os.path.join(ROOT_DIR, "stream", "models", "juice_model.pkl"),
+]
+
+# Espaces de recherche (identiques au notebook)
+PARAM_GRID_SVM = {
+    "clf__C": np.logspace(-3, 3, 20),
+    "clf__gamma": np.logspace(-4, 1, 20),
+    "clf__kernel": ["rbf", "linear", "poly"],
+    "clf__degree": [2, 3, 4],
+    "clf__class_weight": [None, "balanced"],
+}
+
+PARAM_GRID_XGB = {
+    "n_estimators": [100, 200, 400],
+    "max_depth": [3, 5, 7],
+    "learning_rate": [0.01, 0.05, 0.1],
+    "subsample": [0.7, 0.9, 1.0],
+    "colsample_bytree": [0.7, 0.9, 1.0],
+    "min_child_weight": [1, 3, 5],
+}
+
+
+class StageTimer:
+    """Chronomètre les étapes du pipeline."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        print(f"⏳ {name}...")
+        start = time.perf_counter()
+        yield
+        self.timings[name] = round(time.perf_counter() - start, 3)
+        print(f"   ✔ {name} : {self.timings[name]:.2f} s")
+
+
+def load_data(path):
+    """``(X, y)`` depuis le cache colonnaire de ``path`` (features en snake_case, voir ``dataset``)."""
+    return load_xy(path)
+
+
+def row_hashes(X, y) -> np.ndarray:
+    """Empreintes (uint64) des lignes ``(X, y)``, indépendantes des noms de colonnes.
+
+    Stockées dans l'artefact (clé ``holdout``) pour que ``incremental.py``
+    évalue sur exactement les lignes jamais vues à l'entraînement.
+    """
+    rows = np.column_stack([np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)])
+    return pd.util.hash_pandas_object(pd.DataFrame(rows), index=False).to_numpy()
+
+
+def make_xgb(seed, n_jobs=-1, **params):
+    return XGBClassifier(random_state=seed, eval_metric="mlogloss", n_jobs=n_jobs, **params)
+
+
+def make_svm_pipeline(seed):
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("clf", SVC(random_state=seed)),
+    ])
+
+
+def evaluate(model, X_train, y_train, X_test, y_test, name):
+    y_train_pred = model.predict(X_train)
+    y_test_pred = model.predict(X_test)
+    return {
+        "Model": name,
+        "Train_Accuracy": accuracy_score(y_train, y_train_pred),
+        "Test_Accuracy": accuracy_score(y_test, y_test_pred),
+        "F1-Score": f1_score(y_test, y_test_pred, average="weighted", zero_division=0),
+        "Precision": precision_score(y_test, y_test_pred, average="weighted", zero_division=0),
+        "Recall": recall_score(y_test, y_test_pred, average="weighted", zero_division=0),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Entraînement du modèle de qualité de jus")
+    parser.add_argument("--data", default=os.path.join(ROOT_DIR, "juice_data.csv"))
+    parser.add_argument("--out", default=os.path.join(ROOT_DIR, "juice_model.pkl"))
+    parser.add_argument("--seed", type=int, default=123, help="graine (split, CV, échantillonnage, modèles)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="processus du pool")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--svm-iter", type=int, default=20)
+    parser.add_argument("--xgb-iter", type=int, default=40)
+    parser.add_argument("--search", choices=["random", "halving"], default="random",
+                        help="recherche aléatoire complète ou successive halving")
+    parser.add_argument("--halving-factor", type=int, default=3, help="facteur de réduction par palier")
+    parser.add_argument("--no-fold-cache", action="store_true", help="désactiver le cache des folds")
+    parser.add_argument("--skip-base", action="store_true", help="ne pas évaluer les modèles de base")
+    parser.add_argument("--learning-curves", action="store_true", help="calculer les courbes d'apprentissage")
+    parser.add_argument("--deploy", action="store_true", help="copier l'artefact vers api/ et stream/models/")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    timer = StageTimer()
+    seed = args.seed
+
+    with timer.stage("Chargement des données"):
+        X, y = load_data(args.data)
+        clip_bounds = ClipBounds.fit(X, columns=list(X.columns))
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=seed, stratify=y
+        )
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+        print(f"   Train: {X_train.shape}, Test: {X_test.shape}")
+
+    if not args.skip_base:
+        with timer.stage("Modèles de base"):
+            base_models = [
+                ("XGBoost (base)", make_xgb(seed)),
+                ("SVM RBF (base)", SVC(kernel="rbf", probability=False, random_state=seed)),
+            ]
+            for name, model in base_models:
+                model.fit(X_train_scaled, y_train)
+                m = evaluate(model, X_train_scaled, y_train, X_test_scaled, y_test, name)
+                print(f"   {name:<16} F1 test = {m['F1-Score']:.4f}")
+
+    cv = StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=seed)
+
+    if args.learning_curves:
+        with timer.stage("Courbes d'apprentissage"):
+            for name, model in [("XGBoost (base)", make_xgb(seed, n_jobs=1)),
+                                ("SVM RBF (base)", SVC(kernel="rbf", random_state=seed))]:
+                sizes, _, test_scores = learning_curve(
+                    model, X_train_scaled, y_train, cv=cv, scoring="accuracy", n_jobs=args.jobs,
+                    train_sizes=np.linspace(0.1, 1.0, 8), shuffle=True, random_state=seed,
+                )
+                curve = ", ".join(f"{n}:{s:.3f}" for n, s in zip(sizes, test_scores.mean(axis=1)))
+                print(f"   {name:<16} {curve}")
+
+    with timer.stage("Recherche d'hyperparamètres (SVM + XGBoost)"):
+        specs = [
+            SearchSpec("svm", make_svm_pipeline(seed), PARAM_GRID_SVM, args.svm_iter, "raw", seed),
+            SearchSpec("xgb", make_xgb(seed), PARAM_GRID_XGB, args.xgb_iter, "scaled", seed),
+        ]
+        datasets = {"raw": X_train.to_numpy(), "scaled": X_train_scaled}
+        if args.search == "halving":
+            searches = run_halving(specs, datasets, y_train, cv, n_jobs=args.jobs, factor=args.halving_factor,
+                                   fold_cache=not args.no_fold_cache)
+        else:
+            searches = run_searches(specs, datasets, y_train, cv, n_jobs=args.jobs,
+                                    fold_cache=not args.no_fold_cache)
+        for name, search in searches.items():
+            if search.rungs_:
+                rungs = " -> ".join(f"{n}×{r}" for n, r in search.rungs_)
+                print(f"   {name} : paliers (candidats×échantillons) {rungs}")
+            print(f"   {name} : meilleur f1_weighted CV = {search.best_score_:.4f}  {search.best_params_}")
+
+    with timer.stage("Réentraînement des meilleurs modèles"):
+        best_svm = searches["svm"].refit(X_train.to_numpy(), y_train)
+        best_xgb = searches["xgb"].refit(X_train_scaled, y_train)
+
+    with timer.stage("Comparaison finale"):
+        final_models = {
+            "SVM Optimisé": (best_svm, X_train.to_numpy(), X_test.to_numpy(), searches["svm"]),
+            "XGBoost Optimisé": (best_xgb, X_train_scaled, X_test_scaled, searches["xgb"]),
+        }
+        final_results = {
+            name: evaluate(model, Xtr, y_train, Xte, y_test, name)
+            for name, (model, Xtr, Xte, _) in final_models.items()
+        }
+        for name, m in final_results.items():
+            print(f"   {name:<17} F1 test = {m['F1-Score']:.4f}  Accuracy = {m['Test_Accuracy']:.4f}")
+
+        best_model_name = max(final_results, key=lambda n: final_results[n]["F1-Score"])
+        best_model, _, _, best_search = final_models[best_model_name]
+        print(f"   🏆 Meilleur modèle final : {best_model_name}")
+
+    with timer.stage("Sauvegarde"):
+        model_data = {
+            "model": best_model,
+            "feature_names": X.columns.tolist(),
+            "accuracy": final_results[best_model_name]["Test_Accuracy"],
+            "best_params": best_search.best_params_,
+            "scaler": scaler if best_model_name == "XGBoost Optimisé" else None,
+            "clip_bounds": clip_bounds.to_dict(),
+            "holdout": np.unique(row_hashes(X_test, y_test)),
+            "timings": timer.timings,
+        }
+        joblib.dump(model_data, args.out)
+        print(f"   💾 Modèle sauvegardé dans '{args.out}'")
+
+        if args.deploy:
+            for path in DEPLOY_PATHS:
+                if os.path.abspath(path) != os.path.abspath(args.out):
+                    shutil.copyfile(args.out, path)
+                    print(f"   📦 Copié vers '{path}'")
+
+    print("\nDurées par étape :")
+    for name, seconds in timer.timings.items():
+        print(f"  {name:<45} {seconds:8.2f} s")
+    return model_data
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() is not None else 1)